@@ -8,6 +8,7 @@ setup(
         "weaviate-client",
         "python-dotenv",
         "openai",
+        "numpy",
         "black",
         "wasabi",
         "typer",
@@ -0,0 +1,213 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from SwiftEngine.admission import GENERATION, LOOKUP, AdmissionController
+from SwiftEngine.interface import SwiftQueryEngine
+from SwiftEngine.semantic_cache import normalize_query
+from SwiftEngine.single_flight import AsyncSingleFlight
+from SwiftEngine import tracing
+
+
+class AsyncSwiftQueryEngine:
+    """
+    Asyncio front for a SwiftQueryEngine.
+
+    The Weaviate client used by the engines is blocking, so every call is offloaded
+    to a bounded thread pool instead of running on the event loop. Generations and
+    lookups use separate pools, a burst of slow generations can therefore never
+    starve the health check, suggestions or document fetches. The admission
+    controller bounds the requests in flight per pool and sheds load once its
+    queue is full, cache hits are answered from the lookup lane.
+    """
+
+    def __init__(
+        self,
+        engine: SwiftQueryEngine,
+        generation_workers: int = None,
+        lookup_workers: int = None,
+        admission: AdmissionController = None,
+    ):
+        self.engine = engine
+        self.generation_workers = generation_workers or int(
+            os.environ.get("SWIFT_GENERATION_WORKERS", 64)
+        )
+        self.lookup_workers = lookup_workers or int(
+            os.environ.get("SWIFT_LOOKUP_WORKERS", 16)
+        )
+        self._generation_pool = ThreadPoolExecutor(
+            max_workers=self.generation_workers, thread_name_prefix="swift-generation"
+        )
+        self._lookup_pool = ThreadPoolExecutor(
+            max_workers=self.lookup_workers, thread_name_prefix="swift-lookup"
+        )
+        # Identical queries wait on the same future instead of each holding a worker thread
+        self.in_flight = AsyncSingleFlight()
+        self.admission = admission or AdmissionController()
+        # Engines exposing their cache lookup answer hits without a generation slot
+        self.split_lookup = hasattr(engine, "lookup_cache")
+
+    async def _run(self, pool: ThreadPoolExecutor, fn: Callable, *args) -> Any:
+        # Run in a copy of the request context so the worker records into the request's trace
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(pool, context.run, tracing.call, fn, *args)
+
+    def models(self) -> set:
+        """Generative models a request may ask for, empty if the engine does not route models"""
+        router = getattr(self.engine, "model_router", None)
+        return router.models if router else set()
+
+    async def query(self, query_string: str, model: str = None) -> tuple:
+        """Execute a query without blocking the event loop
+        @parameter query_string : str - Search query
+        @parameter model : str - Generative model, picked by the engine if not given
+        @returns tuple - (system message, iterable list of results)
+        """
+        return await self.in_flight.do(
+            (normalize_query(query_string), model), lambda: self._query(query_string, model)
+        )
+
+    async def _query(self, query_string: str, model: str = None) -> tuple:
+        # Only routing engines take a model, the others are called with the query alone
+        model_args = (model,) if model else ()
+        if not self.split_lookup:
+            args = (query_string, None, model) if model else (query_string,)
+            async with self.admission.slot(GENERATION):
+                return await self._run(self._generation_pool, self.engine.query, *args)
+
+        async with self.admission.slot(LOOKUP):
+            lookup = await self._run(self._lookup_pool, self.engine.lookup_cache, query_string)
+        if lookup[0]:
+            return await self._run(self._lookup_pool, self.engine.query, query_string, lookup)
+        async with self.admission.slot(GENERATION):
+            return await self._run(
+                self._generation_pool, self.engine.query, query_string, lookup, *model_args
+            )
+
+    async def lookup_cache(self, query_string: str) -> Optional[tuple]:
+        """Check the semantic cache in the lookup lane
+        @parameter query_string : str - Search query
+        @returns Optional[tuple] - Result of the engine's lookup_cache, None if the engine has none
+        """
+        if not self.split_lookup:
+            return None
+        async with self.admission.slot(LOOKUP):
+            return await self._run(self._lookup_pool, self.engine.lookup_cache, query_string)
+
+    async def stream_query(
+        self, query_string: str, model: str = None, lookup: tuple = None
+    ) -> AsyncIterator[tuple]:
+        """Stream the events of SwiftQueryEngine.stream_query, each step is pulled on a worker pool.
+        The caller holds the generation slot of a cache miss, so a rejection is sent before the stream starts
+        @parameter query_string : str - Search query
+        @parameter model : str - Generative model, picked by the engine if not given
+        @parameter lookup : tuple - Result of lookup_cache, a hit is replayed on the lookup pool
+        @returns AsyncIterator[tuple] - (event, data) pairs
+        """
+        if lookup is not None:
+            events = self.engine.stream_query(query_string, model, lookup)
+        elif model:
+            events = self.engine.stream_query(query_string, model)
+        else:
+            events = self.engine.stream_query(query_string)
+        pool = self._lookup_pool if lookup and lookup[0] else self._generation_pool
+        async for event in self._pull(events, pool):
+            yield event
+
+    async def query_many(
+        self, query_strings: list[str], model: str = None, parallelism: int = None
+    ) -> AsyncIterator[tuple]:
+        """Stream the answers of SimpleSwiftQueryEngine.query_many in input order, pulled on the generation pool.
+        The caller holds one generation slot per concurrent generation of the batch
+        @parameter query_strings : list[str] - Search queries
+        @parameter model : str - Generative model of all queries, routed per query if not given
+        @parameter parallelism : int - Concurrent generations, the generation slots held by the caller
+        @returns AsyncIterator[tuple] - (system message, results) per query
+        """
+        answers = self.engine.query_many(query_strings, parallelism=parallelism, model=model)
+        async for answer in self._pull(answers):
+            yield answer
+
+    async def _pull(self, iterator: Iterator, pool: ThreadPoolExecutor = None) -> AsyncIterator:
+        # Every step runs on the pool, the generation pool by default. A consumer that stops
+        # early, e.g. a client that went away, closes the iterator once its running step
+        # returned, which ends the OpenAI stream instead of reading it to the end on a worker thread
+        pool = pool or self._generation_pool
+        done = object()
+        step = None
+        try:
+            while True:
+                context = contextvars.copy_context()
+                step = pool.submit(context.run, tracing.call, next, iterator, done)
+                item = await asyncio.wrap_future(step)
+                if item is done:
+                    return
+                yield item
+        finally:
+            if step is None:
+                iterator.close()
+            else:
+                step.add_done_callback(lambda _: iterator.close())
+
+    async def get_suggestions(self, query: str) -> list[str]:
+        """Return prompt suggestions for a partial query
+        @parameter query : str - Partial query
+        @returns list[str] - List of suggestions
+        """
+        async with self.admission.slot(LOOKUP):
+            return await self._run(self._lookup_pool, self.engine.get_suggestions, query)
+
+    async def retrieve_document(self, doc_id: str) -> dict:
+        """Return a document by it's ID (UUID format)
+        @parameter doc_id : str - Document ID
+        @returns dict - Document dict
+        """
+        async with self.admission.slot(LOOKUP):
+            return await self._run(self._lookup_pool, self.engine.retrieve_document, doc_id)
+
+    async def retrieve_documents(self, doc_ids: list[str]) -> dict:
+        """Return multiple documents by their IDs
+        @parameter doc_ids : list[str] - Document IDs
+        @returns dict - Document dicts by ID
+        """
+        async with self.admission.slot(LOOKUP):
+            return await self._run(self._lookup_pool, self.engine.retrieve_documents, doc_ids)
+
+    async def retrieve_all_documents(self) -> list:
+        """Return the meta data of all documents
+        @returns list - List of document dicts
+        """
+        async with self.admission.slot(LOOKUP):
+            return await self._run(self._lookup_pool, self.engine.retrieve_all_documents)
+
+    async def get_document_catalog(self):
+        """Return the document catalog snapshot, loaded on the lookup pool if needed
+        @returns CatalogSnapshot - Catalog snapshot
+        """
+        async with self.admission.slot(LOOKUP):
+            return await self._run(self._lookup_pool, self.engine.get_document_catalog)
+
+    async def is_ready(self) -> bool:
+        """Return the cached readiness of the Weaviate cluster, refreshed in the background
+        @returns bool - Readiness of the cluster
+        """
+        return self.engine.is_ready()
+
+    def stats(self) -> dict:
+        return {
+            **self.engine.stats(),
+            "async_in_flight": self.in_flight.stats(),
+            "admission": self.admission.stats(),
+        }
+
+    def get_client(self):
+        return self.engine.get_client()
+
+    def close(self) -> None:
+        """Wait for running calls and shut the worker pools down"""
+        self._generation_pool.shutdown(wait=True)
+        self._lookup_pool.shutdown(wait=True)
+        self.engine.close()
@@ -1,124 +1,983 @@
 from SwiftEngine.interface import SwiftQueryEngine
+from SwiftEngine.client import WeaviateClientManager
+from SwiftEngine.cache_format import (
+    CACHE_PROPERTIES,
+    decode_entry,
+    encode_entry,
+    rehydrate,
+)
+from SwiftEngine.context import ContextAssembler
+from SwiftEngine.deadline import DeadlineExceeded, StageRunner, stage_budget
+from SwiftEngine.document_catalog import CatalogSnapshot, DocumentCatalog
+from SwiftEngine.embedding import (
+    Embedder,
+    EmbeddingModelMismatch,
+    OpenAIEmbedder,
+    vectorizer_model,
+)
+from SwiftEngine.graphql import run_multi_get, search_clause
+from SwiftEngine.generation import (
+    GenerationError,
+    GenerationTimeout,
+    Generator,
+    OpenAIGenerator,
+    build_prompt,
+)
+from SwiftEngine.lru import LRUCache
+from SwiftEngine.metrics import (
+    CACHE_DISTANCE,
+    CACHE_LOOKUPS,
+    CONTEXT_TOKENS,
+    DOCUMENT_SECONDS,
+    ERRORS,
+    SUGGESTION_SECONDS,
+)
+from SwiftEngine.semantic_cache import (
+    CACHE_DISTANCE_THRESHOLD,
+    LocalSemanticCache,
+    normalize_query,
+    vector_key,
+)
+from SwiftEngine.poller import BackgroundPoller
+from SwiftEngine.query_log import QueryLog
+from SwiftEngine.routing import ModelRouter
+from SwiftEngine.shared_cache import SharedSemanticCache
+from SwiftEngine.single_flight import SingleFlight
+from SwiftEngine.suggestion_index import SuggestionIndex
+from SwiftEngine.top_k import TopKPolicy
+from SwiftEngine.warmer import CacheWarmer
+from SwiftEngine.tracing import (
+    annotate,
+    record_span,
+    record_stage,
+    span,
+    stage,
+)
+from SwiftEngine.write_behind import WriteBehindQueue
 
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Iterator, Optional
+import contextvars
+import hashlib
 import json
+import os
+import re
+import time
+import uuid
 from wasabi import msg
+from weaviate.classes.query import Filter, MetadataQuery
+
+from WeaviateIngestion.manifest import load_run_id
+from WeaviateIngestion.suggestions import suggestion_list
+
+CHUNK_PROPERTIES = ["text", "doc_name", "chunk_id", "doc_uuid", "doc_type", "doc_hash"]
+
+
+def is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+def score_spread(results: list[dict]) -> dict:
+    """Summarize the retrieval scores of a result list for request traces
+    @parameter results : list[dict] - Retrieved chunks
+    @returns dict - Top and bottom score and their spread
+    """
+    scores = [r["_additional"].get("score") or 0.0 for r in results]
+    if not scores:
+        return {"retrieved": 0}
+    return {
+        "retrieved": len(scores),
+        "top_score": max(scores),
+        "score_spread": max(scores) - min(scores),
+    }
+
+
+def to_result(obj, **additional) -> dict:
+    """Convert a Weaviate object to the result dict the API returns, metadata goes under `_additional`
+    @parameter obj : Object - Weaviate object
+    @returns dict - Properties with an `_additional` dict holding the id and the given metadata
+    """
+    return {**obj.properties, "_additional": {"id": str(obj.uuid), **additional}}
+
 
 class SimpleSwiftQueryEngine(SwiftQueryEngine):
+    def __init__(
+        self,
+        weaviate_url: str,
+        weaviate_api_key: str,
+        openai_key: str,
+        embedder: Embedder = None,
+        client_manager: WeaviateClientManager = None,
+        generator: Generator = None,
+    ):
+        super().__init__(weaviate_url, weaviate_api_key, openai_key, client_manager)
+        # Generation runs locally after retrieval, retries never repeat the hybrid search
+        self.generator = generator or OpenAIGenerator(openai_key)
+        # The model is picked per request, the generator's model is the default
+        self.model_router = ModelRouter(self.generator.model)
+        # Embedding, cache lookup and retrieval calls run within the stage budgets of the request deadline
+        self.stages = StageRunner()
+        # Hybrid searches slower than their rolling p95 are sent a second time
+        self.hedge_retrieval = os.environ.get("SWIFT_HEDGE_RETRIEVAL", "true").lower() == "true"
+        # Overlapping chunks are merged and packed under a token budget before generation
+        self.context_assembler = ContextAssembler()
+        # Number of retrieved chunks passed on to generation, fixed or cut at the score elbow
+        self.top_k = TopKPolicy()
+        # Searches per multi-search GraphQL request of query_many
+        self.batch_pack_size = int(os.environ.get("SWIFT_BATCH_PACK_SIZE", 16))
+        # Hybrid search results by query vector
+        self.retrieval_cache = LRUCache(
+            maxsize=int(os.environ.get("SWIFT_RETRIEVAL_CACHE_SIZE", 1024)),
+            ttl=float(os.environ.get("SWIFT_RETRIEVAL_CACHE_TTL", 600)),
+        )
+        # The query vector is computed once here and reused for cache lookup, hybrid search and cache insert
+        self.embedder = embedder or OpenAIEmbedder(openai_key)
+        # With SWIFT_SHARED_CACHE_PATH all workers of the host share one memory-mapped cache
+        cache_options = {
+            "max_entries": int(os.environ.get("SWIFT_LOCAL_CACHE_SIZE", 2048)),
+            "ttl": float(os.environ.get("SWIFT_LOCAL_CACHE_TTL", 3600)),
+        }
+        shared_cache_path = os.environ.get("SWIFT_SHARED_CACHE_PATH")
+        if shared_cache_path:
+            self.local_cache = SharedSemanticCache(shared_cache_path, **cache_options)
+        else:
+            self.local_cache = LocalSemanticCache(**cache_options)
+        # Cache inserts are written to Weaviate in batches off the request path
+        self.cache_writer = WriteBehindQueue(
+            self.write_semantic_cache,
+            batch_size=int(os.environ.get("SWIFT_CACHE_WRITE_BATCH_SIZE", 50)),
+            flush_interval=float(os.environ.get("SWIFT_CACHE_WRITE_INTERVAL", 1.0)),
+            name="swift-cache-writer",
+        )
+        self.cache_ttl = float(os.environ.get("SWIFT_CACHE_TTL_HOURS", 168)) * 3600
+        # Hits of Weaviate cache entries since the last flush, added to the stored counts for the janitor's LFU eviction
+        self.cache_hit_writer = WriteBehindQueue(
+            self.write_cache_hits,
+            batch_size=100,
+            flush_interval=float(os.environ.get("SWIFT_CACHE_HIT_INTERVAL", 30)),
+            name="swift-cache-hits",
+            merge=lambda pending, hit: (pending[0], pending[1] + hit[1]),
+        )
+        # Chunks referenced by compact cache entries, memoized by UUID
+        self.chunk_memo = LRUCache(maxsize=int(os.environ.get("SWIFT_CHUNK_MEMO_SIZE", 4096)))
+        # Suggestions are answered from memory, the index is rebuilt when the Suggestion collection changes
+        self.suggestion_index = SuggestionIndex()
+        self.suggestion_poller = BackgroundPoller(
+            self.suggestion_fingerprint,
+            self.load_suggestions,
+            interval=float(os.environ.get("SWIFT_SUGGESTION_REFRESH_INTERVAL", 300)),
+            name="swift-suggestions",
+        ).start()
+        # Full documents by UUID, bounded by their serialized size
+        self.document_cache = LRUCache(
+            maxsize=100000,
+            max_bytes=int(os.environ.get("SWIFT_DOCUMENT_CACHE_BYTES", 64 * 1024 * 1024)),
+            sizeof=lambda entry: entry[1],
+        )
+        self.document_bytes_served = 0
+        # Document catalog snapshot, reloaded (and local caches dropped) after every ingestion run
+        self.document_catalog = DocumentCatalog(self.retrieve_all_documents)
+        self.ingestion_poller = BackgroundPoller(
+            self.ingestion_fingerprint,
+            self.on_ingestion,
+            interval=float(os.environ.get("SWIFT_INGESTION_POLL_INTERVAL", 60)),
+            name="swift-ingestion",
+        )
+        # Started once assigned, the first poll runs on_ingestion which reads the poller
+        self.ingestion_poller.start()
+        # Concurrent cache misses for the same (or a near-duplicate) query share one generation
+        self.in_flight = SingleFlight(
+            distance_threshold=CACHE_DISTANCE_THRESHOLD
+            if os.environ.get("SWIFT_COALESCE_NEAR_DUPLICATES", "true").lower() == "true"
+            else None
+        )
+        # Served queries, the most frequent ones are warmed along with the suggestions
+        query_log_path = os.environ.get("SWIFT_QUERY_LOG_PATH")
+        self.query_log = QueryLog(query_log_path) if query_log_path else None
+        self.warmer = CacheWarmer(self)
+        if os.environ.get("SWIFT_WARM_ON_STARTUP", "false").lower() == "true":
+            self.warmer.start()
+
     def change_generative_model(self, generative_model: str):
-        class_obj = {"moduleConfig": {"generative-openai": {"model": generative_model}}}
-        SwiftQueryEngine.client.schema.update_config("Chunk", class_obj)
+        """Change the default model of this process, requests can still pick their own"""
+        self.model_router.default_model = generative_model
+
+    def query(self, query_string: str, lookup: tuple = None, model: str = None) -> tuple:
+        """Answer a query from the semantic cache or generate the answer
+        @parameter query_string : str - Search query
+        @parameter lookup : tuple - Result of lookup_cache if the caller already checked the cache
+        @parameter model : str - Generative model, picked by the model router if not given
+        @returns tuple - (system message, iterable list of results)
+        """
+        self.record_query(query_string)
 
-    def query(self, query_string: str) -> tuple:
         # check semantic cache
-        results, system_msg = self.retrieve_semantic_cache(query_string)
+        results, system_msg, vector = lookup or self.lookup_cache(query_string)
 
         if results:
             return (system_msg, results)
 
-        query_results = (
-            SwiftQueryEngine.client.query.get(
-                class_name="Chunk",
-                properties=["text", "doc_name", "chunk_id", "doc_uuid", "doc_type"],
-            )
-            .with_hybrid(query=query_string)
-            .with_generate(
-                grouped_task=f"You are a chatbot for Weaviate, a vector database, answer the query {query_string} with the given snippets of documentation in 2-3 sentences and if needed give code examples at the end of the answer encapsulated with ```programming-language ```."
-            )
-            .with_additional(properties=["score"])
-            .with_limit(8)
-            .do()
+        # Requests for another model never share a generation
+        return self.in_flight.do(
+            (normalize_query(query_string), model),
+            lambda: self.generate(query_string, vector, model=model),
+            vector,
+            model,
         )
 
-        if "data" not in query_results:
-            raise Exception(query_results)
+    def record_query(self, query_string: str) -> None:
+        """Count a served query for the suggestion ranking and the query log"""
+        self.suggestion_index.record(query_string)
+        if self.query_log:
+            self.query_log.record(query_string)
+
+    def generate(
+        self,
+        query_string: str,
+        vector: list[float],
+        results: list[dict] = None,
+        model: str = None,
+    ) -> tuple:
+        """Retrieve chunks and generate the answer for a cache miss
+        @parameter query_string : str - Search query
+        @parameter vector : list[float] - Query vector
+        @parameter results : list[dict] - Retrieved chunks, retrieved here if not given
+        @parameter model : str - Generative model, picked by the model router if not given
+        @returns tuple - (system message, iterable list of results)
+        """
+        if results is None:
+            results = self.retrieve_chunks(query_string, vector)
+        model, reason = self.route_model(query_string, results, model)
+        prompt = self.build_context(query_string, results, model)
 
-        results = query_results["data"]["Get"]["Chunk"]
+        start = time.perf_counter()
+        try:
+            with stage("generation"):
+                system_msg = self.generator.generate(prompt, model, stage_budget("generation"))
+        except GenerationTimeout:
+            self.model_router.record(model, reason, prompt, "", time.perf_counter() - start, True)
+            # The deadline is near, answer with the documents instead of holding the request
+            msg.warn(f"Generation timed out for query {query_string}")
+            return ("Generation timed out, here are the retrieved documents", results)
+        except GenerationError as e:
+            self.model_router.record(model, reason, prompt, "", time.perf_counter() - start, True)
+            # Keep the retrieved documents, only the answer is missing
+            msg.fail(f"Generation failed for query {query_string}: {str(e)}")
+            return (f"Generation failed: {str(e)}", results)
+        self.model_router.record(model, reason, prompt, system_msg, time.perf_counter() - start)
 
-        if results[0]["_additional"]["generate"]["error"]:
-            system_msg = results[0]["_additional"]["generate"]["error"]
+        if system_msg:
+            self.add_semantic_cache(query_string, results, system_msg, vector)
         else:
-            system_msg = results[0]["_additional"]["generate"]["groupedResult"]
-            self.add_semantic_cache(query_string, results, system_msg)
+            system_msg = "No answer could be generated for this query"
 
         return (system_msg, results)
 
-    def retrieve_document(self, doc_id: str) -> dict:
-        document = SwiftQueryEngine.client.data_object.get_by_id(
-            doc_id,
-            class_name="Document",
-        )
+    def query_many(
+        self, query_strings: list[str], parallelism: int = None, model: str = None
+    ) -> Iterator[tuple]:
+        """Answer several queries, each stage runs in bulk: one embedding call for all cache misses,
+        cache lookups and retrievals packed into multi-search GraphQL requests and generations in parallel
+        @parameter query_strings : list[str] - Search queries
+        @parameter parallelism : int - Concurrent generations
+        @parameter model : str - Generative model of all queries, routed per query if not given
+        @returns Iterator[tuple] - (system message, results) per query in input order, as soon as available
+        """
+        parallelism = parallelism or int(os.environ.get("SWIFT_BATCH_PARALLELISM", 8))
+        keys = [normalize_query(query_string) for query_string in query_strings]
+        # Repeated queries are answered once
+        queries = {}
+        for key, query_string in zip(keys, query_strings):
+            self.record_query(query_string)
+            queries.setdefault(key, query_string)
 
-        return document
-    
-    def retrieve_all_documents(self) -> list:
-        query_results = (
-            SwiftQueryEngine.client.query.get(
-                class_name="Document", properties=["doc_name", "doc_type", "doc_link"]
+        answers = {}
+        pending = {}
+        start = time.perf_counter()
+        for key, query_string in queries.items():
+            hit = self.lookup_local_exact(query_string)
+            if hit:
+                answers[key] = hit
+            else:
+                pending[key] = query_string
+        elapsed = time.perf_counter() - start
+
+        vectors = {}
+        if pending:
+            with stage("embed"):
+                vectors = dict(zip(pending, self.embedder.embed_many(list(pending.values()))))
+            start = time.perf_counter()
+            for key, (results, system_msg) in self.retrieve_semantic_cache_many(
+                {key: (pending[key], vectors[key]) for key in pending}
+            ).items():
+                answers[key] = (system_msg, results)
+            record_stage("cache_lookup", elapsed + time.perf_counter() - start)
+        else:
+            record_stage("cache_lookup", elapsed)
+
+        misses = {key: pending[key] for key in pending if key not in answers}
+        retrieved = self.retrieve_chunks_many({key: (misses[key], vectors[key]) for key in misses})
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(parallelism, len(misses))), thread_name_prefix="swift-batch"
+        ) as pool:
+            # Generations still coalesce with concurrent single queries
+            futures = {
+                key: pool.submit(
+                    contextvars.copy_context().run,
+                    self.in_flight.do,
+                    (key, model),
+                    partial(self.generate, misses[key], vectors[key], retrieved[key], model),
+                    vectors[key],
+                    model,
+                )
+                for key in misses
+            }
+            for key in keys:
+                if key in answers:
+                    yield answers[key]
+                    continue
+                try:
+                    answers[key] = futures[key].result()
+                except Exception as e:
+                    # One failed query does not end the batch
+                    ERRORS.inc("batch_query")
+                    msg.fail(f"Batch query {queries[key]} failed: {str(e)}")
+                    answers[key] = (f"Something went wrong! {str(e)}", [])
+                yield answers[key]
+
+    def route_model(self, query_string: str, results: list[dict], model: str = None) -> tuple:
+        """Pick the generative model of a query from its features and retrieval scores
+        @parameter query_string : str - Search query
+        @parameter results : list[dict] - Retrieved chunks
+        @parameter model : str - Model requested by the client
+        @returns tuple - (model, routing reason)
+        """
+        model, reason = self.model_router.route(query_string, results, model)
+        annotate(model=model, model_route=reason)
+        return model, reason
+
+    def build_context(self, query_string: str, results: list[dict], model: str = None) -> str:
+        """Assemble the retrieved chunks into the generation prompt
+        @parameter query_string : str - Search query
+        @parameter results : list[dict] - Retrieved chunks
+        @parameter model : str - Generative model, its tokenizer measures the token budget
+        @returns str - Prompt
+        """
+        with stage("context"):
+            passages, report = self.context_assembler.assemble(
+                results, model or self.model_router.default_model
             )
-            .with_additional(properties=["id"])
-            .with_limit(1000)
-            .do()
-        )
-        results = query_results["data"]["Get"]["Document"]
+        CONTEXT_TOKENS.observe(report["tokens_before"], "before")
+        CONTEXT_TOKENS.observe(report["tokens_after"], "after")
+        annotate(context=report)
+        return build_prompt(query_string, passages)
+
+    def lookup_cache(self, query_string: str) -> tuple:
+        """Check the semantic cache, the query is only embedded when the exact local tier misses
+        @parameter query_string : str - Search query
+        @returns tuple - (results, system message, query vector), results is None on a miss
+        """
+        start = time.perf_counter()
+        local = self.lookup_local_exact(query_string)
+        if local:
+            record_stage("cache_lookup", time.perf_counter() - start)
+            return (local[1], local[0], None)
+        elapsed = time.perf_counter() - start
+
+        with stage("embed"):
+            vector = self.stages.run("embed", self.embedder.embed, query_string)
+
+        # The embedding is reported as its own stage
+        start = time.perf_counter()
+        results, system_msg = self.retrieve_semantic_cache(query_string, vector)
+        record_stage("cache_lookup", elapsed + time.perf_counter() - start)
+        return (results, system_msg, vector)
+
+    def lookup_local_exact(self, query_string: str) -> Optional[tuple]:
+        """Check the exact tier of the local cache
+        @parameter query_string : str - Search query
+        @returns Optional[tuple] - (system message, results) or None on a miss
+        """
+        local = self.local_cache.get_exact(query_string)
+        if not local:
+            return None
+        msg.good(f"Retrieved from local cache for query {query_string}")
+        self.record_cache_hit(local[3])
+        CACHE_LOOKUPS.inc("local_exact", "hit")
+        annotate(cache_tier="local_exact", cache_distance=0.0)
+        return ("Cached (0.0) " + local[1], local[0])
+
+    def retrieve_chunks(
+        self, query_string: str, vector: Optional[list[float]] = None
+    ) -> list[dict]:
+        """Run the hybrid search without generation, cut to the depth of the top-k policy
+        @parameter query_string : str - Search query
+        @parameter vector : Optional[list[float]] - Query vector, embedded if not given
+        @returns list[dict] - Retrieved chunks
+        """
+        candidates = self.retrieve_candidates(query_string, vector)
+        results = self.top_k.cut(candidates)
+        annotate(top_k=len(results), **score_spread(results))
         return results
-    
-    def retrieve_semantic_cache(self, query: str) -> Optional[dict]:
-        query_results = (
-            SwiftQueryEngine.client.query.get(
-                class_name="Cache",
-                properties=["query", "results", "system"],
+
+    def retrieve_candidates(
+        self, query_string: str, vector: Optional[list[float]] = None, limit: int = None
+    ) -> list[dict]:
+        """Run the hybrid search for the candidates of the top-k policy
+        @parameter query_string : str - Search query
+        @parameter vector : Optional[list[float]] - Query vector, embedded if not given
+        @parameter limit : int - Number of candidates, the policy limit if not given
+        @returns list[dict] - Retrieved chunks, best first
+        """
+        limit = limit or self.top_k.limit
+        if vector is None:
+            with stage("embed"):
+                vector = self.stages.run("embed", self.embedder.embed, query_string)
+
+        key = (vector_key(vector), limit)
+        cached = self.retrieval_cache.get(key)
+        if cached is not None:
+            annotate(retrieval_cached=True)
+            return cached
+
+        with stage("retrieval"):
+            response = self.stages.run(
+                "retrieval",
+                partial(
+                    self.client.collections.use("Chunk").query.hybrid,
+                    query=query_string,
+                    vector=vector,
+                    limit=limit,
+                    return_metadata=MetadataQuery(score=True),
+                    return_properties=CHUNK_PROPERTIES,
+                ),
+                hedge=self.hedge_retrieval,
+            )
+        results = [to_result(obj, score=obj.metadata.score) for obj in response.objects]
+        self.retrieval_cache.put(key, results)
+        return results
+
+    def retrieve_chunks_many(self, queries: dict) -> dict:
+        """Run several hybrid searches in multi-search GraphQL requests, cut to the depth of the top-k policy
+        @parameter queries : dict - (query, vector) by key
+        @returns dict - Retrieved chunks by key
+        """
+        limit = self.top_k.limit
+        candidates = {}
+        searches = {}
+        for key, (query_string, vector) in queries.items():
+            cached = self.retrieval_cache.get((vector_key(vector), limit))
+            if cached is not None:
+                candidates[key] = cached
+            else:
+                searches[key] = search_clause("hybrid", vector, query_string)
+
+        if searches:
+            try:
+                with stage("retrieval"):
+                    found = run_multi_get(
+                        self.client,
+                        "Chunk",
+                        searches,
+                        limit,
+                        CHUNK_PROPERTIES,
+                        ["id", "score"],
+                        self.batch_pack_size,
+                    )
+            except Exception as e:
+                # Fall back to one search per query
+                msg.warn(f"Packed retrieval failed, retrieving one by one: {str(e)}")
+                ERRORS.inc("batch_retrieval")
+                found = {
+                    key: self.retrieve_candidates(*queries[key], limit=limit) for key in searches
+                }
+            for key, results in found.items():
+                self.retrieval_cache.put((vector_key(queries[key][1]), limit), results)
+                candidates[key] = results
+
+        return {key: self.top_k.cut(results) for key, results in candidates.items()}
+
+    def stream_query(
+        self, query_string: str, model: str = None, lookup: tuple = None
+    ) -> Iterator[tuple]:
+        """Execute a query and stream the answer, the retrieved documents are always the first event
+        @parameter query_string : str - Search query
+        @parameter model : str - Generative model, picked by the model router if not given
+        @parameter lookup : tuple - Result of lookup_cache if the caller already checked the cache
+        @returns Iterator[tuple] - (event, data) pairs: documents, token (repeated) and done
+        """
+        self.record_query(query_string)
+        results, system_msg, vector = lookup or self.lookup_cache(query_string)
+
+        if results:
+            yield ("documents", results)
+            # Replay cached answers through the same protocol as fresh generations
+            for token in re.findall(r"\S+\s*", system_msg):
+                yield ("token", token)
+            yield ("done", {"system": system_msg, "cached": True})
+            return
+
+        results = self.retrieve_chunks(query_string, vector)
+        yield ("documents", results)
+
+        tokens = []
+        model, reason = self.route_model(query_string, results, model)
+        prompt = self.build_context(query_string, results, model)
+        start = time.perf_counter()
+        try:
+            for token in self.generator.stream(prompt, model):
+                tokens.append(token)
+                yield ("token", token)
+        except GenerationError:
+            self.model_router.record(
+                model, reason, prompt, "".join(tokens), time.perf_counter() - start, True
+            )
+            raise
+        record_stage("generation", time.perf_counter() - start)
+
+        system_msg = "".join(tokens)
+        self.model_router.record(model, reason, prompt, system_msg, time.perf_counter() - start)
+        if system_msg:
+            self.add_semantic_cache(query_string, results, system_msg, vector)
+        yield ("done", {"system": system_msg, "cached": False})
+
+    def retrieve_document(self, doc_id: str) -> dict:
+        return self.retrieve_documents([doc_id]).get(doc_id, {})
+
+    def retrieve_documents(self, doc_ids: list[str]) -> dict:
+        """Return documents by their IDs, documents missing from the cache are fetched in one query
+        @parameter doc_ids : list[str] - Document IDs
+        @returns dict - Document dicts by ID, unknown IDs are left out
+        """
+        start = time.perf_counter()
+        documents = {}
+        missing = []
+        for doc_id in dict.fromkeys(doc_ids):
+            entry = self.document_cache.get(doc_id)
+            if entry is None:
+                # The ID filter rejects malformed UUIDs, they cannot match a document anyway
+                if is_uuid(doc_id):
+                    missing.append(doc_id)
+            else:
+                documents[doc_id] = entry
+
+        if missing:
+            response = self.client.collections.use("Document").query.fetch_objects(
+                filters=Filter.by_id().contains_any(missing),
+                limit=len(missing),
+                return_properties=["text", "doc_name", "doc_type", "doc_link"],
             )
-            .with_near_text(content={"concepts": query})
-            .with_additional(properties=["distance"])
-            .with_limit(1)
-            .do()
+            for obj in response.objects:
+                doc_id = str(obj.uuid)
+                # Same shape as the REST object endpoint
+                document = {"class": "Document", "id": doc_id, "properties": obj.properties}
+                entry = (document, len(json.dumps(document)))
+                self.document_cache.put(doc_id, entry)
+                documents[doc_id] = entry
+
+        self.document_bytes_served += sum(size for _, size in documents.values())
+        seconds = time.perf_counter() - start
+        DOCUMENT_SECONDS.observe(seconds, "weaviate" if missing else "cache")
+        record_span("document_fetch", seconds)
+        return {doc_id: document for doc_id, (document, _) in documents.items()}
+
+    def invalidate_documents(self, doc_ids: list[str] = None) -> None:
+        """Drop documents from the document cache
+        @parameter doc_ids : list[str] - Document IDs, all documents if None
+        """
+        if doc_ids is None:
+            self.document_cache.clear()
+            return
+        for doc_id in doc_ids:
+            self.document_cache.pop(doc_id)
+
+    def retrieve_all_documents(self, page_size: int = 500) -> list:
+        """Return the meta data of all documents, paging through the collection with a cursor
+        @parameter page_size : int - Documents per request
+        @returns list - List of document dicts
+        """
+        documents = self.client.collections.use("Document")
+        results = []
+        cursor = None
+        while True:
+            response = documents.query.fetch_objects(
+                after=cursor,
+                limit=page_size,
+                return_properties=["doc_name", "doc_type", "doc_link"],
+            )
+            results.extend(to_result(obj) for obj in response.objects)
+            if len(response.objects) < page_size:
+                return results
+            cursor = response.objects[-1].uuid
+
+    def get_document_catalog(self) -> CatalogSnapshot:
+        """Return the in-process snapshot of the document catalog
+        @returns CatalogSnapshot - Catalog snapshot with version stamp
+        """
+        return self.document_catalog.get()
+
+    def check_embedding_model(self) -> None:
+        """Fail if the Chunk or Cache collection was vectorized with another model than the
+        query embedder uses, hybrid search and the semantic cache would compare unrelated vectors
+        """
+        model = getattr(self.embedder, "model", None)
+        if model is None:
+            return
+        for name in ("Chunk", "Cache"):
+            stored = vectorizer_model(self.client.collections.use(name).config.get())
+            if stored is None:
+                msg.warn(f"The {name} collection does not record its embedding model, expected {model}")
+            elif stored != model:
+                raise EmbeddingModelMismatch(
+                    f"The {name} collection was vectorized with {stored} but queries are embedded "
+                    f"with {model}, set SWIFT_EMBEDDING_MODEL={stored} or re-ingest"
+                )
+
+    def ingestion_fingerprint(self) -> tuple:
+        """Identify the current state of the ingested data by the last import run and the document count"""
+        count = (
+            self.client.collections.use("Document")
+            .aggregate.over_all(total_count=True)
+            .total_count
         )
+        return (load_run_id(self.client), count)
+
+    def on_ingestion(self, fingerprint: tuple) -> None:
+        """Refresh in-process state after an ingestion run, the first poll only records the fingerprint
+        @parameter fingerprint : tuple - New ingestion fingerprint
+        """
+        if not self.ingestion_poller.changes:
+            return
+        msg.info(f"Ingestion change detected ({fingerprint}), refreshing caches")
+        self.local_cache.clear()
+        self.retrieval_cache.clear()
+        self.chunk_memo.clear()
+        self.invalidate_documents()
+        self.document_catalog.refresh()
+        # Answers of changed documents are gone, warm the popular queries again
+        self.warmer.trigger()
 
-        results = query_results["data"]["Get"]["Cache"]
+    def retrieve_semantic_cache(self, query: str, vector: list[float], record: bool = True) -> tuple:
+        """Look a query up in the local cache, then in the Weaviate Cache collection
+        @parameter query : str - Search query
+        @parameter vector : list[float] - Query vector
+        @parameter record : bool - Count the lookup in the cache stats and hit counts, False for probes
+        @returns tuple - (results, system message), (None, None) on a miss
+        """
+        local = self.lookup_local_cache(query, vector, record)
+        if local:
+            return local
 
-        if not results:
+        try:
+            response = self.stages.run(
+                "cache_lookup",
+                partial(
+                    self.client.collections.use("Cache").query.near_vector,
+                    near_vector=vector,
+                    limit=1,
+                    include_vector=True,
+                    return_metadata=MetadataQuery(distance=True),
+                    return_properties=CACHE_PROPERTIES,
+                ),
+            )
+        except DeadlineExceeded:
+            # A slow cache is treated as a miss, the budget left goes to retrieval and generation
+            CACHE_LOOKUPS.inc("weaviate", "timeout")
+            return None, None
+
+        if not response.objects:
+            if record:
+                CACHE_LOOKUPS.inc("weaviate", "miss")
             return None, None
 
-        result = results[0]
+        obj = response.objects[0]
+        return self.resolve_cache_entry(
+            query,
+            to_result(obj, distance=float(obj.metadata.distance), vector=obj.vector.get("default")),
+            record,
+        )
+
+    def retrieve_semantic_cache_many(self, queries: dict, record: bool = True) -> dict:
+        """Look several queries up in the caches, the Weaviate lookups are packed into multi-search requests
+        @parameter queries : dict - (query, vector) by key
+        @parameter record : bool - Count the lookups in the cache stats and hit counts, False for probes
+        @returns dict - (results, system message) by key, misses are left out
+        """
+        hits = {}
+        searches = {}
+        for key, (query, vector) in queries.items():
+            local = self.lookup_local_cache(query, vector, record)
+            if local:
+                hits[key] = local
+            else:
+                searches[key] = search_clause("nearVector", vector)
+        if not searches:
+            return hits
 
-        if query == result["query"] or result["_additional"]["distance"] <= 0.14:
-            msg.good(f"Retrieved from cache for query {query}")
+        try:
+            found = run_multi_get(
+                self.client,
+                "Cache",
+                searches,
+                1,
+                CACHE_PROPERTIES,
+                ["id", "distance", "vector"],
+                self.batch_pack_size,
+            )
+        except Exception as e:
+            msg.warn(f"Packed cache lookup failed, looking up one by one: {str(e)}")
+            ERRORS.inc("batch_cache_lookup")
+            found = None
+
+        for key in searches:
+            query, vector = queries[key]
+            if found is None:
+                results, system = self.retrieve_semantic_cache(query, vector, record)
+            elif found.get(key):
+                results, system = self.resolve_cache_entry(query, found[key][0], record)
+            else:
+                if record:
+                    CACHE_LOOKUPS.inc("weaviate", "miss")
+                continue
+            if results:
+                hits[key] = (results, system)
+        return hits
+
+    def lookup_local_cache(
+        self, query: str, vector: list[float], record: bool = True
+    ) -> Optional[tuple]:
+        """Check the in-process (or shared) cache, the Weaviate Cache collection is only asked on a miss
+        @returns Optional[tuple] - (results, system message) or None on a miss
+        """
+        local = self.local_cache.lookup(query, vector, record)
+        if not local:
+            return None
+        results, system, distance, cache_id = local
+        annotate(cache_tier="local", cache_distance=distance)
+        if record:
+            msg.good(f"Retrieved from local cache for query {query}")
+            CACHE_LOOKUPS.inc("local", "hit")
+            self.record_cache_hit(cache_id)
+        return (results, f"Cached ({round(distance, 2)}) " + system)
+
+    def resolve_cache_entry(self, query: str, result: dict, record: bool = True) -> tuple:
+        """Turn the nearest Weaviate cache entry into a hit if it is close, fresh and its chunks still exist
+        @parameter query : str - Search query
+        @parameter result : dict - Cache object with `_additional.id`, `distance` and `vector`
+        @parameter record : bool - Count the lookup in the cache stats and hit counts, False for probes
+        @returns tuple - (results, system message), (None, None) on a miss
+        """
+        distance = float(result["_additional"]["distance"])
+        annotate(cache_tier="weaviate", cache_distance=distance)
+
+        # Entries expire after the TTL even if the janitor did not remove them yet
+        if result.get("created_at") and time.time() - result["created_at"] > self.cache_ttl:
+            if record:
+                CACHE_LOOKUPS.inc("weaviate", "expired")
+            return None, None
+
+        if query == result["query"] or distance <= CACHE_DISTANCE_THRESHOLD:
+            system, chunk_ids, scores, cached_results = decode_entry(result)
+            if cached_results is None:
+                cached_results = rehydrate(chunk_ids, scores, self.fetch_chunks(chunk_ids))
+                if cached_results is None:
+                    msg.warn(f"Cached chunks for query {query} no longer exist")
+                    if record:
+                        CACHE_LOOKUPS.inc("weaviate", "stale")
+                    return None, None
+            cache_id = result["_additional"]["id"]
+            if record:
+                msg.good(f"Retrieved from cache for query {query}")
+                CACHE_LOOKUPS.inc("weaviate", "hit")
+                CACHE_DISTANCE.observe(distance, "hit")
+                self.record_cache_hit(cache_id)
+            self.local_cache.put(
+                query,
+                cached_results,
+                system,
+                result["_additional"].get("vector"),
+                cache_id,
+            )
             return (
-                json.loads(result["results"]),
-                f"Cached ({round(float(result['_additional']['distance']),2)}) "
-                + result["system"],
+                cached_results,
+                f"Cached ({round(distance,2)}) " + system,
             )
         else:
+            if record:
+                CACHE_LOOKUPS.inc("weaviate", "miss")
+                CACHE_DISTANCE.observe(distance, "miss")
             return None, None
 
-    def add_semantic_cache(self, query: str, results: list[dict], system: str) -> None:
-        with SwiftQueryEngine.client.batch as batch:
-            batch.batch_size = 1
-            properties = {
-                "query": str(query),
-                "results": json.dumps(results),
-                "system": system,
-            }
-            msg.good(f"Saved to cache for query {query}")
-            SwiftQueryEngine.client.batch.add_data_object(properties, "Cache")
+    def fetch_chunks(self, chunk_ids: list[str]) -> dict:
+        """Fetch chunks by UUID, chunks missing from the memo are fetched in one query
+        @parameter chunk_ids : list[str] - Chunk UUIDs
+        @returns dict - Chunk properties by UUID
+        """
+        chunks = {}
+        missing = []
+        for chunk_id in chunk_ids:
+            chunk = self.chunk_memo.get(chunk_id)
+            if chunk is None:
+                missing.append(chunk_id)
+            else:
+                chunks[chunk_id] = chunk
 
-    def get_suggestions(self, query: str) -> list[str]:
-        query_results = (
-            SwiftQueryEngine.client.query.get(
-                class_name="Suggestion",
-                properties=["suggestion"],
+        if missing:
+            response = self.client.collections.use("Chunk").query.fetch_objects(
+                filters=Filter.by_id().contains_any(missing),
+                limit=len(missing),
+                return_properties=CHUNK_PROPERTIES,
             )
-            .with_bm25(query=query)
-            .with_limit(3)
-            .do()
+            for obj in response.objects:
+                chunk_id = str(obj.uuid)
+                chunk = dict(obj.properties)
+                self.chunk_memo.put(chunk_id, chunk)
+                chunks[chunk_id] = chunk
+
+        return chunks
+
+    def add_semantic_cache(
+        self, query: str, results: list[dict], system: str, vector: list[float]
+    ) -> None:
+        start = time.perf_counter()
+        cache_id = str(uuid.uuid4())
+        self.local_cache.put(query, results, system, vector, cache_id)
+        for result in results:
+            chunk = {k: v for k, v in result.items() if k != "_additional"}
+            self.chunk_memo.put(result["_additional"]["id"], chunk)
+        properties = encode_entry(query, results, system)
+        self.cache_writer.put(normalize_query(query), (properties, vector, cache_id))
+        # Only the request path part, the Weaviate write is timed as cache_flush
+        record_stage("cache_write", time.perf_counter() - start)
+
+    def write_semantic_cache(self, entries: list[tuple]) -> None:
+        """Write a batch of queued cache entries to Weaviate
+        @parameter entries : list[tuple] - (properties, vector, cache id) tuples
+        """
+        cache = self.client.collections.use("Cache")
+        with stage("cache_flush"):
+            with cache.batch.fixed_size(batch_size=len(entries)) as batch:
+                for properties, vector, cache_id in entries:
+                    batch.add_object(properties=properties, uuid=cache_id, vector=vector)
+        if cache.batch.failed_objects:
+            ERRORS.inc("cache_write", amount=len(cache.batch.failed_objects))
+            msg.warn(f"Failed to save {len(cache.batch.failed_objects)} queries to cache")
+        msg.good(f"Saved {len(entries)} queries to cache")
+
+    def record_cache_hit(self, cache_id: Optional[str]) -> None:
+        """Count a hit of a Weaviate cache entry, the hits are added to the stored count in the background
+        @parameter cache_id : Optional[str] - UUID of the cache entry
+        """
+        if cache_id:
+            self.cache_hit_writer.put(cache_id, (cache_id, 1))
+
+    def write_cache_hits(self, entries: list[tuple]) -> None:
+        """Add the hits of cache entries to their stored counts, one read per flush and a partial
+        update of the counter per entry. Workers only send their own increments, but two workers
+        flushing the same entry at the same moment may still lose the hits of one of them, so the
+        counts are approximate.
+        @parameter entries : list[tuple] - (cache id, hits since the last flush)
+        """
+        increments = dict(entries)
+        cache = self.client.collections.use("Cache")
+        response = cache.query.fetch_objects(
+            filters=Filter.by_id().contains_any(list(increments)),
+            limit=len(increments),
+            return_properties=["hits"],
         )
+        # Entries still queued in the cache writer or deleted by the janitor are skipped
+        failed = 0
+        for obj in response.objects:
+            hits = (obj.properties.get("hits") or 0) + increments[str(obj.uuid)]
+            try:
+                cache.data.update(uuid=obj.uuid, properties={"hits": hits})
+            except Exception as e:
+                failed += 1
+                last_error = e
+        if failed:
+            ERRORS.inc("cache_hits", amount=failed)
+            msg.warn(f"Failed to update {failed} cache hit counts: {str(last_error)}")
+
+    def get_suggestions(self, query: str) -> list[str]:
+        if len(self.suggestion_index):
+            with span("suggestions", SUGGESTION_SECONDS, ("index",)):
+                return self.suggestion_index.search(query, limit=3)
 
-        results = query_results["data"]["Get"]["Suggestion"]
+        # The index is still loading, fall back to Weaviate's BM25
+        with span("suggestions", SUGGESTION_SECONDS, ("weaviate",)):
+            response = self.client.collections.use("Suggestion").query.bm25(
+                query=query, limit=3, return_properties=["suggestion"]
+            )
+
+        return [obj.properties["suggestion"] for obj in response.objects]
+
+    def suggestion_fingerprint(self) -> tuple:
+        """Identify the contents of the Suggestion collection by its size and a hash of the suggestions,
+        so suggestions replaced or reworded without changing the count are detected too
+        @returns tuple - (number of suggestions, hash of the sorted suggestions)
+        """
+        suggestions = self.fetch_suggestions()
+        digest = hashlib.sha1("\n".join(sorted(suggestions)).encode()).hexdigest()[:16]
+        return (len(suggestions), digest)
+
+    def fetch_suggestions(self) -> list[str]:
+        """Return the suggestions of the Suggestion collection, a few hundred short prompts"""
+        collection = self.client.collections.use("Suggestion")
+        count = collection.aggregate.over_all(total_count=True).total_count
+        response = collection.query.fetch_objects(
+            limit=max(count or 0, 1), return_properties=["suggestion"]
+        )
+        return [obj.properties["suggestion"] for obj in response.objects]
 
-        if not results:
-            return []
+    def load_suggestions(self, fingerprint: tuple = None) -> None:
+        """Rebuild the suggestion index from the Suggestion collection and the built-in suggestion list
+        @parameter fingerprint : tuple - Fingerprint of the collection that triggered the rebuild
+        """
+        suggestions = suggestion_list + self.fetch_suggestions()
+        self.suggestion_index.build(suggestions)
+        msg.good(f"Suggestion index built with {len(self.suggestion_index)} suggestions")
 
-        suggestions = [result["suggestion"] for result in results]
+    def stats(self) -> dict:
+        return {
+            "client": self.client_manager.stats(),
+            "local_cache": self.local_cache.stats(),
+            "cache_writer": self.cache_writer.stats(),
+            "cache_hit_writer": self.cache_hit_writer.stats(),
+            "in_flight": self.in_flight.stats(),
+            "retrieval_cache": self.retrieval_cache.stats(),
+            "chunk_memo": self.chunk_memo.stats(),
+            "document_catalog": self.document_catalog.stats(),
+            "document_cache": {
+                **self.document_cache.stats(),
+                "hit_ratio": self.document_cache.hits
+                / max(1, self.document_cache.hits + self.document_cache.misses),
+                "bytes_served": self.document_bytes_served,
+            },
+            "suggestion_index": {
+                "size": len(self.suggestion_index),
+                "refreshes": self.suggestion_poller.changes,
+            },
+            "warmer": self.warmer.stats(),
+            "models": self.model_router.stats(),
+            "stages": self.stages.stats(),
+        }
 
-        return suggestions
\ No newline at end of file
+    def close(self) -> None:
+        self.warmer.close()
+        self.cache_writer.close()
+        self.cache_hit_writer.close()
+        self.suggestion_poller.close()
+        self.ingestion_poller.close()
+        if isinstance(self.local_cache, SharedSemanticCache):
+            self.local_cache.close()
+        if self.query_log:
+            self.query_log.close()
+        self.stages.close()
+        if self.owns_client_manager:
+            self.client_manager.close()
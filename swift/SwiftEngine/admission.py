@@ -0,0 +1,226 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from SwiftEngine.metrics import ADMISSIONS, ADMISSION_QUEUE
+from SwiftEngine.tracing import record_span
+
+# Cheap requests (cache lookups, suggestions, documents) and full generations
+LOOKUP = "lookup"
+GENERATION = "generation"
+
+
+class Rejected(Exception):
+    """Raised when a request is shed, carries the HTTP status and the Retry-After seconds"""
+
+    def __init__(self, reason: str, status_code: int = 503, retry_after: int = 1):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `burst`, every request takes one token.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1.0) -> float:
+        """Take tokens if available
+        @parameter cost : float - Tokens the request costs
+        @returns float - 0 if the request may pass, otherwise the seconds until it would
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Token bucket per client. Disabled when the rate is 0, the least recently seen
+    clients are forgotten beyond `max_clients`.
+    """
+
+    def __init__(self, rate: float = None, burst: float = None, max_clients: int = 10000):
+        self.rate = rate if rate is not None else float(os.environ.get("SWIFT_RATE_LIMIT", 0))
+        self.burst = burst or float(os.environ.get("SWIFT_RATE_BURST", max(self.rate * 2, 1)))
+        self.max_clients = max_clients
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client: str, lane: str = LOOKUP, cost: float = 1.0) -> None:
+        """Take tokens of the client's bucket
+        @parameter client : str - Client identifier
+        @parameter lane : str - Lane of the request, for the metrics
+        @parameter cost : float - Tokens the request costs, e.g. the size of a batch
+        """
+        if self.rate <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            self._buckets.move_to_end(client)
+            wait = bucket.take(min(cost, self.burst))
+        if wait:
+            ADMISSIONS.inc(lane, "rate_limited")
+            raise Rejected("Rate limit exceeded", 429, max(1, math.ceil(wait)))
+
+
+class _Lane:
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        # (future, slots) of the waiting requests, in arrival order
+        self.waiters: deque = deque()
+        # Moving average of the slot holding time, used for Retry-After
+        self.seconds = 1.0
+
+
+class AdmissionController:
+    """
+    Limits the requests in flight per lane on one event loop. Requests above the
+    limit wait in a queue shared by both lanes, bounded in size and waiting time.
+    A full queue rejects generations right away, while lookups push out the newest
+    waiting generation, so cheap requests keep flowing during a generation spike.
+    """
+
+    def __init__(
+        self,
+        max_generations: int = None,
+        max_lookups: int = None,
+        max_queue: int = None,
+        queue_timeout: float = None,
+    ):
+        self.lanes = {
+            GENERATION: _Lane(
+                GENERATION, max_generations or int(os.environ.get("SWIFT_MAX_GENERATIONS", 64))
+            ),
+            LOOKUP: _Lane(LOOKUP, max_lookups or int(os.environ.get("SWIFT_MAX_LOOKUPS", 256))),
+        }
+        self.max_queue = (
+            max_queue if max_queue is not None else int(os.environ.get("SWIFT_MAX_QUEUE", 128))
+        )
+        self.queue_timeout = queue_timeout or float(os.environ.get("SWIFT_QUEUE_TIMEOUT", 10))
+
+    async def acquire(self, lane_name: str, slots: int = 1) -> int:
+        """Wait for slots of the lane, all of them are taken at once
+        @parameter lane_name : str - LOOKUP or GENERATION
+        @parameter slots : int - Slots to take, e.g. the concurrent generations of a batch, at most the lane limit
+        @returns int - Slots taken, to be released together
+        """
+        lane = self.lanes[lane_name]
+        slots = max(1, min(slots, lane.limit))
+        if lane.in_flight + slots <= lane.limit and not lane.waiters:
+            lane.in_flight += slots
+            ADMISSIONS.inc(lane_name, "admitted")
+            return slots
+
+        if self.waiting() >= self.max_queue and not (lane_name == LOOKUP and self.shed()):
+            ADMISSIONS.inc(lane_name, "rejected")
+            raise Rejected("Server is overloaded, the queue is full", 503, self.retry_after(lane))
+
+        future = asyncio.get_running_loop().create_future()
+        lane.waiters.append((future, slots))
+        ADMISSION_QUEUE.inc(lane_name)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._forget(lane, future)
+            ADMISSIONS.inc(lane_name, "timeout")
+            raise Rejected("Timed out waiting in the queue", 503, self.retry_after(lane))
+        except asyncio.CancelledError:
+            # A slot handed over right before the cancellation must be given back
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release(lane_name, slots=slots)
+            else:
+                self._forget(lane, future)
+            raise
+        finally:
+            record_span("queue", time.perf_counter() - start)
+        ADMISSIONS.inc(lane_name, "queued")
+        return slots
+
+    def release(self, lane_name: str, seconds: float = None, slots: int = 1) -> None:
+        """Free slots and hand them to the next waiters of the lane, in arrival order
+        @parameter lane_name : str - LOOKUP or GENERATION
+        @parameter seconds : float - How long the slots were held
+        @parameter slots : int - Slots taken by the request
+        """
+        lane = self.lanes[lane_name]
+        lane.in_flight -= slots
+        if seconds is not None:
+            lane.seconds = 0.9 * lane.seconds + 0.1 * seconds
+        while lane.waiters:
+            future, wanted = lane.waiters[0]
+            if not future.done() and lane.in_flight + wanted > lane.limit:
+                break
+            lane.waiters.popleft()
+            ADMISSION_QUEUE.dec(lane_name)
+            if not future.done():
+                lane.in_flight += wanted
+                future.set_result(True)
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str) -> AsyncIterator[None]:
+        """Hold a slot of the lane for the duration of the block"""
+        await self.acquire(lane_name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(lane_name, time.perf_counter() - start)
+
+    def shed(self) -> bool:
+        """Reject the newest waiting generation to make room in the queue
+        @returns bool - Whether a generation was shed
+        """
+        lane = self.lanes[GENERATION]
+        while lane.waiters:
+            future, _ = lane.waiters.pop()
+            ADMISSION_QUEUE.dec(GENERATION)
+            if not future.done():
+                ADMISSIONS.inc(GENERATION, "shed")
+                future.set_exception(
+                    Rejected("Shed for cheaper requests", 503, self.retry_after(lane))
+                )
+                return True
+        return False
+
+    def waiting(self) -> int:
+        return sum(len(lane.waiters) for lane in self.lanes.values())
+
+    def retry_after(self, lane: _Lane) -> int:
+        """Estimate the seconds until the queue ahead of a new request drained"""
+        return max(1, math.ceil(lane.seconds * (len(lane.waiters) + 1) / lane.limit))
+
+    def stats(self) -> dict:
+        return {
+            name: {"in_flight": lane.in_flight, "waiting": len(lane.waiters), "limit": lane.limit}
+            for name, lane in self.lanes.items()
+        }
+
+    def _forget(self, lane: _Lane, future: asyncio.Future) -> None:
+        for waiter in lane.waiters:
+            if waiter[0] is future:
+                lane.waiters.remove(waiter)
+                ADMISSION_QUEUE.dec(lane.name)
+                return
@@ -0,0 +1,87 @@
+import base64
+import json
+import time
+import zlib
+from typing import Optional
+
+# Version of the compact `Cache` entry format, legacy entries have no version
+CACHE_FORMAT_VERSION = 1
+
+CACHE_PROPERTIES = [
+    "query",
+    "system",
+    "results",
+    "answer",
+    "chunk_ids",
+    "scores",
+    "format",
+    "created_at",
+    "hits",
+]
+
+
+def compress_text(text: str) -> str:
+    """Compress a text to a base64 encoded zlib string
+    @parameter text : str - Text
+    @returns str - Compressed text
+    """
+    return base64.b64encode(zlib.compress(text.encode("utf-8"), 9)).decode("ascii")
+
+
+def decompress_text(data: str) -> str:
+    """Decompress a text created by compress_text
+    @parameter data : str - Compressed text
+    @returns str - Text
+    """
+    return zlib.decompress(base64.b64decode(data)).decode("utf-8")
+
+
+def encode_entry(query: str, results: list[dict], system: str) -> dict:
+    """Build the compact `Cache` properties, chunks are stored by UUID and score instead of their full text
+    @parameter query : str - Query
+    @parameter results : list[dict] - Retrieved chunks, each with `_additional.id` and `_additional.score`
+    @parameter system : str - Generated answer
+    @returns dict - Cache object properties
+    """
+    return {
+        "query": str(query),
+        "answer": compress_text(system),
+        "chunk_ids": [str(result["_additional"]["id"]) for result in results],
+        "scores": [float(result["_additional"].get("score") or 0) for result in results],
+        "format": CACHE_FORMAT_VERSION,
+        "created_at": time.time(),
+        "hits": 0,
+        # Lets the cache janitor invalidate answers of documents changed by an import
+        "doc_hashes": sorted({str(r["doc_hash"]) for r in results if r.get("doc_hash")}),
+    }
+
+
+def decode_entry(properties: dict) -> tuple:
+    """Read a `Cache` object in either the compact or the legacy format
+    @parameter properties : dict - Cache object properties
+    @returns tuple - (system message, chunk ids, scores, results), results is only set for legacy entries
+    """
+    if properties.get("format"):
+        return (
+            decompress_text(properties["answer"]),
+            list(properties.get("chunk_ids") or []),
+            list(properties.get("scores") or []),
+            None,
+        )
+    return (properties["system"], None, None, json.loads(properties["results"]))
+
+
+def rehydrate(chunk_ids: list[str], scores: list[float], chunks: dict) -> Optional[list[dict]]:
+    """Rebuild the result list of a compact entry from fetched chunks
+    @parameter chunk_ids : list[str] - Chunk UUIDs in result order
+    @parameter scores : list[float] - Scores in result order
+    @parameter chunks : dict - Chunk properties by UUID
+    @returns Optional[list[dict]] - Results, None if a chunk no longer exists
+    """
+    results = []
+    for chunk_id, score in zip(chunk_ids, scores):
+        chunk = chunks.get(chunk_id)
+        if chunk is None:
+            return None
+        results.append({**chunk, "_additional": {"id": chunk_id, "score": score}})
+    return results
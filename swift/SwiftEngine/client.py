@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from typing import Optional
+
+import weaviate
+from weaviate import WeaviateClient
+from weaviate.classes.init import AdditionalConfig, Auth, Timeout
+from weaviate.config import ConnectionConfig, GrpcConfig
+from wasabi import msg
+
+from SwiftEngine.poller import BackgroundPoller
+
+
+def client_config() -> AdditionalConfig:
+    """Connection pool, keep-alive and timeout settings of the Weaviate client, read from the environment
+    @returns AdditionalConfig - Weaviate client configuration
+    """
+    return AdditionalConfig(
+        connection=ConnectionConfig(
+            session_pool_connections=int(os.environ.get("SWIFT_WEAVIATE_POOL_CONNECTIONS", 20)),
+            session_pool_maxsize=int(os.environ.get("SWIFT_WEAVIATE_POOL_MAXSIZE", 100)),
+            session_pool_max_retries=int(os.environ.get("SWIFT_WEAVIATE_MAX_RETRIES", 3)),
+            session_pool_timeout=int(os.environ.get("SWIFT_WEAVIATE_POOL_TIMEOUT", 5)),
+        ),
+        timeout=Timeout(
+            init=float(os.environ.get("SWIFT_WEAVIATE_INIT_TIMEOUT", 2)),
+            # Close to the retrieval budget, calls abandoned by a deadline hold a stage worker until then
+            query=float(os.environ.get("SWIFT_WEAVIATE_QUERY_TIMEOUT", 5)),
+            insert=float(os.environ.get("SWIFT_WEAVIATE_INSERT_TIMEOUT", 90)),
+        ),
+        # Keep idle gRPC channels open between bursts of queries
+        grpc_config=GrpcConfig(
+            channel_options=[
+                ("grpc.keepalive_time_ms", int(os.environ.get("SWIFT_WEAVIATE_KEEPALIVE_MS", 30000))),
+                ("grpc.keepalive_permit_without_calls", 1),
+            ]
+        ),
+    )
+
+
+def connect(weaviate_url: str, weaviate_api_key: str, openai_key: str) -> WeaviateClient:
+    """Open a Weaviate Cloud connection with the configured pool settings
+    @parameter weaviate_url : str - Weaviate URL to cluster
+    @parameter weaviate_api_key : str - Weaviate API Key
+    @parameter openai_key : str - OpenAI API Key, forwarded to the generative and vectorizer modules
+    @returns WeaviateClient - Connected client
+    """
+    return weaviate.connect_to_weaviate_cloud(
+        cluster_url=weaviate_url,
+        auth_credentials=Auth.api_key(weaviate_api_key),
+        headers={"X-OpenAI-Api-Key": openai_key},
+        additional_config=client_config(),
+        skip_init_checks=True,
+    )
+
+
+class WeaviateClientManager:
+    """
+    Owns the Weaviate client of one worker process.
+
+    The connection is opened on first use instead of at import time. Readiness is
+    checked by a background poller and cached. A failed check only marks the client
+    stale: the next call opens a new one and the old client, which requests may
+    still be using, is closed once their queries had time to time out.
+    """
+
+    def __init__(
+        self,
+        weaviate_url: str,
+        weaviate_api_key: str,
+        openai_key: str,
+        readiness_interval: float = None,
+        retire_after: float = None,
+    ):
+        self.weaviate_url = weaviate_url
+        self.weaviate_api_key = weaviate_api_key
+        self.openai_key = openai_key
+        self.ready = False
+        self.connects = 0
+        self.failures = 0
+        # Seconds a replaced client stays open, calls on it end within the query timeout
+        self.retire_after = (
+            retire_after
+            if retire_after is not None
+            else float(os.environ.get("SWIFT_WEAVIATE_QUERY_TIMEOUT", 5))
+        )
+        self._client: Optional[WeaviateClient] = None
+        self._stale = False
+        self._retired: list = []
+        self._lock = threading.Lock()
+        self.readiness_poller = BackgroundPoller(
+            self.check_readiness,
+            self.set_readiness,
+            interval=readiness_interval
+            or float(os.environ.get("SWIFT_READINESS_INTERVAL", 10)),
+            name="swift-readiness",
+        )
+
+    def start(self) -> "WeaviateClientManager":
+        """Start the readiness poller, the first check connects in the background"""
+        self.readiness_poller.start()
+        return self
+
+    def get(self) -> WeaviateClient:
+        """Return the client, connecting if there is none or it is stale
+        @returns WeaviateClient - Connected client
+        """
+        client = self._client
+        if client is None or self._stale:
+            with self._lock:
+                if self._client is None or self._stale:
+                    if self._client is not None:
+                        self._retired.append((time.monotonic(), self._client))
+                    self._client = connect(
+                        self.weaviate_url, self.weaviate_api_key, self.openai_key
+                    )
+                    self._stale = False
+                    self.connects += 1
+                    msg.good("Connected to Weaviate Client")
+                client = self._client
+        return client
+
+    def collection(self, name: str):
+        """Return a collection handle of the managed client
+        @parameter name : str - Collection name
+        @returns Collection - Collection handle
+        """
+        return self.get().collections.use(name)
+
+    def check_readiness(self) -> bool:
+        """Ask the cluster whether it is ready, any failure marks the client stale for a reconnect
+        @returns bool - Readiness of the cluster
+        """
+        self.close_retired()
+        try:
+            if self.get().is_ready():
+                return True
+        except Exception as e:
+            msg.warn(f"Weaviate readiness check failed: {str(e)}")
+        self.failures += 1
+        self.reconnect()
+        return False
+
+    def set_readiness(self, ready: bool) -> None:
+        self.ready = ready
+
+    def reconnect(self) -> None:
+        """Mark the current client stale, the next call opens a new connection"""
+        self.ready = False
+        self._stale = True
+
+    def close_retired(self, force: bool = False) -> None:
+        """Close the replaced clients whose calls had time to finish
+        @parameter force : bool - Close all of them, e.g. on shutdown
+        """
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            kept = []
+            for retired, client in self._retired:
+                if force or now - retired >= self.retire_after:
+                    due.append(client)
+                else:
+                    kept.append((retired, client))
+            self._retired = kept
+        for client in due:
+            self._close(client)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "connected": self._client is not None and not self._stale,
+            "connects": self.connects,
+            "failures": self.failures,
+            "retired": len(self._retired),
+        }
+
+    def close(self) -> None:
+        self.readiness_poller.close()
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            self._close(client)
+        self.close_retired(force=True)
+
+    @staticmethod
+    def _close(client: WeaviateClient) -> None:
+        try:
+            client.close()
+        except Exception as e:
+            msg.warn(f"Closing the Weaviate client failed: {str(e)}")
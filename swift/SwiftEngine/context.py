@@ -0,0 +1,176 @@
+import os
+import re
+
+from SwiftEngine.generation import count_tokens
+
+# Shortest run of shared words accepted as the overlap of two chunks
+MIN_OVERLAP = 5
+SHINGLE_SIZE = 3
+
+
+def tokenize(text: str) -> list[str]:
+    """Split a text into words that keep their trailing whitespace, joining them restores the text"""
+    return re.findall(r"\S+\s*", text)
+
+
+def overlap(head: list[str], tail: list[str]) -> int:
+    """Return the number of words the end of head shares with the start of tail
+    @parameter head : list[str] - Words of the earlier chunk
+    @parameter tail : list[str] - Words of the later chunk
+    @returns int - Overlapping words, 0 if there is no overlap
+    """
+    if not head or not tail:
+        return 0
+    head = [word.strip() for word in head]
+    tail = [word.strip() for word in tail]
+    first = tail[0]
+    # The earliest match is the longest overlap
+    for i in range(max(0, len(head) - len(tail)), len(head)):
+        if head[i] == first and head[i:] == tail[: len(head) - i]:
+            return len(head) - i
+    return 0
+
+
+def shingles(text: str) -> set:
+    words = text.casefold().split()
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)}
+    return {tuple(words[i : i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _score(result: dict) -> float:
+    try:
+        return float(result.get("_additional", {}).get("score") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _chunk_id(result: dict) -> float:
+    try:
+        return float(result.get("chunk_id"))
+    except (TypeError, ValueError):
+        return float("inf")
+
+
+class ContextAssembler:
+    """
+    Turns retrieved chunks into the passages of the prompt. Chunks are split with a
+    large overlap, so hits from the same document are merged into one passage, near
+    duplicate passages are dropped and the rest is packed under a token budget.
+    """
+
+    def __init__(self, token_budget: int = None, duplicate_threshold: float = None):
+        self.token_budget = token_budget or int(os.environ.get("SWIFT_CONTEXT_TOKEN_BUDGET", 2000))
+        self.duplicate_threshold = duplicate_threshold or float(
+            os.environ.get("SWIFT_CONTEXT_DUPLICATE_THRESHOLD", 0.8)
+        )
+
+    def assemble(self, results: list[dict], model: str = "gpt-3.5-turbo") -> tuple:
+        """Assemble the prompt passages of the retrieved chunks
+        @parameter results : list[dict] - Retrieved chunks, best first
+        @parameter model : str - Model whose tokenizer counts the budget
+        @returns tuple - (passages, report), passages are dicts with text, doc_uuid, doc_name, chunk_ids and score
+        """
+        merged = self.merge(results)
+        unique = self.deduplicate(merged)
+        passages, truncated = self.pack(unique, model)
+        report = {
+            "chunks": len(results),
+            "passages": len(passages),
+            "merged": len(results) - len(merged),
+            "duplicates": len(merged) - len(unique),
+            "truncated": truncated,
+            "tokens_before": sum(count_tokens(str(r.get("text", "")), model) for r in results),
+            "tokens_after": sum(p["tokens"] for p in passages),
+        }
+        return passages, report
+
+    def merge(self, results: list[dict]) -> list[dict]:
+        """Merge adjacent or overlapping chunks of the same document, passages are ordered by their best score
+        @parameter results : list[dict] - Retrieved chunks
+        @returns list[dict] - Passages
+        """
+        documents = {}
+        for result in results:
+            documents.setdefault(result.get("doc_uuid") or id(result), []).append(result)
+
+        passages = []
+        for chunks in documents.values():
+            passage = None
+            for chunk in sorted(chunks, key=_chunk_id):
+                words = tokenize(str(chunk.get("text", "")))
+                if passage is not None:
+                    shared = overlap(passage["words"], words)
+                    adjacent = _chunk_id(chunk) - passage["last_chunk_id"] == 1
+                    if shared >= MIN_OVERLAP or shared == len(words) or adjacent:
+                        last = passage["words"][-1] if passage["words"] else "\n"
+                        if not last[-1].isspace():
+                            # Chunk texts end without whitespace, adjacent chunks go on a new line
+                            passage["words"][-1] = last + (" " if shared else "\n")
+                        passage["words"].extend(words[shared:])
+                        passage["chunk_ids"].append(chunk.get("chunk_id"))
+                        passage["last_chunk_id"] = _chunk_id(chunk)
+                        passage["score"] = max(passage["score"], _score(chunk))
+                        continue
+                passage = {
+                    "words": words,
+                    "doc_uuid": chunk.get("doc_uuid"),
+                    "doc_name": chunk.get("doc_name"),
+                    "chunk_ids": [chunk.get("chunk_id")],
+                    "last_chunk_id": _chunk_id(chunk),
+                    "score": _score(chunk),
+                }
+                passages.append(passage)
+
+        return sorted(
+            (
+                {
+                    "text": "".join(p["words"]).strip(),
+                    "doc_uuid": p["doc_uuid"],
+                    "doc_name": p["doc_name"],
+                    "chunk_ids": p["chunk_ids"],
+                    "score": p["score"],
+                }
+                for p in passages
+            ),
+            key=lambda p: -p["score"],
+        )
+
+    def deduplicate(self, passages: list[dict]) -> list[dict]:
+        """Drop passages whose shingles are mostly contained in a better scored passage
+        @parameter passages : list[dict] - Passages, best first
+        @returns list[dict] - Remaining passages
+        """
+        kept = []
+        for passage in passages:
+            current = shingles(passage["text"])
+            if any(
+                len(current & other) >= self.duplicate_threshold * len(current)
+                for _, other in kept
+            ):
+                continue
+            kept.append((passage, current))
+        return [passage for passage, _ in kept]
+
+    def pack(self, passages: list[dict], model: str) -> tuple:
+        """Keep the best passages that fit the token budget, a passage is only cut when nothing fit before it
+        @parameter passages : list[dict] - Passages, best first
+        @parameter model : str - Model whose tokenizer counts the budget
+        @returns tuple - (packed passages with their token counts, whether a passage was cut)
+        """
+        packed = []
+        used = 0
+        truncated = False
+        for passage in passages:
+            tokens = count_tokens(passage["text"], model)
+            if used + tokens > self.token_budget:
+                if packed:
+                    continue
+                words = tokenize(passage["text"])
+                keep = max(1, int(len(words) * self.token_budget / max(tokens, 1)))
+                passage = {**passage, "text": "".join(words[:keep]).strip()}
+                tokens = count_tokens(passage["text"], model)
+                truncated = True
+            packed.append({**passage, "tokens": tokens})
+            used += tokens
+        return packed, truncated
@@ -0,0 +1,201 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from SwiftEngine.metrics import DEADLINE_EXCEEDED, HEDGED_CALLS
+from SwiftEngine.tracing import annotate
+
+# Upper bounds of the stages in seconds, generation gets whatever is left of the deadline
+DEFAULT_STAGE_BUDGETS = {"embed": 2.0, "cache_lookup": 1.0, "retrieval": 3.0}
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("swift_deadline", default=None)
+
+
+def stage_budgets() -> dict:
+    """Return the stage budgets in seconds, the defaults overridden by SWIFT_STAGE_BUDGETS"""
+    return {**DEFAULT_STAGE_BUDGETS, **json.loads(os.environ.get("SWIFT_STAGE_BUDGETS", "{}"))}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage ran out of its budget"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"{stage.replace('_', ' ').capitalize()} timed out")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    End-to-end deadline of a request, split into per-stage budgets. A stage gets its
+    own budget or the rest of the deadline, whichever is shorter.
+    """
+
+    def __init__(self, seconds: float = None, budgets: dict = None):
+        self.seconds = seconds or float(os.environ.get("SWIFT_QUERY_DEADLINE", 20))
+        self.budgets = budgets if budgets is not None else stage_budgets()
+        self.expires = time.monotonic() + self.seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def budget(self, stage: str) -> float:
+        """Return the seconds a stage may take from now
+        @parameter stage : str - Stage name
+        @returns float - Budget, 0 once the deadline passed
+        """
+        return min(self.budgets.get(stage, self.seconds), self.remaining())
+
+
+@contextmanager
+def deadline_scope(seconds: float = None) -> Iterator[Deadline]:
+    """Run the block, and the worker calls it offloads in a copy of its context, under a deadline"""
+    token = _current_deadline.set(Deadline(seconds))
+    try:
+        yield _current_deadline.get()
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def stage_budget(stage: str) -> Optional[float]:
+    """Budget of a stage under the current deadline, None without a deadline"""
+    deadline = _current_deadline.get()
+    return deadline.budget(stage) if deadline is not None else None
+
+
+class RollingLatency:
+    """
+    The last `window` durations of an operation, for its rolling quantiles.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return a quantile of the window, None until `min_samples` durations were seen"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class StageRunner:
+    """
+    Runs the blocking calls of a stage within the stage budget of the current deadline.
+    A hedged call that is still running at the stage's rolling p95 is duplicated once,
+    whichever copy finishes first wins. Calls without a deadline or hedge run inline.
+    Calls that ran out of budget are abandoned, not cancelled, and keep their worker
+    until the client gives up: the embedder's OpenAI client times out near the embed
+    budget without retries, the Weaviate client after SWIFT_WEAVIATE_QUERY_TIMEOUT.
+    """
+
+    def __init__(
+        self, workers: int = None, hedge_quantile: float = None, min_hedge_delay: float = None
+    ):
+        self.workers = workers or int(os.environ.get("SWIFT_STAGE_WORKERS", 32))
+        self.hedge_quantile = hedge_quantile or float(os.environ.get("SWIFT_HEDGE_QUANTILE", 0.95))
+        self.min_hedge_delay = (
+            min_hedge_delay
+            if min_hedge_delay is not None
+            else float(os.environ.get("SWIFT_HEDGE_MIN_DELAY", 0.05))
+        )
+        self.latency: dict = {}
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="swift-stage")
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """Seconds after which a call of the stage is hedged, None until enough calls were timed"""
+        quantile = self.window(stage).quantile(self.hedge_quantile)
+        return max(quantile, self.min_hedge_delay) if quantile is not None else None
+
+    def run(self, stage: str, fn: Callable, *args, hedge: bool = False) -> Any:
+        """Call fn within the stage budget
+        @parameter stage : str - Stage name, selects the budget and the latency window
+        @parameter fn : Callable - Blocking call, must be safe to run twice when hedged
+        @parameter hedge : bool - Duplicate the call once it is slower than the stage's p95
+        @returns Any - Result of the first call to succeed
+        """
+        budget = stage_budget(stage)
+        delay = self.hedge_delay(stage) if hedge else None
+        if budget is None and delay is None:
+            return self._timed(stage, fn, *args)
+        if budget is not None and budget <= 0:
+            self._exceeded(stage)
+
+        end = time.monotonic() + budget if budget is not None else None
+        primary = self._submit(stage, fn, *args)
+        pending = {primary}
+        hedged = False
+        error = None
+        while pending:
+            timeout = None if end is None else max(0.0, end - time.monotonic())
+            if delay is not None and not hedged:
+                timeout = delay if timeout is None else min(timeout, delay)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if hedged:
+                        HEDGED_CALLS.inc(stage, "primary" if future is primary else "hedge")
+                    return future.result()
+                error = future.exception()
+            if done:
+                continue
+            if delay is not None and not hedged and (end is None or time.monotonic() < end):
+                # Still running at the p95, a duplicate often avoids the tail
+                hedged = True
+                pending.add(self._submit(stage, fn, *args))
+                annotate(**{f"{stage}_hedged": True})
+                continue
+            self._exceeded(stage)
+        raise error
+
+    def stats(self) -> dict:
+        return {
+            stage: {
+                "p50": latency.quantile(0.5),
+                "p95": latency.quantile(0.95),
+            }
+            for stage, latency in self.latency.items()
+        }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+    def window(self, stage: str) -> RollingLatency:
+        """Return the latency window of a stage"""
+        latency = self.latency.get(stage)
+        if latency is None:
+            latency = self.latency.setdefault(stage, RollingLatency())
+        return latency
+
+    def _submit(self, stage: str, fn: Callable, *args):
+        # The copy carries the trace and the deadline into the worker
+        context = contextvars.copy_context()
+        return self._pool.submit(context.run, self._timed, stage, fn, *args)
+
+    def _timed(self, stage: str, fn: Callable, *args) -> Any:
+        start = time.perf_counter()
+        result = fn(*args)
+        self.window(stage).add(time.perf_counter() - start)
+        return result
+
+    @staticmethod
+    def _exceeded(stage: str) -> None:
+        DEADLINE_EXCEEDED.inc(stage)
+        annotate(deadline_exceeded=stage)
+        raise DeadlineExceeded(stage)
@@ -0,0 +1,91 @@
+import bisect
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the document catalog. Every document is serialized once
+    when the snapshot is built, responses only join the pre-serialized parts.
+    """
+
+    def __init__(self, documents: list[dict]):
+        self.documents = sorted(documents, key=lambda d: d["_additional"]["id"])
+        self.serialized = [json.dumps(d) for d in self.documents]
+        self.ids = [d["_additional"]["id"] for d in self.documents]
+        self.version = hashlib.sha1("\n".join(self.serialized).encode()).hexdigest()[:16]
+        self.etag = f'"{self.version}"'
+        self.created_at = time.time()
+
+    def page(self, cursor: Optional[str], limit: int) -> tuple[list[dict], Optional[str]]:
+        """Return the documents after a cursor. The cursor's document may be gone after a refresh,
+        the page then starts at the next ID in order, so a paginating client misses no document
+        @parameter cursor : Optional[str] - ID of the last document of the previous page
+        @parameter limit : int - Page size
+        @returns tuple[list[dict], Optional[str]] - (documents, cursor of the next page or None on the last page)
+        """
+        start = bisect.bisect_right(self.ids, cursor) if cursor else 0
+        documents = self.documents[start : start + limit]
+        more = start + limit < len(self.documents)
+        next_cursor = documents[-1]["_additional"]["id"] if documents and more else None
+        return documents, next_cursor
+
+    def iter_json(self, batch_size: int = 500) -> Iterator[bytes]:
+        """Stream the full catalog as `{"documents": [...]}` in chunks
+        @parameter batch_size : int - Documents per chunk
+        @returns Iterator[bytes] - JSON chunks
+        """
+        yield b'{"documents": ['
+        for i in range(0, len(self.serialized), batch_size):
+            prefix = "," if i else ""
+            yield (prefix + ",".join(self.serialized[i : i + batch_size])).encode()
+        yield b"]}"
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+
+class DocumentCatalog:
+    """
+    In-process snapshot of the `Document` catalog, loaded on first use and replaced
+    as a whole on refresh.
+    """
+
+    def __init__(self, load_fn: Callable[[], list[dict]]):
+        self.load_fn = load_fn
+        self.refreshes = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> CatalogSnapshot:
+        """Return the current snapshot, loading it if needed
+        @returns CatalogSnapshot - Snapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = CatalogSnapshot(self.load_fn())
+                    self.refreshes += 1
+                snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self) -> CatalogSnapshot:
+        """Reload the catalog, requests keep using the old snapshot until the new one is ready
+        @returns CatalogSnapshot - New snapshot
+        """
+        snapshot = CatalogSnapshot(self.load_fn())
+        self._snapshot = snapshot
+        self.refreshes += 1
+        return snapshot
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "size": len(snapshot) if snapshot else 0,
+            "version": snapshot.version if snapshot else None,
+            "refreshes": self.refreshes,
+        }
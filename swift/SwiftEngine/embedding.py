@@ -0,0 +1,88 @@
+import os
+from typing import Optional
+
+import openai
+
+from SwiftEngine.deadline import stage_budgets
+from SwiftEngine.lru import LRUCache
+
+# Has to match the text2vec-openai model of the Chunk and Cache collections
+EMBEDDING_MODEL = os.environ.get("SWIFT_EMBEDDING_MODEL", "text-embedding-3-small")
+
+
+class EmbeddingModelMismatch(Exception):
+    """Raised when a collection was vectorized with another model than the query embedder uses"""
+
+
+def vectorizer_model(config) -> Optional[str]:
+    """Return the text2vec-openai model a collection was vectorized with
+    @parameter config : CollectionConfig - Result of collection.config.get()
+    @returns Optional[str] - Model name, None if the collection does not record it
+    """
+    model = dict(getattr(config.vectorizer_config, "model", None) or {})
+    name = model.get("model")
+    # Legacy collections store e.g. model "ada" and modelVersion "002"
+    if name and model.get("modelVersion"):
+        name = f"text-embedding-{name}-{model['modelVersion']}"
+    return name
+
+
+class Embedder:
+    """
+    Interface for query embedders, results are memoized per text.
+    """
+
+    def __init__(self, memo_size: int = 4096):
+        self.memo = LRUCache(maxsize=memo_size)
+
+    def embed(self, text: str) -> list[float]:
+        """Return the vector of a text
+        @parameter text : str - Text to embed
+        @returns list[float] - Vector
+        """
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """Return the vectors of multiple texts, only memo misses are sent to the model in one call
+        @parameter texts : list[str] - Texts to embed
+        @returns list[list[float]] - Vectors in input order
+        """
+        vectors = [self.memo.get(text) for text in texts]
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+
+        if missing:
+            embedded = dict(zip(missing, self._embed(missing)))
+            for text, vector in embedded.items():
+                self.memo.put(text, vector)
+            vectors = [v if v is not None else embedded[t] for t, v in zip(texts, vectors)]
+
+        return vectors
+
+    def _embed(self, texts: list[str]) -> list[list[float]]:
+        raise NotImplementedError("_embed must be implemented by a subclass.")
+
+
+class OpenAIEmbedder(Embedder):
+    """
+    Embeds with the OpenAI embeddings API, the same model Weaviate's text2vec-openai module uses.
+    Calls time out near the embed budget and are not retried: a call abandoned by its
+    deadline would otherwise hold a stage worker for the client's default 10 minutes, retried twice.
+    """
+
+    def __init__(
+        self,
+        openai_key: str,
+        model: str = EMBEDDING_MODEL,
+        memo_size: int = 4096,
+        timeout: float = None,
+    ):
+        super().__init__(memo_size)
+        self.model = model
+        self.timeout = timeout or float(
+            os.environ.get("SWIFT_EMBEDDING_TIMEOUT", stage_budgets()["embed"])
+        )
+        self.client = openai.OpenAI(api_key=openai_key, timeout=self.timeout, max_retries=0)
+
+    def _embed(self, texts: list[str]) -> list[list[float]]:
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
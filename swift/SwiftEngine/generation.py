@@ -0,0 +1,203 @@
+import functools
+import os
+import re
+import time
+from typing import Iterator
+
+import openai
+from wasabi import msg
+
+from SwiftEngine.metrics import ERRORS
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+GROUPED_TASK = "You are a chatbot for Weaviate, a vector database, answer the query {query} with the given snippets of documentation in 2-3 sentences and if needed give code examples at the end of the answer encapsulated with ```programming-language ```."
+
+
+def grouped_task(query_string: str) -> str:
+    """Return the grouped generation task for a query
+    @parameter query_string : str - Search query
+    @returns str - Prompt task
+    """
+    return GROUPED_TASK.format(query=query_string)
+
+
+def build_prompt(query_string: str, results: list[dict]) -> str:
+    """Build the grouped prompt the same way Weaviate's generative module does, task first then the snippets
+    @parameter query_string : str - Search query
+    @parameter results : list[dict] - Retrieved chunks
+    @returns str - Prompt
+    """
+    snippets = "\n\n".join(str(result.get("text", "")) for result in results)
+    return f"{grouped_task(query_string)}\n\n{snippets}"
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count the tokens of a text, estimated from its length when tiktoken is not installed
+    @parameter text : str - Text
+    @parameter model : str - Model whose tokenizer is used
+    @returns int - Number of tokens
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Encodings are downloaded on first use, offline hosts fall back to the estimate
+        return None
+
+
+class GenerationError(Exception):
+    """Raised when the generation failed after all retries"""
+
+
+class GenerationTimeout(GenerationError):
+    """Raised when the generation ran out of its time budget"""
+
+
+class Generator:
+    """
+    Interface for answer generators. Failed calls are retried with exponential backoff,
+    a stream is only retried while no token was yielded yet. Every failure reaches the
+    caller as a GenerationError.
+    """
+
+    # Exceptions worth another attempt, anything else fails immediately
+    retryable: tuple = (TimeoutError, ConnectionError)
+
+    def __init__(
+        self,
+        model: str = "gpt-3.5-turbo",
+        timeout: float = None,
+        retries: int = None,
+        backoff: float = 0.5,
+    ):
+        # Default model, every request may ask for another one
+        self.model = model
+        self.timeout = timeout or float(os.environ.get("SWIFT_GENERATION_TIMEOUT", 30))
+        self.retries = (
+            retries if retries is not None else int(os.environ.get("SWIFT_GENERATION_RETRIES", 2))
+        )
+        self.backoff = backoff
+
+    def generate(self, prompt: str, model: str = None, budget: float = None) -> str:
+        """Generate the full answer for a prompt
+        @parameter prompt : str - Prompt
+        @parameter model : str - Model of this request, the default model if not given
+        @parameter budget : float - Seconds the whole generation may take, retries included
+        @returns str - Answer
+        """
+        return "".join(self.stream(prompt, model, budget))
+
+    def stream(self, prompt: str, model: str = None, budget: float = None) -> Iterator[str]:
+        """Stream the answer for a prompt token by token
+        @parameter prompt : str - Prompt
+        @parameter model : str - Model of this request, the default model if not given
+        @parameter budget : float - Seconds the whole generation may take, retries included
+        @returns Iterator[str] - Answer tokens
+        """
+        end = time.monotonic() + budget if budget is not None else None
+        for attempt in range(self.retries + 1):
+            # A call never outlives the budget, the client's timeout also bounds stalls between tokens
+            timeout = self.timeout if end is None else min(self.timeout, end - time.monotonic())
+            if timeout <= 0:
+                self._timed_out()
+            started = False
+            try:
+                for token in self._stream(prompt, model or self.model, timeout):
+                    started = True
+                    yield token
+                    if end is not None and time.monotonic() > end:
+                        self._timed_out()
+                return
+            except self.retryable as e:
+                if end is not None and time.monotonic() + self.backoff * 2**attempt >= end:
+                    self._timed_out()
+                if started or attempt == self.retries:
+                    ERRORS.inc("generation")
+                    raise GenerationError(f"{type(e).__name__}: {str(e)}") from e
+                ERRORS.inc("generation_retry")
+                msg.warn(f"Generation attempt {attempt + 1} failed, retrying: {str(e)}")
+                time.sleep(self.backoff * 2**attempt)
+            except GenerationError:
+                raise
+            except Exception as e:
+                # Bad requests, authentication, unknown models and context length errors
+                ERRORS.inc("generation")
+                raise GenerationError(f"{type(e).__name__}: {str(e)}") from e
+
+    @staticmethod
+    def _timed_out() -> None:
+        ERRORS.inc("generation_timeout")
+        raise GenerationTimeout("Generation timed out")
+
+    def _stream(self, prompt: str, model: str, timeout: float) -> Iterator[str]:
+        raise NotImplementedError("_stream must be implemented by a subclass.")
+
+
+class OpenAIGenerator(Generator):
+    """
+    Generates answers with the OpenAI chat completions API.
+    """
+
+    retryable = (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+    def __init__(self, openai_key: str, model: str = None, timeout: float = None, retries: int = None):
+        super().__init__(
+            model or os.environ.get("SWIFT_GENERATIVE_MODEL", "gpt-3.5-turbo"), timeout, retries
+        )
+        # Retries are handled by Generator.stream
+        self.client = openai.OpenAI(api_key=openai_key, max_retries=0)
+
+    def _stream(self, prompt: str, model: str, timeout: float) -> Iterator[str]:
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            timeout=timeout,
+        )
+        try:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the generator, e.g. for a client that went away, ends the HTTP stream
+            response.close()
+
+
+class StubGenerator(Generator):
+    """
+    Local generator for tests, answers with the first sentence of every snippet of the prompt.
+    """
+
+    def __init__(self, model: str = "stub", retries: int = 0):
+        super().__init__(model, retries=retries)
+        self.prompts = []
+
+    def _stream(self, prompt: str, model: str, timeout: float) -> Iterator[str]:
+        self.prompts.append(prompt)
+        snippets = prompt.split("\n\n")[1:]
+        answer = " ".join(
+            re.split(r"(?<=[.!?])\s", snippet.strip())[0] for snippet in snippets if snippet.strip()
+        )
+        for token in re.findall(r"\S+\s*", answer or "No snippets were given."):
+            yield token
@@ -0,0 +1,86 @@
+import json
+from typing import Optional
+
+from weaviate import WeaviateClient
+
+
+def gql_vector(vector: list[float]) -> str:
+    return "[" + ",".join(f"{float(value):.8g}" for value in vector) + "]"
+
+
+def search_clause(operator: str, vector: list[float], query: Optional[str] = None) -> str:
+    """Render the search argument of a Get query
+    @parameter operator : str - hybrid or nearVector
+    @parameter vector : list[float] - Query vector
+    @parameter query : Optional[str] - Query text of a hybrid search
+    @returns str - e.g. hybrid: {query: "...", vector: [...]}
+    """
+    # JSON string escapes are valid GraphQL string escapes
+    text = f"query: {json.dumps(query)}, " if query is not None else ""
+    return f"{operator}: {{{text}vector: {gql_vector(vector)}}}"
+
+
+def multi_get(
+    collection: str,
+    searches: dict,
+    limit: int,
+    properties: list[str],
+    additional: list[str],
+) -> str:
+    """Build one Get request running several searches under aliases
+    @parameter collection : str - Collection name
+    @parameter searches : dict - Search clause by alias
+    @parameter limit : int - Objects per search
+    @parameter properties : list[str] - Returned properties
+    @parameter additional : list[str] - Returned _additional fields
+    @returns str - GraphQL query
+    """
+    fields = " ".join(properties) + " _additional { " + " ".join(additional) + " }"
+    aliases = " ".join(
+        f"{alias}: {collection}({clause}, limit: {limit}) {{ {fields} }}"
+        for alias, clause in searches.items()
+    )
+    return f"{{ Get {{ {aliases} }} }}"
+
+
+def run_multi_get(
+    client: WeaviateClient,
+    collection: str,
+    searches: dict,
+    limit: int,
+    properties: list[str],
+    additional: list[str],
+    pack_size: int = 16,
+) -> dict:
+    """Run aliased searches, pack_size searches per request
+    @parameter client : WeaviateClient - Connected client
+    @parameter searches : dict - Search clause by key
+    @returns dict - Result dicts (legacy shape, numeric `_additional` values as floats) by key
+    """
+    keys = list(searches)
+    results = {}
+    for start in range(0, len(keys), pack_size):
+        pack = {f"q{i}": keys[start + i] for i in range(min(pack_size, len(keys) - start))}
+        response = client.graphql_raw_query(
+            multi_get(
+                collection,
+                {alias: searches[key] for alias, key in pack.items()},
+                limit,
+                properties,
+                additional,
+            )
+        )
+        if response.errors:
+            raise ValueError(f"GraphQL {collection} search failed: {response.errors}")
+        for alias, key in pack.items():
+            results[key] = [_parse(obj) for obj in response.get.get(alias) or []]
+    return results
+
+
+def _parse(obj: dict) -> dict:
+    additional = dict(obj.get("_additional") or {})
+    # GraphQL returns scores as strings
+    for name in ("score", "distance"):
+        if additional.get(name) is not None:
+            additional[name] = float(additional[name])
+    return {**obj, "_additional": additional}
@@ -1,19 +1,28 @@
-import weaviate
-from weaviate import Client
+from weaviate import WeaviateClient
+
+from SwiftEngine.client import WeaviateClientManager
 
 class SwiftQueryEngine:
     """
     An interface for Swift Query Engine.
     """
 
-    client: Client = None
+    def __init__(
+        self,
+        weaviate_url: str,
+        weaviate_api_key: str,
+        openai_key: str,
+        client_manager: WeaviateClientManager = None,
+    ):
+        # The manager connects lazily, constructing an engine never blocks on the network
+        self.owns_client_manager = client_manager is None
+        self.client_manager = client_manager or WeaviateClientManager(
+            weaviate_url, weaviate_api_key, openai_key
+        ).start()
 
-    def __init__(self, weaviate_url: str, weaviate_api_key: str, openai_key: str):
-        SwiftQueryEngine.client = weaviate.Client(
-            url=weaviate_url,
-            auth_client_secret=weaviate.AuthApiKey(api_key=weaviate_api_key),
-            additional_headers={"X-OpenAI-Api-Key": openai_key},
-        )
+    @property
+    def client(self) -> WeaviateClient:
+        return self.client_manager.get()
 
     def query_chunks(self, query_string: str) -> tuple:
         """Execute a query to a receive specific chunks from Weaviate
@@ -22,10 +31,17 @@ class SwiftQueryEngine:
         """
         raise NotImplementedError("query must be implemented by a subclass.")
     
+    def stream_query(self, query_string: str):
+        """Execute a query and stream the answer
+        @parameter query_string : str - Search query
+        @returns Iterator[tuple] - (event, data) pairs, starting with the retrieved documents
+        """
+        raise NotImplementedError("stream_query must be implemented by a subclass.")
+
     def change_generative_model(self, generative_model: str) -> dict:
-        """Change schema to another generative module model"""
+        """Change the default generative model, requests may still pick their own"""
         raise NotImplementedError(
-            "retrieve_document must be implemented by a subclass."
+            "change_generative_model must be implemented by a subclass."
         )
     
     def retrieve_document(self, doc_id: str) -> None:
@@ -37,6 +53,50 @@ class SwiftQueryEngine:
             "retrieve_document must be implemented by a subclass."
         )
 
-    def get_client(self) -> Client:
-        return SwiftQueryEngine.client
+    def retrieve_documents(self, doc_ids: list[str]) -> dict:
+        """Return multiple documents by their IDs (UUID format) from Weaviate
+        @parameter doc_ids : list[str] - Document IDs
+        @returns dict - Document dicts by ID
+        """
+        raise NotImplementedError(
+            "retrieve_documents must be implemented by a subclass."
+        )
+
+    def retrieve_all_documents(self) -> list:
+        """Return the meta data of all documents from Weaviate
+        @returns list - List of document dicts
+        """
+        raise NotImplementedError(
+            "retrieve_all_documents must be implemented by a subclass."
+        )
+
+    def get_document_catalog(self):
+        """Return a cached, versioned snapshot of the document catalog
+        @returns CatalogSnapshot - Catalog snapshot
+        """
+        raise NotImplementedError(
+            "get_document_catalog must be implemented by a subclass."
+        )
+
+    def get_suggestions(self, query: str) -> list[str]:
+        """Return prompt suggestions for a partial query
+        @parameter query : str - Partial query
+        @returns list[str] - List of suggestions
+        """
+        raise NotImplementedError("get_suggestions must be implemented by a subclass.")
+
+    def get_client(self) -> WeaviateClient:
+        return self.client_manager.get()
+
+    def is_ready(self) -> bool:
+        """Return the cached readiness of the Weaviate cluster, no request is made"""
+        return self.client_manager.ready
+
+    def stats(self) -> dict:
+        """Return counters of the engine's caches and background workers"""
+        return {}
+
+    def close(self) -> None:
+        """Release resources such as background writers, called on shutdown"""
+        pass
     
\ No newline at end of file
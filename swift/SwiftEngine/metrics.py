@@ -0,0 +1,285 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# Seconds, from in-process cache hits up to slow generations
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+# Cosine distances around the cache threshold
+DISTANCE_BUCKETS = (0.02, 0.05, 0.08, 0.11, 0.14, 0.2, 0.3, 0.5)
+# Prompt context sizes in tokens
+TOKEN_BUCKETS = (250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonic counter, labels are passed positionally in the order of `labelnames`"""
+
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in sorted(values):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight"""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    @contextmanager
+    def track(self, *labels) -> Iterator[None]:
+        """Count the duration of the block as in progress"""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(_Metric):
+    """Histogram with fixed buckets, rendered cumulatively like Prometheus client histograms"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # Bucket counts (last one is +Inf), sum, count
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels) -> Iterator[None]:
+        """Observe the duration of the block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels) -> int:
+        entry = self._values.get(labels)
+        return entry[2] if entry else 0
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        with self._lock:
+            values = [(labels, list(e[0]), e[1], e[2]) for labels, e in self._values.items()]
+        for labels, counts, total, count in sorted(values):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Collection of metrics rendered together in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "swift_query_stage_seconds",
+        "Duration of the stages of a query (cache_lookup, embed, retrieval, context, generation, cache_write, cache_flush)",
+        ("stage",),
+    )
+)
+CACHE_LOOKUPS = REGISTRY.register(
+    Counter(
+        "swift_cache_lookups_total",
+        "Semantic cache lookups by tier (local_exact, local, weaviate) and result",
+        ("tier", "result"),
+    )
+)
+CACHE_DISTANCE = REGISTRY.register(
+    Histogram(
+        "swift_cache_distance",
+        "Distance of the nearest Weaviate cache entry by lookup result",
+        ("result",),
+        buckets=DISTANCE_BUCKETS,
+    )
+)
+SUGGESTION_SECONDS = REGISTRY.register(
+    Histogram("swift_suggestions_seconds", "Duration of suggestion lookups", ("source",))
+)
+DOCUMENT_SECONDS = REGISTRY.register(
+    Histogram(
+        "swift_document_fetch_seconds",
+        "Duration of document fetches by whether Weaviate was queried",
+        ("source",),
+    )
+)
+CONTEXT_TOKENS = REGISTRY.register(
+    Histogram(
+        "swift_context_tokens",
+        "Tokens of the retrieved chunks before and after context assembly",
+        ("phase",),
+        buckets=TOKEN_BUCKETS,
+    )
+)
+ADMISSIONS = REGISTRY.register(
+    Counter(
+        "swift_admissions_total",
+        "Admission decisions by lane (lookup, generation) and result",
+        ("lane", "result"),
+    )
+)
+ADMISSION_QUEUE = REGISTRY.register(
+    Gauge("swift_admission_queue_depth", "Requests waiting for a slot", ("lane",))
+)
+GENERATION_REQUESTS = REGISTRY.register(
+    Counter(
+        "swift_generation_requests_total",
+        "Generations by model, routing reason and result",
+        ("model", "reason", "result"),
+    )
+)
+GENERATION_SECONDS = REGISTRY.register(
+    Histogram("swift_generation_seconds", "Duration of generations by model", ("model",))
+)
+GENERATION_TOKENS = REGISTRY.register(
+    Counter(
+        "swift_generation_tokens_total",
+        "Prompt and completion tokens by model",
+        ("model", "kind"),
+    )
+)
+GENERATION_COST = REGISTRY.register(
+    Counter(
+        "swift_generation_cost_dollars_total",
+        "Estimated generation cost by model, from SWIFT_MODEL_PRICES",
+        ("model",),
+    )
+)
+HEDGED_CALLS = REGISTRY.register(
+    Counter(
+        "swift_hedged_calls_total",
+        "Calls duplicated after the stage's rolling p95 by stage and the copy that won",
+        ("stage", "winner"),
+    )
+)
+DEADLINE_EXCEEDED = REGISTRY.register(
+    Counter(
+        "swift_deadline_exceeded_total",
+        "Stages that ran out of the request deadline's budget",
+        ("stage",),
+    )
+)
+CACHE_WARMS = REGISTRY.register(
+    Counter(
+        "swift_cache_warm_total",
+        "Queries run by the cache warmer by source (suggestions, history) and result",
+        ("source", "result"),
+    )
+)
+WRITE_BEHIND_DEPTH = REGISTRY.register(
+    Gauge("swift_write_behind_depth", "Items waiting for the next flush by queue", ("queue",))
+)
+WRITE_BEHIND_ITEMS = REGISTRY.register(
+    Counter(
+        "swift_write_behind_items_total",
+        "Write-behind items by queue and result (enqueued, deduplicated, dropped, flushed, failed)",
+        ("queue", "result"),
+    )
+)
+WRITE_BEHIND_FLUSH_SECONDS = REGISTRY.register(
+    Histogram("swift_write_behind_flush_seconds", "Duration of write-behind flushes by queue", ("queue",))
+)
+ERRORS = REGISTRY.register(
+    Counter("swift_errors_total", "Failed requests and background operations", ("operation",))
+)
+IN_FLIGHT = REGISTRY.register(
+    Gauge("swift_in_flight_requests", "Requests currently being served", ("endpoint",))
+)
@@ -0,0 +1,69 @@
+import threading
+from typing import Any, Callable
+
+from wasabi import msg
+
+from SwiftEngine.metrics import ERRORS
+
+
+class BackgroundPoller:
+    """
+    Polls a cheap fingerprint in a daemon thread and calls `on_change` whenever it differs
+    from the previous poll. The first poll runs immediately and always counts as a change.
+    """
+
+    def __init__(
+        self,
+        fingerprint: Callable[[], Any],
+        on_change: Callable[[Any], None],
+        interval: float = 60.0,
+        name: str = "swift-poller",
+    ):
+        self.fingerprint = fingerprint
+        self.on_change = on_change
+        self.interval = interval
+        self.name = name
+        self.last_fingerprint = None
+        self.changes = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._refresh = threading.Event()
+        self._thread = None
+
+    def start(self) -> "BackgroundPoller":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def refresh(self) -> None:
+        """Poll now instead of waiting for the next interval"""
+        self._refresh.set()
+
+    def poll(self) -> bool:
+        """Poll once from the calling thread
+        @returns bool - Whether the fingerprint changed
+        """
+        try:
+            fingerprint = self.fingerprint()
+            if self.changes and fingerprint == self.last_fingerprint:
+                return False
+            self.on_change(fingerprint)
+            self.last_fingerprint = fingerprint
+            self.changes += 1
+            return True
+        except Exception as e:
+            self.errors += 1
+            ERRORS.inc(self.name)
+            msg.warn(f"{self.name} poll failed: {str(e)}")
+            return False
+
+    def close(self) -> None:
+        self._stop.set()
+        self._refresh.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.poll()
+            self._refresh.wait(self.interval)
+            self._refresh.clear()
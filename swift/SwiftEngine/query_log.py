@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+from wasabi import msg
+
+from SwiftEngine.semantic_cache import normalize_query
+
+
+class QueryLog:
+    """
+    Append-only log of served queries, one JSON line per query. The cache warmer
+    reads the most frequent ones back, so the log outlives cache wipes and deploys.
+    Once the file reaches `max_bytes` it is rotated to `<path>.1`, replacing the
+    previous rotation, and only the last `max_lines` lines of both files are read.
+    Workers sharing the path reopen the file after another worker rotated it.
+    """
+
+    def __init__(self, path: str, max_lines: int = None, max_bytes: int = None):
+        self.path = path
+        self.max_lines = max_lines or int(os.environ.get("SWIFT_QUERY_LOG_MAX_LINES", 100000))
+        self.max_bytes = max_bytes or int(
+            os.environ.get("SWIFT_QUERY_LOG_MAX_BYTES", 16 * 1024 * 1024)
+        )
+        self.errors = 0
+        self.rotations = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+    def record(self, query: str) -> None:
+        """Append a served query
+        @parameter query : str - Query as asked
+        """
+        line = json.dumps({"query": query, "time": round(time.time(), 3)}) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a", buffering=1, encoding="utf-8")
+                self._file.write(line)
+                if self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            except OSError as e:
+                self.errors += 1
+                if self.errors == 1:
+                    msg.warn(f"Query log {self.path} is not writable: {str(e)}")
+
+    def top(self, n: int) -> list[str]:
+        """Return the most frequent queries, as first asked
+        @parameter n : int - Number of queries
+        @returns list[str] - Queries, most frequent first
+        """
+        counts = Counter()
+        texts = {}
+        for query in self._read():
+            key = normalize_query(query)
+            if key:
+                counts[key] += 1
+                texts.setdefault(key, query)
+        return [texts[key] for key, _ in counts.most_common(n)]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _rotate(self) -> None:
+        # Another worker may have rotated the file already, then only reopen
+        current = os.fstat(self._file.fileno())
+        self._file.close()
+        self._file = None
+        try:
+            if os.stat(self.path).st_ino == current.st_ino:
+                os.replace(self.path, self.path + ".1")
+                self.rotations += 1
+        except FileNotFoundError:
+            pass
+
+    def _read(self) -> list[str]:
+        # Only the last max_lines lines are kept in memory
+        lines = deque(maxlen=self.max_lines)
+        for path in (self.path + ".1", self.path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    lines.extend(f)
+            except FileNotFoundError:
+                continue
+        queries = []
+        for line in lines:
+            try:
+                queries.append(json.loads(line)["query"])
+            except (ValueError, KeyError, TypeError):
+                # A line cut off by a crash
+                continue
+        return queries
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+import threading
+from typing import Optional
+
+from SwiftEngine.generation import count_tokens
+from SwiftEngine.metrics import (
+    GENERATION_COST,
+    GENERATION_REQUESTS,
+    GENERATION_SECONDS,
+    GENERATION_TOKENS,
+)
+
+# USD per million prompt and completion tokens, SWIFT_MODEL_PRICES overrides or extends them
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4": (30.0, 60.0),
+}
+
+FAQ_START = re.compile(r"^(what|which|who|when|where|why|is|are|does|do|can|should)\b", re.I)
+CODE_WORDS = {
+    "code",
+    "example",
+    "snippet",
+    "python",
+    "typescript",
+    "javascript",
+    "java",
+    "golang",
+    "function",
+    "class",
+    "import",
+    "error",
+    "exception",
+    "traceback",
+    "implement",
+    "write",
+    "script",
+}
+# Backticks, calls, assignments, braces, dotted names, snake_case and camelCase identifiers
+CODE_MARKERS = re.compile(r"`|\w\(|[={}]|\w\.\w|\b[a-z]+_[a-z_]+\b|\b[a-z]+[A-Z]\w*\b")
+
+
+def _score(result: dict) -> float:
+    try:
+        return float(result["_additional"].get("score") or 0.0)
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+def query_features(query: str) -> dict:
+    """Describe a query for routing
+    @parameter query : str - Search query
+    @returns dict - words, code (code markers or code words) and faq (starts like a question)
+    """
+    words = re.findall(r"\w+", query)
+    return {
+        "words": len(words),
+        "code": bool(CODE_MARKERS.search(query))
+        or any(word.casefold() in CODE_WORDS for word in words),
+        "faq": bool(FAQ_START.match(query.strip())),
+    }
+
+
+def retrieval_features(results: list[dict]) -> dict:
+    """Describe the retrieved chunks for routing
+    @parameter results : list[dict] - Retrieved chunks, best first
+    @returns dict - top_score and code_share, the share of chunks holding code blocks
+    """
+    if not results:
+        return {"top_score": 0.0, "code_share": 0.0}
+    code = sum(1 for result in results if "```" in str(result.get("text", "")))
+    return {"top_score": _score(results[0]), "code_share": code / len(results)}
+
+
+class ModelRouter:
+    """
+    Picks the generative model of every request. The fixed mode always uses the
+    default model. The auto mode sends long or code-heavy queries and queries with a
+    weak retrieval to the strong model and everything else, in particular short and
+    FAQ-like queries, to the fast one. Latency, tokens and cost are counted per model
+    to tune the thresholds.
+    """
+
+    def __init__(
+        self,
+        default_model: str,
+        mode: str = None,
+        fast_model: str = None,
+        strong_model: str = None,
+        long_query: int = None,
+        code_share: float = None,
+        min_score: float = None,
+    ):
+        self.default_model = default_model
+        self.mode = mode or os.environ.get("SWIFT_MODEL_ROUTING", "fixed")
+        if self.mode not in ("fixed", "auto"):
+            raise ValueError(f"Unknown model routing {self.mode}, use fixed or auto")
+        self.fast_model = fast_model or os.environ.get("SWIFT_FAST_MODEL", "gpt-4o-mini")
+        self.strong_model = strong_model or os.environ.get("SWIFT_STRONG_MODEL", "gpt-4o")
+        # Words above which a query counts as long
+        self.long_query = long_query or int(os.environ.get("SWIFT_ROUTE_LONG_QUERY", 20))
+        # Share of retrieved chunks with code blocks above which the answer needs code
+        self.code_share = (
+            code_share
+            if code_share is not None
+            else float(os.environ.get("SWIFT_ROUTE_CODE_SHARE", 0.5))
+        )
+        # Top hybrid score below which the snippets are too weak for the fast model
+        self.min_score = (
+            min_score
+            if min_score is not None
+            else float(os.environ.get("SWIFT_ROUTE_MIN_SCORE", 0.3))
+        )
+        self.prices = {**MODEL_PRICES, **json.loads(os.environ.get("SWIFT_MODEL_PRICES", "{}"))}
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    @property
+    def models(self) -> set:
+        """Models a request may ask for"""
+        return {self.default_model, self.fast_model, self.strong_model}
+
+    def route(self, query: str, results: list[dict], model: Optional[str] = None) -> tuple:
+        """Pick the model for a query
+        @parameter query : str - Search query
+        @parameter results : list[dict] - Retrieved chunks
+        @parameter model : Optional[str] - Model requested by the client, it always wins
+        @returns tuple - (model, reason)
+        """
+        if model:
+            return model, "requested"
+        if self.mode == "fixed":
+            return self.default_model, "fixed"
+
+        query_info = query_features(query)
+        retrieval = retrieval_features(results)
+        if query_info["words"] > self.long_query:
+            return self.strong_model, "long_query"
+        if query_info["code"]:
+            return self.strong_model, "code_query"
+        if retrieval["code_share"] >= self.code_share:
+            return self.strong_model, "code_context"
+        if results and retrieval["top_score"] < self.min_score:
+            return self.strong_model, "weak_retrieval"
+        return self.fast_model, "faq" if query_info["faq"] else "short_query"
+
+    def record(
+        self,
+        model: str,
+        reason: str,
+        prompt: str,
+        answer: str,
+        seconds: float,
+        failed: bool = False,
+    ) -> None:
+        """Count a generation for the per-model latency and cost counters
+        @parameter model : str - Model used
+        @parameter reason : str - Routing reason
+        @parameter prompt : str - Prompt
+        @parameter answer : str - Generated answer, empty if it failed
+        @parameter seconds : float - Generation duration
+        @parameter failed : bool - Whether the generation failed
+        """
+        prompt_tokens = count_tokens(prompt, model)
+        completion_tokens = count_tokens(answer, model) if answer else 0
+        prompt_price, completion_price = self.prices.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+        GENERATION_REQUESTS.inc(model, reason, "failed" if failed else "ok")
+        GENERATION_SECONDS.observe(seconds, model)
+        GENERATION_TOKENS.inc(model, "prompt", amount=prompt_tokens)
+        GENERATION_TOKENS.inc(model, "completion", amount=completion_tokens)
+        GENERATION_COST.inc(model, amount=cost)
+
+        with self._lock:
+            usage = self._usage.setdefault(
+                model,
+                {"requests": 0, "failed": 0, "seconds": 0.0, "tokens": 0, "cost": 0.0, "routes": {}},
+            )
+            usage["requests"] += 1
+            usage["failed"] += failed
+            usage["seconds"] += seconds
+            usage["tokens"] += prompt_tokens + completion_tokens
+            usage["cost"] += cost
+            usage["routes"][reason] = usage["routes"].get(reason, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {
+                model: {
+                    "requests": usage["requests"],
+                    "failed": usage["failed"],
+                    "mean_seconds": round(usage["seconds"] / usage["requests"], 3),
+                    "tokens": usage["tokens"],
+                    "cost": round(usage["cost"], 6),
+                    "routes": dict(usage["routes"]),
+                }
+                for model, usage in self._usage.items()
+            }
+        return {"mode": self.mode, "default_model": self.default_model, "models": models}
@@ -0,0 +1,192 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# Same distance threshold as the Weaviate `Cache` lookup
+CACHE_DISTANCE_THRESHOLD = 0.14
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache key
+    @parameter query : str - Query
+    @returns str - Lowercased query without surrounding punctuation and repeated whitespace
+    """
+    query = re.sub(r"\s+", " ", query.casefold()).strip()
+    return query.strip(" ?!.")
+
+
+def vector_key(vector: list[float]) -> bytes:
+    """Return a hashable key of a query vector, identical vectors share the key
+    @parameter vector : list[float] - Query vector
+    @returns bytes - Key
+    """
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+class LocalSemanticCache:
+    """
+    In-process semantic cache in front of the Weaviate `Cache` collection.
+
+    Exact repeats are answered from a hash map on the normalized query. Otherwise
+    the query vector (when known) is compared against a matrix of recently cached
+    query vectors in one vectorized cosine pass. Entries are evicted LRU and
+    expire after `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl: Optional[float] = 3600,
+        distance_threshold: float = CACHE_DISTANCE_THRESHOLD,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.distance_threshold = distance_threshold
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # normalized query -> entry dict, ordered from least to most recently used
+        self._entries: OrderedDict = OrderedDict()
+        self._vectors: Optional[np.ndarray] = None
+        self._slot_keys: list = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def get_exact(self, query: str, record: bool = True) -> Optional[tuple]:
+        """Look a query up by its normalized text only, misses are not counted
+        @parameter query : str - Query
+        @parameter record : bool - Count the hit and mark the entry as used, False for probes
+        @returns Optional[tuple] - (results, system message, distance, cache id) or None
+        """
+        key = normalize_query(query)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry, time.monotonic()):
+                self._remove(key)
+                return None
+            if record:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+            return (entry["results"], entry["system"], 0.0, entry["cache_id"])
+
+    def lookup(
+        self, query: str, vector: Optional[list[float]] = None, record: bool = True
+    ) -> Optional[tuple]:
+        """Look a query up, first by its normalized text and then by vector
+        @parameter query : str - Query
+        @parameter vector : Optional[list[float]] - Query vector, the semantic tier is skipped without it
+        @parameter record : bool - Count the hit or miss and mark the entry as used, False for probes
+        @returns Optional[tuple] - (results, system message, distance, cache id) or None on a miss
+        """
+        hit = self.get_exact(query, record)
+        if hit is not None:
+            return hit
+
+        with self._lock:
+            if vector is not None and self._vectors is not None and self._entries:
+                distances = 1.0 - self._vectors @ self._unit(vector)
+                # Free slots hold zero vectors, keep them out of the argmin
+                distances[self._free_slots] = np.inf
+                slot = int(np.argmin(distances))
+                distance = float(distances[slot])
+                if distance <= self.distance_threshold:
+                    key = self._slot_keys[slot]
+                    entry = self._entries[key]
+                    if not self._expired(entry, time.monotonic()):
+                        if record:
+                            self._entries.move_to_end(key)
+                            self.semantic_hits += 1
+                        return (entry["results"], entry["system"], distance, entry["cache_id"])
+                    self._remove(key)
+
+            if record:
+                self.misses += 1
+            return None
+
+    def put(
+        self,
+        query: str,
+        results: list[dict],
+        system: str,
+        vector: Optional[list[float]] = None,
+        cache_id: Optional[str] = None,
+    ) -> None:
+        """Cache the answer of a query
+        @parameter query : str - Query
+        @parameter results : list[dict] - Retrieved chunks
+        @parameter system : str - Generated answer
+        @parameter vector : Optional[list[float]] - Query vector used by the semantic tier
+        @parameter cache_id : Optional[str] - UUID of the matching Weaviate `Cache` object
+        """
+        key = normalize_query(query)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+            slot = None
+            if vector is not None:
+                unit = self._unit(vector)
+                if self._vectors is None:
+                    self._vectors = np.zeros(
+                        (self.max_entries, unit.shape[0]), dtype=np.float32
+                    )
+                slot = self._free_slots.pop()
+                self._vectors[slot] = unit
+                self._slot_keys[slot] = key
+
+            self._entries[key] = {
+                "results": results,
+                "system": system,
+                "slot": slot,
+                "expires": expires,
+                "cache_id": cache_id,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        if entry["slot"] is not None:
+            self._vectors[entry["slot"]] = 0.0
+            self._slot_keys[entry["slot"]] = None
+            self._free_slots.append(entry["slot"])
+
+    @staticmethod
+    def _expired(entry: dict, now: float) -> bool:
+        return entry["expires"] is not None and entry["expires"] <= now
+
+    @staticmethod
+    def _unit(vector: list[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
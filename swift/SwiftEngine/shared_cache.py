@@ -0,0 +1,341 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import numpy as np
+from wasabi import msg
+
+from SwiftEngine.semantic_cache import CACHE_DISTANCE_THRESHOLD, normalize_query
+
+MAGIC = b"SWIFTSC1"
+# magic, capacity, dimensions, record size
+HEADER = struct.Struct("<8sIII")
+HEADER_BYTES = 64
+SLOT = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("key", "<u8"),
+        ("expires", "<f8"),
+        ("used", "<f8"),
+        ("length", "<u4"),
+        ("vector", "<u4"),
+    ]
+)
+
+
+def _align(offset: int, alignment: int = 64) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def query_hash(key: str) -> int:
+    """64 bit hash of a normalized query, 0 marks an empty slot"""
+    value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1
+
+
+class SharedSemanticCache:
+    """
+    Semantic cache shared by all worker processes of a host through a memory-mapped
+    file, with the interface of `LocalSemanticCache`.
+
+    The file holds a slot table, the matrix of unit query vectors and the compressed
+    answer records. Reads take no lock: every slot carries a sequence number that
+    is odd while the slot is written, a read that saw it change is retried. Writes
+    are serialized by an exclusive `flock`. Expiry uses wall-clock time, so entries
+    survive worker restarts. The file is created by the first write, once the
+    vector size is known.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 2048,
+        ttl: Optional[float] = 3600,
+        distance_threshold: float = CACHE_DISTANCE_THRESHOLD,
+        record_size: int = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.distance_threshold = distance_threshold
+        self.record_size = record_size or int(
+            os.environ.get("SWIFT_SHARED_CACHE_RECORD_BYTES", 16384)
+        )
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.oversized = 0
+        self.torn_reads = 0
+
+        self._mmap: Optional[mmap.mmap] = None
+        self._slots: Optional[np.ndarray] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._records: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def get_exact(self, query: str, record: bool = True) -> Optional[tuple]:
+        """Look a query up by its normalized text only, misses are not counted
+        @parameter query : str - Query
+        @parameter record : bool - Count the hit, False for probes
+        @returns Optional[tuple] - (results, system message, distance, cache id) or None
+        """
+        if not self._open():
+            return None
+        key = normalize_query(query)
+        now = time.time()
+        for slot in np.flatnonzero(self._slots["key"] == query_hash(key)):
+            entry = self._read(int(slot), now)
+            if entry is not None and entry["query"] == key:
+                if record:
+                    self.exact_hits += 1
+                return (entry["results"], entry["system"], 0.0, entry["cache_id"])
+        return None
+
+    def lookup(
+        self, query: str, vector: Optional[list[float]] = None, record: bool = True
+    ) -> Optional[tuple]:
+        """Look a query up, first by its normalized text and then by vector
+        @parameter query : str - Query
+        @parameter vector : Optional[list[float]] - Query vector, the semantic tier is skipped without it
+        @parameter record : bool - Count the hit or miss, False for probes
+        @returns Optional[tuple] - (results, system message, distance, cache id) or None on a miss
+        """
+        hit = self.get_exact(query, record)
+        if hit is not None:
+            return hit
+
+        if vector is not None and self._open() and len(vector) == self._vectors.shape[1]:
+            unit = self._unit(vector)
+            now = time.time()
+            slots = self._slots
+            distances = 1.0 - self._vectors @ unit
+            # Empty and expired slots are kept out of the argmin
+            distances[(slots["length"] == 0) | (slots["vector"] == 0) | (slots["expires"] <= now)] = np.inf
+            slot = int(np.argmin(distances))
+            if distances[slot] <= self.distance_threshold:
+                entry = self._read(slot, now)
+                # The slot may have been rewritten since the matrix pass, use the vector read with it
+                if entry is not None:
+                    distance = float(1.0 - entry["unit"] @ unit)
+                    if distance <= self.distance_threshold:
+                        if record:
+                            self.semantic_hits += 1
+                        return (entry["results"], entry["system"], distance, entry["cache_id"])
+
+        if record:
+            self.misses += 1
+        return None
+
+    def put(
+        self,
+        query: str,
+        results: list[dict],
+        system: str,
+        vector: Optional[list[float]] = None,
+        cache_id: Optional[str] = None,
+    ) -> None:
+        """Cache the answer of a query for all workers
+        @parameter query : str - Query
+        @parameter results : list[dict] - Retrieved chunks
+        @parameter system : str - Generated answer
+        @parameter vector : Optional[list[float]] - Query vector used by the semantic tier
+        @parameter cache_id : Optional[str] - UUID of the matching Weaviate `Cache` object
+        """
+        if not self._open(len(vector) if vector is not None else None):
+            return
+        key = normalize_query(query)
+        record = zlib.compress(
+            json.dumps(
+                {"query": key, "system": system, "results": results, "cache_id": cache_id}
+            ).encode("utf-8")
+        )
+        if len(record) > self._records.shape[1]:
+            self.oversized += 1
+            return
+        if vector is not None and len(vector) != self._vectors.shape[1]:
+            vector = None
+
+        now = time.time()
+        with self._write_lock():
+            slot, evicted = self._pick_slot(query_hash(key), now)
+            self.evictions += evicted
+            slots = self._slots
+            slots["seq"][slot] += 1
+            self._records[slot, : len(record)] = np.frombuffer(record, dtype=np.uint8)
+            self._vectors[slot] = self._unit(vector) if vector is not None else 0.0
+            slots["vector"][slot] = vector is not None
+            slots["key"][slot] = query_hash(key)
+            slots["expires"][slot] = now + self.ttl if self.ttl else np.inf
+            slots["used"][slot] = now
+            slots["length"][slot] = len(record)
+            slots["seq"][slot] += 1
+
+    def clear(self) -> None:
+        """Drop all entries, for every worker"""
+        if not self._open():
+            return
+        with self._write_lock():
+            slots = self._slots
+            slots["seq"] += 1
+            slots["key"] = 0
+            slots["length"] = 0
+            slots["vector"] = 0
+            slots["seq"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self),
+            "shared": True,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "oversized": self.oversized,
+            "torn_reads": self.torn_reads,
+        }
+
+    def __len__(self) -> int:
+        if not self._open():
+            return 0
+        slots = self._slots
+        return int(np.count_nonzero((slots["length"] > 0) & (slots["expires"] > time.time())))
+
+    def close(self) -> None:
+        with self._lock:
+            self._slots = self._vectors = self._records = None
+            if self._mmap is not None:
+                try:
+                    self._mmap.close()
+                except BufferError:
+                    # A reader still holds a view, the mapping goes with it
+                    pass
+                self._mmap = None
+
+    def _read(self, slot: int, now: float) -> Optional[dict]:
+        """Read a slot without locking, None if it is empty, expired or kept changing"""
+        slots = self._slots
+        for _ in range(3):
+            seq = int(slots["seq"][slot])
+            if seq % 2:
+                time.sleep(0)
+                continue
+            length = int(slots["length"][slot])
+            expires = float(slots["expires"][slot])
+            record = self._records[slot, :length].tobytes()
+            unit = self._vectors[slot].copy()
+            if int(slots["seq"][slot]) != seq:
+                continue
+            if not length or expires <= now:
+                return None
+            try:
+                entry = json.loads(zlib.decompress(record))
+            except (zlib.error, ValueError):
+                return None
+            slots["used"][slot] = now
+            return {**entry, "unit": unit}
+        self.torn_reads += 1
+        return None
+
+    def _pick_slot(self, key: int, now: float) -> tuple:
+        """Return the slot for a key: its current slot, a free or expired one or the least recently used
+        @returns tuple - (slot, whether a live entry is evicted)
+        """
+        slots = self._slots
+        same = np.flatnonzero(slots["key"] == key)
+        if len(same):
+            return int(same[0]), 0
+        free = np.flatnonzero((slots["length"] == 0) | (slots["expires"] <= now))
+        if len(free):
+            return int(free[0]), 0
+        return int(np.argmin(slots["used"])), 1
+
+    def _open(self, dimensions: int = None) -> bool:
+        """Map the cache file, it is created with the given vector size if it does not exist yet
+        @parameter dimensions : int - Vector size, only writers create the file
+        @returns bool - Whether the cache is mapped
+        """
+        if self._mmap is not None:
+            return True
+        if not dimensions and not os.path.exists(self.path):
+            return False
+        with self._lock:
+            if self._mmap is not None:
+                return True
+            try:
+                with self._file_lock():
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        if os.fstat(fd).st_size < HEADER_BYTES:
+                            if not dimensions:
+                                return False
+                            self._create(fd, dimensions)
+                        self._map(fd)
+                    finally:
+                        os.close(fd)
+            except (OSError, ValueError) as e:
+                msg.warn(f"Shared cache {self.path} is unavailable: {str(e)}")
+                return False
+        return True
+
+    def _create(self, fd: int, dimensions: int) -> None:
+        header = HEADER.pack(MAGIC, self.max_entries, dimensions, self.record_size)
+        size = self._layout(self.max_entries, dimensions, self.record_size)[-1]
+        os.ftruncate(fd, size)
+        os.pwrite(fd, header.ljust(HEADER_BYTES, b"\0"), 0)
+        msg.info(f"Created shared cache {self.path} ({size // 1024 // 1024} MiB)")
+
+    def _map(self, fd: int) -> None:
+        header = os.pread(fd, HEADER.size, 0)
+        magic, capacity, dimensions, record_size = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError("not a shared cache file")
+        if capacity != self.max_entries or record_size != self.record_size:
+            # The file outlives its configuration, its own layout wins
+            msg.warn(f"Shared cache {self.path} has {capacity} entries of {record_size} bytes")
+        vectors_at, records_at, size = self._layout(capacity, dimensions, record_size)
+        self._mmap = mmap.mmap(fd, size)
+        self._slots = np.frombuffer(self._mmap, dtype=SLOT, count=capacity, offset=HEADER_BYTES)
+        self._vectors = np.frombuffer(
+            self._mmap, dtype=np.float32, count=capacity * dimensions, offset=vectors_at
+        ).reshape(capacity, dimensions)
+        self._records = np.frombuffer(
+            self._mmap, dtype=np.uint8, count=capacity * record_size, offset=records_at
+        ).reshape(capacity, record_size)
+
+    @staticmethod
+    def _layout(capacity: int, dimensions: int, record_size: int) -> tuple:
+        vectors_at = _align(HEADER_BYTES + capacity * SLOT.itemsize)
+        records_at = _align(vectors_at + capacity * dimensions * 4)
+        return vectors_at, records_at, records_at + capacity * record_size
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        # flock excludes other processes, the thread lock the other threads of this one
+        with self._lock, self._file_lock():
+            yield
+
+    @staticmethod
+    def _unit(vector: list[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
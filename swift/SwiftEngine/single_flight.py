@@ -0,0 +1,141 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+import numpy as np
+
+
+class _Call:
+    def __init__(self, vector: Optional[np.ndarray], scope: Hashable = None):
+        self.vector = vector
+        self.scope = scope
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key (threads).
+
+    The first caller of a key runs the function, callers arriving while it is in
+    flight wait for its result instead of running it again. With a
+    `distance_threshold`, callers whose vector lies within that cosine distance of
+    an in-flight call's vector join that call as well, provided both calls have
+    the same `scope`.
+    """
+
+    def __init__(self, distance_threshold: Optional[float] = None):
+        self.distance_threshold = distance_threshold
+        self.leaders = 0
+        self.followers = 0
+        self._calls: dict = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        vector: Optional[list[float]] = None,
+        scope: Hashable = None,
+    ) -> Any:
+        """Run fn once for all concurrent callers of the same key
+        @parameter key : Hashable - Coalescing key
+        @parameter fn : Callable - Function computing the result
+        @parameter vector : Optional[list[float]] - Vector used to join near-duplicate calls
+        @parameter scope : Hashable - Near-duplicate calls are only joined within the same scope
+        @returns Any - Result of the leader's call, its exception is re-raised for every caller
+        """
+        unit = _unit(vector) if vector is not None and self.distance_threshold else None
+
+        with self._lock:
+            call = self._calls.get(key) or self._near_call(unit, scope)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(unit, scope)
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+    def _near_call(self, unit: Optional[np.ndarray], scope: Hashable) -> Optional[_Call]:
+        if unit is None:
+            return None
+        for call in self._calls.values():
+            if (
+                call.vector is not None
+                and call.scope == scope
+                and 1.0 - float(call.vector @ unit) <= self.distance_threshold
+            ):
+                return call
+        return None
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent coroutine calls with the same key on one event loop.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.followers = 0
+        self._calls: dict = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> Any:
+        """Await fn once for all concurrent callers of the same key
+        @parameter key : Hashable - Coalescing key
+        @parameter fn : Callable - Coroutine function computing the result
+        @returns Any - Result of the leader's call
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.followers += 1
+            # Shield so a cancelled follower does not cancel the leader's work
+            return await asyncio.shield(future)
+
+        self.leaders += 1
+        future = self._calls[key] = asyncio.ensure_future(fn())
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                self._calls.pop(key, None)
+            else:
+                # The leader was cancelled, keep the call joinable until it finishes
+                future.add_done_callback(lambda _: self._calls.pop(key, None))
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,198 @@
+import math
+import re
+import threading
+
+from SwiftEngine.semantic_cache import normalize_query
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", text.casefold())
+
+
+def within_distance(a: str, b: str, max_distance: int) -> bool:
+    """Check whether the Levenshtein distance of two strings is at most max_distance
+    @parameter a : str - First string
+    @parameter b : str - Second string
+    @parameter max_distance : int - Maximum number of edits
+    @returns bool - Whether the strings are within max_distance edits
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        # Every path through this row already needs more edits
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"${token}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+
+class _Trie:
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def insert(self, key: str, value) -> None:
+        node = self.root
+        node.ids.append(value)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.append(value)
+
+    def find(self, prefix: str) -> list:
+        """Return the values of all keys starting with prefix"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids
+
+
+class SuggestionIndex:
+    """
+    In-memory autocomplete index for prompt suggestions.
+
+    Suggestions whose text starts with the typed query are found through a prefix
+    trie. The query tokens are also matched against the suggestion vocabulary,
+    the last (still being typed) token as a prefix, with a trigram index proposing
+    candidates for typo-tolerant matches. Ties are broken by how often a
+    suggestion was asked.
+    """
+
+    def __init__(self, max_typos: int = 1):
+        self.max_typos = max_typos
+        self._weights = {}
+        self._lock = threading.Lock()
+        self.build([])
+
+    def build(self, suggestions: list[str]) -> None:
+        """Replace the indexed suggestions, popularity weights are kept
+        @parameter suggestions : list[str] - Suggestions
+        """
+        texts = list(dict.fromkeys(s.strip() for s in suggestions if s and s.strip()))
+        prefix_trie = _Trie()
+        token_trie = _Trie()
+        token_postings = {}
+        trigram_index = {}
+
+        for suggestion_id, text in enumerate(texts):
+            prefix_trie.insert(normalize_query(text), suggestion_id)
+            for token in set(tokenize(text)):
+                if token not in token_postings:
+                    token_postings[token] = set()
+                    token_trie.insert(token, token)
+                    for gram in trigrams(token):
+                        trigram_index.setdefault(gram, set()).add(token)
+                token_postings[token].add(suggestion_id)
+
+        # Swap everything at once so searches never see a half built index
+        self._state = (texts, prefix_trie, token_trie, token_postings, trigram_index)
+        self._keys = {normalize_query(text) for text in texts}
+
+    def search(self, query: str, limit: int = 3) -> list[str]:
+        """Return the best matching suggestions for a partial query
+        @parameter query : str - Partial query
+        @parameter limit : int - Maximum number of suggestions
+        @returns list[str] - Suggestions, best first
+        """
+        texts, prefix_trie, token_trie, token_postings, trigram_index = self._state
+        normalized = normalize_query(query)
+        if not normalized or not texts:
+            return []
+
+        scores = {}
+        for suggestion_id in prefix_trie.find(normalized):
+            scores[suggestion_id] = 2.0
+
+        tokens = tokenize(normalized)
+        partial = not re.search(r"[\s?!.]$", query)
+        matched = {}
+        for position, token in enumerate(tokens):
+            is_prefix = partial and position == len(tokens) - 1
+            for suggestion_id in self._match_token(
+                token, is_prefix, token_trie, token_postings, trigram_index
+            ):
+                matched[suggestion_id] = matched.get(suggestion_id, 0) + 1
+
+        for suggestion_id, count in matched.items():
+            # Require most of the typed tokens to match
+            if tokens and count / len(tokens) >= 0.5:
+                scores[suggestion_id] = scores.get(suggestion_id, 0) + count / len(tokens)
+
+        weights = self._weights
+        ranked = sorted(
+            scores,
+            key=lambda i: (
+                -(scores[i] + 0.1 * math.log1p(weights.get(normalize_query(texts[i]), 0))),
+                len(texts[i]),
+            ),
+        )
+        return [texts[i] for i in ranked[:limit]]
+
+    def record(self, query: str) -> None:
+        """Count a served query, suggestions with the same text rank higher afterwards
+        @parameter query : str - Served query
+        """
+        key = normalize_query(query)
+        if key not in self._keys:
+            return
+        with self._lock:
+            self._weights[key] = self._weights.get(key, 0) + 1
+
+    def suggestions(self) -> list[str]:
+        """Return the indexed suggestions, most asked first"""
+        weights = self._weights
+        return sorted(self._state[0], key=lambda text: -weights.get(normalize_query(text), 0))
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def _match_token(
+        self,
+        token: str,
+        is_prefix: bool,
+        token_trie: _Trie,
+        token_postings: dict,
+        trigram_index: dict,
+    ) -> set:
+        if is_prefix:
+            vocabulary = set(token_trie.find(token))
+        else:
+            vocabulary = {token} if token in token_postings else set()
+
+        # Short tokens are too ambiguous for typo tolerance
+        if self.max_typos and len(token) > 3:
+            candidates = set()
+            for gram in trigrams(token):
+                candidates |= trigram_index.get(gram, set())
+            for candidate in candidates - vocabulary:
+                compared = candidate[: len(token)] if is_prefix else candidate
+                if within_distance(token, compared, self.max_typos):
+                    vocabulary.add(candidate)
+
+        ids = set()
+        for matched_token in vocabulary:
+            ids |= token_postings[matched_token]
+        return ids
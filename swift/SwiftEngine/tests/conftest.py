@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The engine modules import each other as `SwiftEngine.*` (the API runs from swift/)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
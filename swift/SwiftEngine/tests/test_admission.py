@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from SwiftEngine.admission import (
+    GENERATION,
+    LOOKUP,
+    AdmissionController,
+    RateLimiter,
+    Rejected,
+)
+
+
+def test_full_queue_rejects_generations_and_sheds_them_for_lookups():
+    admission = AdmissionController(max_generations=1, max_lookups=1, max_queue=1, queue_timeout=5)
+
+    async def run():
+        await admission.acquire(GENERATION)
+        await admission.acquire(LOOKUP)
+        waiting = asyncio.ensure_future(admission.acquire(GENERATION))
+        await asyncio.sleep(0)
+
+        # The queue is full: another generation is rejected right away
+        with pytest.raises(Rejected) as rejected:
+            await admission.acquire(GENERATION)
+        assert rejected.value.status_code == 503 and rejected.value.retry_after >= 1
+
+        # A lookup takes the place of the waiting generation
+        lookup = asyncio.ensure_future(admission.acquire(LOOKUP))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected):
+            await waiting
+        admission.release(LOOKUP)
+        await lookup
+        return admission.stats()
+
+    stats = asyncio.run(run())
+    assert stats[LOOKUP] == {"in_flight": 1, "waiting": 0, "limit": 1}
+
+
+def test_queued_request_gets_the_released_slot_or_times_out():
+    admission = AdmissionController(max_generations=1, max_queue=4, queue_timeout=0.05)
+
+    async def run():
+        await admission.acquire(GENERATION)
+        waiting = asyncio.ensure_future(admission.acquire(GENERATION))
+        await asyncio.sleep(0)
+        admission.release(GENERATION)
+        await waiting
+
+        with pytest.raises(Rejected):
+            await admission.acquire(GENERATION)
+        return admission.stats()[GENERATION]
+
+    assert asyncio.run(run()) == {"in_flight": 1, "waiting": 0, "limit": 1}
+
+
+def test_multi_slot_request_waits_until_all_its_slots_are_free():
+    admission = AdmissionController(max_generations=4, max_queue=4, queue_timeout=5)
+
+    async def run():
+        assert await admission.acquire(GENERATION, 3) == 3
+        batch = asyncio.ensure_future(admission.acquire(GENERATION, 3))
+        await asyncio.sleep(0)
+        # One slot is free, but the waiting batch needs three and is first in line
+        single = asyncio.ensure_future(admission.acquire(GENERATION))
+        await asyncio.sleep(0)
+        assert admission.stats()[GENERATION] == {"in_flight": 3, "waiting": 2, "limit": 4}
+
+        admission.release(GENERATION, slots=3)
+        assert await batch == 3
+        await single
+        # More slots than the lane has are capped at its limit
+        admission.release(GENERATION, slots=3)
+        admission.release(GENERATION)
+        assert await admission.acquire(GENERATION, 10) == 4
+        return admission.stats()[GENERATION]
+
+    assert asyncio.run(run()) == {"in_flight": 4, "waiting": 0, "limit": 4}
+
+
+def test_rate_limiter_buckets_are_per_client():
+    limiter = RateLimiter(rate=1, burst=2)
+    limiter.check("a")
+    limiter.check("a")
+    with pytest.raises(Rejected) as rejected:
+        limiter.check("a")
+    assert rejected.value.status_code == 429
+    limiter.check("b")
@@ -0,0 +1,167 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+
+import api
+from benchmarks.fake_backend import DEFAULT_PROFILE, LatencyModel, build_fake_engine
+from SwiftEngine.admission import GENERATION, AdmissionController, RateLimiter
+from SwiftEngine.AsyncSwiftEngine import AsyncSwiftQueryEngine
+
+
+@pytest.fixture
+def client(monkeypatch):
+    latency = {name: LatencyModel(0, 0) for name in DEFAULT_PROFILE}
+    monkeypatch.setattr(
+        api,
+        "create_swift_engine",
+        lambda: AsyncSwiftQueryEngine(build_fake_engine(documents=20, latency=latency)),
+    )
+    with TestClient(api.app) as client:
+        yield client
+
+
+def test_stream_slot_is_released_when_the_client_leaves_before_the_body(client):
+    admission = api.swift_engine.admission
+
+    async def disconnect():
+        await admission.acquire(GENERATION)
+
+        async def body():
+            yield "never sent"
+
+        async def send(message):
+            raise OSError("client went away")
+
+        response = api.SlotStreamingResponse(body(), media_type="text/event-stream")
+        with pytest.raises(ClientDisconnect):
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, None, send)
+
+    client.portal.call(disconnect)
+    assert admission.lanes[GENERATION].in_flight == 0
+
+
+def test_stream_and_batch_release_their_slots(client):
+    stream = client.post("/query/stream", json={"query": "How to use hybrid search?"})
+    batch = client.post("/query_batch", json={"queries": ["What is a vector?", "Backups"]})
+
+    assert stream.status_code == 200
+    assert "event: done" in stream.text
+    assert len(batch.text.splitlines()) == 2
+    assert api.swift_engine.admission.lanes[GENERATION].in_flight == 0
+
+
+def test_concurrent_batches_stay_within_the_generation_cap(client, monkeypatch):
+    monkeypatch.setenv("SWIFT_BATCH_PARALLELISM", "3")
+    api.swift_engine.admission = AdmissionController(max_generations=4, queue_timeout=10)
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def stream(prompt, model, timeout):
+        with lock:
+            running.append(prompt)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(prompt)
+        yield "Answer"
+
+    api.swift_engine.engine.generator._stream = stream
+    batches = [
+        ["replication factor", "backup to s3", "tenant offloading"],
+        ["product quantization", "bm25 tokenization", "named vectors"],
+    ]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        responses = list(
+            pool.map(lambda queries: client.post("/query_batch", json={"queries": queries}), batches)
+        )
+
+    assert [len(response.text.splitlines()) for response in responses] == [3, 3]
+    # A second batch waits for three free slots instead of running next to the first
+    assert max(peak) <= 3
+    assert api.swift_engine.admission.lanes[GENERATION].in_flight == 0
+
+
+def test_get_documents_rejects_more_ids_than_the_limit(client, monkeypatch):
+    monkeypatch.setenv("SWIFT_MAX_DOCUMENT_IDS", "2")
+    doc_id = client.get("/get_all_documents").json()["documents"][0]["_additional"]["id"]
+
+    accepted = client.post("/get_documents", json={"document_ids": [doc_id, doc_id]})
+    rejected = client.post("/get_documents", json={"document_ids": [doc_id] * 3})
+
+    assert list(accepted.json()["documents"]) == [doc_id]
+    assert rejected.status_code == 400
+    assert "limited to 2 document IDs" in rejected.json()["system"]
+
+
+def test_get_all_documents_resumes_after_a_removed_cursor(client):
+    engine = api.swift_engine.engine
+    first = client.get("/get_all_documents", params={"limit": 2}).json()
+    ids = [d["_additional"]["id"] for d in engine.get_document_catalog().documents]
+    # The last document of the client's page is removed by an ingestion run
+    del engine.client.store["Document"][first["next_cursor"]]
+    engine.document_catalog.refresh()
+
+    page = client.get(
+        "/get_all_documents", params={"cursor": first["next_cursor"], "limit": 2}
+    ).json()
+
+    assert first["next_cursor"] == ids[1]
+    assert [d["_additional"]["id"] for d in page["documents"]] == ids[2:4]
+
+
+def test_get_all_documents_matches_weak_and_listed_etags(client):
+    etag = client.get("/get_all_documents").headers["etag"]
+
+    for header in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+        response = client.get("/get_all_documents", headers={"If-None-Match": header})
+        assert response.status_code == 304, header
+    assert client.get("/get_all_documents", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_rate_limit_ignores_client_ids_from_untrusted_callers(client, monkeypatch):
+    monkeypatch.setattr(api, "rate_limiter", RateLimiter(rate=0.01, burst=1))
+
+    def suggest(client_id):
+        return client.post(
+            "/suggestions", json={"query": "hybrid"}, headers={"X-Client-Id": client_id}
+        ).status_code
+
+    assert [suggest("a"), suggest("b")] == [200, 429]
+    # Behind a trusted proxy the header tells the clients apart
+    monkeypatch.setenv("SWIFT_TRUSTED_PROXIES", "testclient")
+    assert [suggest("c"), suggest("d"), suggest("c")] == [200, 200, 429]
+
+
+def test_stream_cache_hits_do_not_wait_for_a_generation_slot(client):
+    client.post("/query", json={"query": "How to use hybrid search?"})
+    admission = api.swift_engine.admission = AdmissionController(max_generations=1, queue_timeout=0.1)
+    client.portal.call(admission.acquire, GENERATION)
+
+    hit = client.post("/query/stream", json={"query": "How to use hybrid search?"})
+    miss = client.post("/query/stream", json={"query": "What is a tenant?"})
+
+    assert '"cached": true' in hit.text
+    assert miss.status_code == 503
+    assert admission.lanes[GENERATION].in_flight == 1
+
+
+def test_debug_requests_are_only_profiled_with_the_debug_token(client, monkeypatch, tmp_path):
+    monkeypatch.setenv("SWIFT_PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("SWIFT_DEBUG_TOKEN", "secret")
+
+    def suggest(headers):
+        return client.post(
+            "/suggestions?debug=true", json={"query": "hybrid"}, headers=headers
+        ).json()["trace"]
+
+    anonymous = suggest({})
+    wrong = suggest({"X-Debug-Token": "guess"})
+    admin = suggest({"X-Debug-Token": "secret"})
+
+    assert "profile" not in anonymous and "profile" not in wrong
+    assert [str(p) for p in tmp_path.iterdir()] == [admin["profile"]]
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+from SwiftEngine.AsyncSwiftEngine import AsyncSwiftQueryEngine
+
+
+class BlockingEngine:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def query(self, query_string):
+        self.release.wait(timeout=5)
+        return ("answer", [])
+
+    def stream_query(self, query_string):
+        yield ("documents", [{"text": "chunk"}])
+        yield ("token", "Hello ")
+        yield ("token", "world")
+        yield ("done", {"system": "Hello world", "cached": False})
+
+    def get_suggestions(self, query):
+        return [query]
+
+    def close(self):
+        pass
+
+
+def test_lookups_stay_responsive_while_generations_run():
+    engine = BlockingEngine()
+    swift_engine = AsyncSwiftQueryEngine(engine, generation_workers=2, lookup_workers=1)
+
+    async def run():
+        generations = [
+            asyncio.ensure_future(swift_engine.query("slow")) for _ in range(4)
+        ]
+        suggestions = await asyncio.wait_for(
+            swift_engine.get_suggestions("What is"), timeout=1
+        )
+        assert not any(g.done() for g in generations)
+        engine.release.set()
+        return suggestions, await asyncio.gather(*generations)
+
+    suggestions, answers = asyncio.run(run())
+    swift_engine.close()
+
+    assert suggestions == ["What is"]
+    assert answers == [("answer", [])] * 4
+
+
+def test_stream_query_yields_documents_first():
+    swift_engine = AsyncSwiftQueryEngine(BlockingEngine())
+
+    async def run():
+        return [event async for event in swift_engine.stream_query("query")]
+
+    events = asyncio.run(run())
+    swift_engine.close()
+
+    assert [event for event, _ in events] == ["documents", "token", "token", "done"]
+
+
+def test_stream_is_closed_when_the_consumer_stops_early():
+    closed = threading.Event()
+
+    class ClosingEngine(BlockingEngine):
+        def stream_query(self, query_string):
+            try:
+                yield from super().stream_query(query_string)
+            finally:
+                closed.set()
+
+    swift_engine = AsyncSwiftQueryEngine(ClosingEngine())
+
+    async def run():
+        events = swift_engine.stream_query("query")
+        first = await events.__anext__()
+        await events.aclose()
+        return first
+
+    first = asyncio.run(run())
+    assert closed.wait(timeout=2)
+    swift_engine.close()
+
+    assert first[0] == "documents"
@@ -0,0 +1,29 @@
+import json
+
+from SwiftEngine.cache_format import decode_entry, encode_entry, rehydrate
+
+RESULTS = [
+    {"text": "Weaviate is a vector database", "doc_uuid": "d1", "chunk_id": 1, "_additional": {"id": "c1", "score": "0.9"}},
+    {"text": "It supports hybrid search", "doc_uuid": "d1", "chunk_id": 2, "_additional": {"id": "c2", "score": 0.5}},
+]
+
+
+def test_compact_entry_roundtrip():
+    properties = encode_entry("What is Weaviate?", RESULTS, "A vector database")
+
+    assert "results" not in properties
+    assert properties["chunk_ids"] == ["c1", "c2"]
+    system, chunk_ids, scores, results = decode_entry(properties)
+    assert (system, chunk_ids, scores, results) == ("A vector database", ["c1", "c2"], [0.9, 0.5], None)
+
+    chunks = {r["_additional"]["id"]: {k: v for k, v in r.items() if k != "_additional"} for r in RESULTS}
+    rehydrated = rehydrate(chunk_ids, scores, chunks)
+    assert [r["text"] for r in rehydrated] == [r["text"] for r in RESULTS]
+    assert rehydrated[0]["_additional"] == {"id": "c1", "score": 0.9}
+    assert rehydrate(chunk_ids, scores, {"c1": chunks["c1"]}) is None
+
+
+def test_legacy_entry():
+    properties = {"query": "q", "system": "answer", "results": json.dumps(RESULTS)}
+
+    assert decode_entry(properties) == ("answer", None, None, RESULTS)
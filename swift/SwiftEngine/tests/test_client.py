@@ -0,0 +1,64 @@
+import SwiftEngine.client as client_module
+from SwiftEngine.client import WeaviateClientManager
+
+
+class FakeClient:
+    def __init__(self, ready=True):
+        self.ready = ready
+        self.closed = False
+
+    def is_ready(self):
+        if isinstance(self.ready, Exception):
+            raise self.ready
+        return self.ready
+
+    def close(self):
+        self.closed = True
+
+
+def test_connects_lazily_and_reconnects_after_failed_check(monkeypatch):
+    clients = [FakeClient(ConnectionError("down")), FakeClient(True)]
+    monkeypatch.setattr(client_module, "connect", lambda *args: clients.pop(0))
+
+    manager = WeaviateClientManager("url", "key", "openai")
+    assert manager.stats()["connected"] is False
+
+    assert manager.readiness_poller.poll()
+    assert manager.ready is False
+    assert manager.stats()["connected"] is False
+
+    assert manager.readiness_poller.poll()
+    assert manager.ready is True
+    assert manager.stats() == {
+        "ready": True,
+        "connected": True,
+        "connects": 2,
+        "failures": 1,
+        "retired": 1,
+    }
+
+    client = manager.get()
+    manager.close()
+    assert client.closed
+    assert manager.stats()["retired"] == 0
+
+
+def test_failed_check_keeps_the_client_open_for_running_calls(monkeypatch):
+    clients = [FakeClient(False), FakeClient(True)]
+    monkeypatch.setattr(client_module, "connect", lambda *args: clients.pop(0))
+
+    manager = WeaviateClientManager("url", "key", "openai", retire_after=60)
+    old = manager.get()
+    assert not manager.check_readiness()
+    assert not old.closed
+
+    new = manager.get()
+    assert new is not old
+    manager.close_retired()
+    assert not old.closed
+
+    manager.retire_after = 0
+    manager.close_retired()
+    assert old.closed
+    assert not new.closed
+    manager.close()
@@ -0,0 +1,49 @@
+from SwiftEngine.context import ContextAssembler, overlap, tokenize
+
+WORDS = [f"w{i}" for i in range(40)]
+
+
+def chunk(doc, chunk_id, start, end, score):
+    return {
+        "text": " ".join(WORDS[start:end]),
+        "doc_uuid": doc,
+        "doc_name": doc,
+        "chunk_id": chunk_id,
+        "_additional": {"id": f"{doc}-{chunk_id}", "score": score},
+    }
+
+
+def test_overlap_finds_the_shared_words():
+    assert overlap(tokenize("a b c d e"), tokenize("c d e f")) == 3
+    assert overlap(tokenize("a b c"), tokenize("x y")) == 0
+
+
+def test_overlapping_chunks_of_a_document_are_merged():
+    results = [
+        chunk("d1", 2, 10, 30, 0.7),
+        chunk("d2", 1, 0, 20, 0.9),
+        chunk("d1", 1, 0, 20, 0.8),
+    ]
+    passages, report = ContextAssembler(token_budget=1000).assemble(results)
+
+    assert [p["doc_uuid"] for p in passages] == ["d2", "d1"]
+    assert passages[1]["text"] == " ".join(WORDS[0:30])
+    assert passages[1]["chunk_ids"] == [1, 2]
+    assert report["merged"] == 1
+    assert report["tokens_after"] < report["tokens_before"]
+
+
+def test_near_duplicates_are_dropped_and_the_budget_is_kept():
+    results = [
+        chunk("d1", 1, 0, 40, 0.9),
+        chunk("d2", 4, 0, 38, 0.8),
+        chunk("d3", 1, 0, 40, 0.7),
+    ]
+    assembler = ContextAssembler(token_budget=1000)
+    passages, report = assembler.assemble(results)
+    assert [p["doc_uuid"] for p in passages] == ["d1"]
+    assert report["duplicates"] == 2
+
+    passages, report = ContextAssembler(token_budget=20).assemble(results[:1])
+    assert report["truncated"]
+    assert report["tokens_after"] <= 20
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from SwiftEngine.deadline import DeadlineExceeded, StageRunner, deadline_scope
+
+from benchmarks.fake_backend import DEFAULT_PROFILE, LatencyModel, build_fake_engine
+
+
+def test_slow_call_is_hedged_after_the_p95():
+    runner = StageRunner(workers=4, min_hedge_delay=0)
+    for _ in range(20):
+        runner.window("retrieval").add(0.01)
+    calls = []
+    lock = threading.Lock()
+
+    def search():
+        with lock:
+            calls.append(len(calls))
+            first = len(calls) == 1
+        time.sleep(1.0 if first else 0.01)
+        return "hedge" if not first else "primary"
+
+    start = time.perf_counter()
+    assert runner.run("retrieval", search, hedge=True) == "hedge"
+    assert time.perf_counter() - start < 0.5
+    assert len(calls) == 2
+    runner.close()
+
+
+def test_stage_over_budget_raises():
+    runner = StageRunner(workers=2)
+    start = time.perf_counter()
+    with deadline_scope(0.1), pytest.raises(DeadlineExceeded) as error:
+        runner.run("retrieval", time.sleep, 1.0)
+    assert error.value.stage == "retrieval"
+    assert time.perf_counter() - start < 0.5
+    # Without a deadline calls run inline
+    assert runner.run("retrieval", lambda: threading.current_thread().name) == (
+        threading.current_thread().name
+    )
+    runner.close()
+
+
+def test_generation_timeout_returns_the_retrieved_documents():
+    latency = {name: LatencyModel(0, 0) for name in DEFAULT_PROFILE}
+    latency["first_token"] = LatencyModel(5000, 5000)
+    engine = build_fake_engine(documents=20, latency=latency)
+    start = time.perf_counter()
+    with deadline_scope(0.3):
+        system, results = engine.query("How to use hybrid search?")
+    elapsed = time.perf_counter() - start
+    engine.close()
+
+    assert system.startswith("Generation timed out")
+    assert len(results) == 8
+    assert elapsed < 1.0
+    assert len(engine.local_cache) == 0
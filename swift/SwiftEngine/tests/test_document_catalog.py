@@ -0,0 +1,57 @@
+import json
+
+from SwiftEngine.document_catalog import CatalogSnapshot, DocumentCatalog
+
+DOCUMENTS = [
+    {"doc_name": f"doc-{i}", "doc_type": "Documentation", "doc_link": "", "_additional": {"id": f"id-{i}"}}
+    for i in range(5)
+]
+
+
+def test_cursor_pagination_covers_all_documents():
+    snapshot = CatalogSnapshot(list(reversed(DOCUMENTS)))
+
+    pages = []
+    cursor = None
+    while True:
+        documents, cursor = snapshot.page(cursor, 2)
+        pages.append([d["doc_name"] for d in documents])
+        if cursor is None:
+            break
+
+    assert pages == [["doc-0", "doc-1"], ["doc-2", "doc-3"], ["doc-4"]]
+
+
+def test_pagination_resumes_after_a_cursor_removed_by_a_refresh():
+    # The client's last page ended at id-1, which the refreshed catalog no longer has
+    snapshot = CatalogSnapshot([d for d in DOCUMENTS if d["_additional"]["id"] != "id-1"])
+
+    documents, cursor = snapshot.page("id-1", 2)
+
+    assert [d["doc_name"] for d in documents] == ["doc-2", "doc-3"]
+    assert cursor == "id-3"
+    assert snapshot.page("id-9", 2) == ([], None)
+
+
+def test_streamed_json_and_version():
+    snapshot = CatalogSnapshot(DOCUMENTS)
+
+    body = b"".join(snapshot.iter_json(batch_size=2))
+    assert json.loads(body) == {"documents": DOCUMENTS}
+    assert json.loads(b"".join(CatalogSnapshot([]).iter_json())) == {"documents": []}
+    assert CatalogSnapshot(list(reversed(DOCUMENTS))).etag == snapshot.etag
+    assert CatalogSnapshot(DOCUMENTS[:4]).etag != snapshot.etag
+
+
+def test_catalog_loads_once_until_refreshed():
+    loads = []
+
+    def load():
+        loads.append(1)
+        return DOCUMENTS[: len(loads) + 2]
+
+    catalog = DocumentCatalog(load)
+    first = catalog.get()
+    assert catalog.get() is first and len(first) == 3
+    assert len(catalog.refresh()) == 4
+    assert catalog.stats()["refreshes"] == 2
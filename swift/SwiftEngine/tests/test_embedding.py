@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_backend import DEFAULT_PROFILE, LatencyModel, build_fake_engine
+from SwiftEngine.embedding import (
+    Embedder,
+    EmbeddingModelMismatch,
+    OpenAIEmbedder,
+    vectorizer_model,
+)
+
+
+class CountingEmbedder(Embedder):
+    def __init__(self):
+        super().__init__(memo_size=8)
+        self.calls = []
+
+    def _embed(self, texts):
+        self.calls.append(texts)
+        return [[float(len(text))] for text in texts]
+
+
+def test_embed_many_sends_only_memo_misses_in_one_call():
+    embedder = CountingEmbedder()
+    assert embedder.embed("abc") == [3.0]
+
+    vectors = embedder.embed_many(["abc", "de", "de", "f"])
+
+    assert vectors == [[3.0], [2.0], [2.0], [1.0]]
+    assert embedder.calls == [["abc"], ["de", "f"]]
+
+
+def test_openai_embedder_times_out_at_the_embed_budget_without_retries(monkeypatch):
+    monkeypatch.setenv("SWIFT_STAGE_BUDGETS", '{"embed": 1.5}')
+    embedder = OpenAIEmbedder("sk-test")
+
+    assert embedder.client.timeout == 1.5
+    assert embedder.client.max_retries == 0
+
+
+def collection_config(**model) -> SimpleNamespace:
+    return SimpleNamespace(vectorizer_config=SimpleNamespace(vectorizer="text2vec-openai", model=model))
+
+
+def test_vectorizer_model_reads_current_and_legacy_models():
+    assert vectorizer_model(collection_config(model="text-embedding-3-small")) == "text-embedding-3-small"
+    assert vectorizer_model(collection_config(model="ada", modelVersion="002")) == "text-embedding-ada-002"
+    assert vectorizer_model(collection_config()) is None
+
+
+def test_engine_refuses_collections_vectorized_with_another_model():
+    latency = {name: LatencyModel(0, 0) for name in DEFAULT_PROFILE}
+    engine = build_fake_engine(documents=5, latency=latency)
+    engine.embedder.model = "text-embedding-3-small"
+    for name in ("Chunk", "Cache"):
+        engine.client.collection(name).config.get = lambda: collection_config(
+            model="text-embedding-3-small"
+        )
+    engine.check_embedding_model()
+
+    engine.client.collection("Cache").config.get = lambda: collection_config(
+        model="ada", modelVersion="002"
+    )
+    with pytest.raises(EmbeddingModelMismatch, match="Cache collection was vectorized with"):
+        engine.check_embedding_model()
+    engine.close()
@@ -0,0 +1,65 @@
+import httpx
+import openai
+import pytest
+
+from SwiftEngine.generation import GenerationError, Generator, StubGenerator, build_prompt
+
+
+class FlakyGenerator(Generator):
+    def __init__(self, failures: int, fail_after_first_token: bool = False):
+        super().__init__("flaky", retries=2, backoff=0)
+        self.failures = failures
+        self.fail_after_first_token = fail_after_first_token
+        self.attempts = 0
+
+    def _stream(self, prompt, model, timeout):
+        self.attempts += 1
+        if self.fail_after_first_token:
+            yield "partial "
+        if self.attempts <= self.failures:
+            raise TimeoutError("too slow")
+        yield "done"
+
+
+def test_failed_attempts_are_retried():
+    generator = FlakyGenerator(failures=2)
+    assert generator.generate("prompt") == "done"
+    assert generator.attempts == 3
+
+
+def test_gives_up_after_the_retries():
+    generator = FlakyGenerator(failures=3)
+    with pytest.raises(GenerationError):
+        generator.generate("prompt")
+    assert generator.attempts == 3
+
+
+def test_started_stream_is_not_retried():
+    generator = FlakyGenerator(failures=1, fail_after_first_token=True)
+    with pytest.raises(GenerationError):
+        list(generator.stream("prompt"))
+    assert generator.attempts == 1
+
+
+def test_non_retryable_errors_fail_immediately_as_generation_errors():
+    class RejectingGenerator(FlakyGenerator):
+        def _stream(self, prompt, model, timeout):
+            self.attempts += 1
+            raise openai.NotFoundError(
+                "The model does not exist",
+                response=httpx.Response(404, request=httpx.Request("POST", "https://api")),
+                body=None,
+            )
+            yield
+
+    generator = RejectingGenerator(failures=0)
+    with pytest.raises(GenerationError, match="NotFoundError"):
+        generator.generate("prompt")
+    assert generator.attempts == 1
+
+
+def test_stub_answers_from_the_snippets():
+    generator = StubGenerator()
+    prompt = build_prompt("What is BM25?", [{"text": "BM25 ranks keywords. It is fast."}])
+    assert generator.generate(prompt) == "BM25 ranks keywords."
+    assert generator.prompts == [prompt]
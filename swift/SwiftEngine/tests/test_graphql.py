@@ -0,0 +1,36 @@
+import re
+from types import SimpleNamespace
+
+from SwiftEngine.graphql import multi_get, run_multi_get, search_clause
+
+
+def test_search_clause_escapes_the_query():
+    clause = search_clause("hybrid", [0.5, 1], 'say "hi"')
+    assert clause == 'hybrid: {query: "say \\"hi\\"", vector: [0.5,1]}'
+    assert search_clause("nearVector", [0.25]) == "nearVector: {vector: [0.25]}"
+
+
+def test_multi_get_aliases_every_search():
+    gql = multi_get("Chunk", {"q0": "a", "q1": "b"}, 3, ["text"], ["id", "score"])
+    assert gql == (
+        "{ Get { q0: Chunk(a, limit: 3) { text _additional { id score } } "
+        "q1: Chunk(b, limit: 3) { text _additional { id score } } } }"
+    )
+
+
+def test_run_multi_get_packs_searches_and_parses_scores():
+    requests = []
+
+    class Client:
+        def graphql_raw_query(self, gql):
+            requests.append(gql)
+            aliases = re.findall(r"(\w+): Chunk\(", gql)
+            get = {alias: [{"_additional": {"id": alias, "score": "0.5"}}] for alias in aliases}
+            return SimpleNamespace(get=get, errors=None)
+
+    searches = {f"query {i}": search_clause("nearVector", [i]) for i in range(5)}
+    results = run_multi_get(Client(), "Chunk", searches, 1, [], ["id", "score"], pack_size=2)
+
+    assert len(requests) == 3
+    assert list(results) == list(searches)
+    assert results["query 4"][0]["_additional"] == {"id": "q0", "score": 0.5}
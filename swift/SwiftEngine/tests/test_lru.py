@@ -0,0 +1,35 @@
+from SwiftEngine.lru import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_bound():
+    cache = LRUCache(maxsize=100, max_bytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "yyyy")
+    cache.put("a", "xxxxx")
+    assert cache.stats()["bytes"] == 9
+
+    cache.put("c", "zzzz")
+    assert "b" not in cache
+    assert cache.stats()["bytes"] == 9
+    cache.pop("a")
+    assert cache.stats()["bytes"] == 4
+
+
+def test_ttl():
+    cache = LRUCache(maxsize=2, ttl=-1)
+    cache.put("a", 1)
+
+    assert cache.get("a", "expired") == "expired"
+    assert len(cache) == 0
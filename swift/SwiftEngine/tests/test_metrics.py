@@ -0,0 +1,36 @@
+from SwiftEngine.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(
+        Histogram("stage_seconds", "Stage duration", ("stage",), buckets=(0.1, 1.0))
+    )
+    histogram.observe(0.05, "embed")
+    histogram.observe(0.5, "embed")
+    histogram.observe(5.0, "embed")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{stage="embed",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="embed",le="1.0"} 2' in lines
+    assert 'stage_seconds_bucket{stage="embed",le="+Inf"} 3' in lines
+    assert 'stage_seconds_sum{stage="embed"} 5.55' in lines
+    assert 'stage_seconds_count{stage="embed"} 3' in lines
+
+
+def test_counter_and_gauge():
+    registry = Registry()
+    counter = registry.register(Counter("lookups_total", "Lookups", ("tier", "result")))
+    gauge = registry.register(Gauge("in_flight", "In flight", ("endpoint",)))
+
+    counter.inc("local", "hit")
+    counter.inc("local", "hit")
+    with gauge.track("query"):
+        assert gauge.value("query") == 1
+
+    lines = registry.render().splitlines()
+
+    assert 'lookups_total{tier="local",result="hit"} 2' in lines
+    assert 'in_flight{endpoint="query"} 0' in lines
@@ -0,0 +1,52 @@
+from SwiftEngine.routing import ModelRouter, query_features
+
+from benchmarks.fake_backend import DEFAULT_PROFILE, LatencyModel, build_fake_engine
+
+
+def chunk(score: float, text: str = "Hybrid search combines BM25 and vectors.") -> dict:
+    return {"text": text, "_additional": {"score": score}}
+
+
+def router(**options) -> ModelRouter:
+    return ModelRouter("default", mode="auto", fast_model="fast", strong_model="strong", **options)
+
+
+def test_query_features():
+    assert query_features("What is a vector?") == {"words": 4, "code": False, "faq": True}
+    assert query_features("How to call collections.query.hybrid?")["code"]
+    assert query_features("Show a python example")["code"]
+    assert not query_features("How to back up a cluster")["faq"]
+
+
+def test_routes_by_query_and_retrieval():
+    confident = [chunk(0.9), chunk(0.8)]
+    assert router().route("What is a vector?", confident) == ("fast", "faq")
+    assert router().route("Backups", confident) == ("fast", "short_query")
+    assert router().route("How do I write a batch import script?", confident) == (
+        "strong",
+        "code_query",
+    )
+    long_query = "How does the HNSW index trade recall for speed"
+    assert router(long_query=5).route(long_query, confident) == ("strong", "long_query")
+    code = [chunk(0.9, "```python\nclient.close()\n```"), chunk(0.8)]
+    assert router().route("Backups", code) == ("strong", "code_context")
+    assert router().route("Backups", [chunk(0.1)]) == ("strong", "weak_retrieval")
+    assert router().route("Backups", confident, model="picked") == ("picked", "requested")
+    assert ModelRouter("default", mode="fixed").route("Backups", confident) == ("default", "fixed")
+
+
+def test_engine_routes_each_request_and_counts_per_model(monkeypatch):
+    monkeypatch.setenv("SWIFT_MODEL_ROUTING", "auto")
+    monkeypatch.setenv("SWIFT_ROUTE_MIN_SCORE", "0")
+    latency = {name: LatencyModel(0, 0) for name in DEFAULT_PROFILE}
+    engine = build_fake_engine(documents=20, latency=latency)
+    engine.query("What is a vector?")
+    engine.query("Show a python example of a batch import")
+    engine.query("How to use hybrid search?", model="gpt-4o")
+    stats = engine.stats()["models"]
+    engine.close()
+
+    assert stats["mode"] == "auto"
+    assert stats["models"]["gpt-4o-mini"]["routes"] == {"faq": 1}
+    assert stats["models"]["gpt-4o"]["routes"] == {"code_query": 1, "requested": 1}
+    assert stats["models"]["gpt-4o"]["cost"] > stats["models"]["gpt-4o-mini"]["cost"] > 0
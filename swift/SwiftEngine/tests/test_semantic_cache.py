@@ -0,0 +1,47 @@
+from SwiftEngine.semantic_cache import LocalSemanticCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  What is   Weaviate? ") == "what is weaviate"
+    assert normalize_query("WHAT IS WEAVIATE") == normalize_query("what is weaviate?")
+
+
+def test_exact_hit_on_normalized_query():
+    cache = LocalSemanticCache(max_entries=4)
+    cache.put("What is Weaviate?", [{"text": "chunk"}], "A vector database")
+
+    assert cache.lookup("what is weaviate") == ([{"text": "chunk"}], "A vector database", 0.0, None)
+    assert cache.lookup("What is Hybrid Search?") is None
+    assert cache.stats()["exact_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_semantic_hit_respects_threshold():
+    cache = LocalSemanticCache(max_entries=4, distance_threshold=0.14)
+    cache.put("What is Weaviate?", [], "A vector database", vector=[1.0, 0.0, 0.0])
+
+    hit = cache.lookup("Tell me about Weaviate", vector=[0.99, 0.1, 0.0])
+    assert hit is not None and hit[2] < 0.14
+    assert cache.lookup("How to deploy?", vector=[0.0, 1.0, 0.0]) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_lru_eviction_frees_vector_slots():
+    cache = LocalSemanticCache(max_entries=2)
+    cache.put("a", [], "A", vector=[1.0, 0.0])
+    cache.put("b", [], "B", vector=[0.0, 1.0])
+    cache.lookup("a")
+    cache.put("c", [], "C", vector=[0.0, 1.0])
+
+    assert len(cache) == 2
+    assert cache.lookup("b") is None
+    assert cache.lookup("other", vector=[0.0, 1.0])[1] == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = LocalSemanticCache(max_entries=2, ttl=-1)
+    cache.put("a", [], "A", vector=[1.0, 0.0])
+
+    assert cache.lookup("a", vector=[1.0, 0.0]) is None
+    assert len(cache) == 0
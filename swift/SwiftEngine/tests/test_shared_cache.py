@@ -0,0 +1,46 @@
+import multiprocessing
+
+from SwiftEngine.shared_cache import SharedSemanticCache
+
+RESULTS = [{"text": "Weaviate is a vector database", "_additional": {"id": "c1", "score": 0.9}}]
+
+
+def write_entry(path):
+    cache = SharedSemanticCache(path, max_entries=4)
+    cache.put("What is Weaviate?", RESULTS, "A vector database", [1.0, 0.0, 0.0], "id-1")
+    cache.close()
+
+
+def test_entries_are_shared_between_processes_and_survive_restarts(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    reader = SharedSemanticCache(path, max_entries=4)
+    assert reader.lookup("What is Weaviate?", [1.0, 0.0, 0.0]) is None
+
+    process = multiprocessing.get_context("spawn").Process(target=write_entry, args=(path,))
+    process.start()
+    process.join(timeout=30)
+    assert process.exitcode == 0
+
+    assert reader.get_exact("what is weaviate") == (RESULTS, "A vector database", 0.0, "id-1")
+    results, system, distance, cache_id = reader.lookup("Tell me about Weaviate", [0.99, 0.05, 0.0])
+    assert system == "A vector database" and distance < 0.01
+    reader.close()
+
+    restarted = SharedSemanticCache(path, max_entries=4)
+    assert len(restarted) == 1
+    restarted.clear()
+    assert restarted.get_exact("What is Weaviate?") is None
+    restarted.close()
+
+
+def test_least_recently_used_entry_is_replaced(tmp_path):
+    cache = SharedSemanticCache(str(tmp_path / "cache.bin"), max_entries=2, ttl=None)
+    cache.put("one", RESULTS, "1", [1.0, 0.0])
+    cache.put("two", RESULTS, "2", [0.0, 1.0])
+    cache.get_exact("one")
+    cache.put("three", RESULTS, "3", [0.7, 0.7])
+
+    assert cache.get_exact("two") is None
+    assert cache.get_exact("one")[1] == "1"
+    assert cache.stats()["evictions"] == 1
+    cache.close()
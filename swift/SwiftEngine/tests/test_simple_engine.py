@@ -0,0 +1,169 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from WeaviateIngestion.manifest import save_manifest
+from benchmarks.fake_backend import DEFAULT_PROFILE, LatencyModel, build_fake_engine
+
+
+def fake_engine():
+    latency = {name: LatencyModel(0, 0) for name in DEFAULT_PROFILE}
+    return build_fake_engine(documents=20, latency=latency)
+
+
+def test_query_is_answered_then_served_from_cache():
+    engine = fake_engine()
+    system, results = engine.query("How to use hybrid search?")
+    cached_system, cached_results = engine.query("How to use hybrid search?")
+    engine.close()
+
+    assert system.startswith("Answer to 'How to use hybrid search?'")
+    assert len(results) == 8
+    assert {"id", "score"} <= set(results[0]["_additional"])
+    assert cached_system == "Cached (0.0) " + system
+    assert cached_results == results
+
+
+def test_documents_and_catalog():
+    engine = fake_engine()
+    catalog = engine.get_document_catalog()
+    doc_id = catalog.documents[0]["_additional"]["id"]
+
+    documents = engine.retrieve_documents([doc_id, "not-a-uuid"])
+    engine.close()
+
+    assert len(catalog) == 20
+    assert list(documents) == [doc_id]
+    assert documents[doc_id]["properties"]["doc_name"].startswith("Document")
+
+
+def test_failed_generation_keeps_the_retrieved_chunks():
+    engine = fake_engine()
+    engine.generator.retries = 0
+    engine.generator.latency = {**engine.generator.latency, "first_token": LatencyModel(0, 0, 1.0)}
+    system, results = engine.query("How to use hybrid search?")
+    engine.close()
+
+    assert system.startswith("Generation failed")
+    assert len(results) == 8
+    assert len(engine.local_cache) == 0
+
+
+def test_query_many_answers_in_input_order():
+    engine = fake_engine()
+    cached_system, _ = engine.query("How to use hybrid search?")
+    queries = ["What is a vector?", "How to use hybrid search?", "what is a  vector?", "Backups"]
+    answers = list(engine.query_many(queries))
+    repeated = list(engine.query_many(["Backups"]))
+    engine.close()
+
+    assert len(answers) == 4
+    assert answers[0][0].startswith("Answer to 'What is a vector?'")
+    assert answers[1][0] == "Cached (0.0) " + cached_system
+    assert answers[2] == answers[0]
+    assert answers[3][0].startswith("Answer to 'Backups'")
+    assert all(len(results) == 8 for _, results in answers)
+    assert repeated[0][0] == "Cached (0.0) " + answers[3][0]
+
+
+def test_query_many_finds_answers_cached_in_weaviate():
+    engine = fake_engine()
+    system, _ = engine.query("How to use hybrid search?")
+    engine.cache_writer.flush()
+    engine.local_cache.clear()
+    answers = list(engine.query_many(["How to use hybrid search?"]))
+    engine.close()
+
+    assert answers[0][0] == "Cached (0.0) " + system
+
+
+def test_expired_weaviate_cache_entries_are_not_served():
+    engine = fake_engine()
+    engine.query("How to use hybrid search?")
+    engine.cache_writer.flush()
+    engine.local_cache.clear()
+    for entry in engine.client.collection("Cache").objects.values():
+        entry["properties"]["created_at"] -= engine.cache_ttl + 1
+    answer, results = engine.query("How to use hybrid search?")
+    engine.close()
+
+    assert answer.startswith("Answer to 'How to use hybrid search?'")
+    assert len(results) == 8
+
+
+def test_cache_hits_are_added_to_the_stored_count():
+    engine = fake_engine()
+    engine.query("How to use hybrid search?")
+    engine.cache_writer.flush()
+    (entry,) = engine.client.collection("Cache").objects.values()
+    # Hits another worker already wrote
+    entry["properties"]["hits"] = 5
+    engine.query("How to use hybrid search?")
+    engine.query("How to use hybrid search?")
+    engine.cache_hit_writer.flush()
+    engine.close()
+
+    # Only the counter is updated, the object is not written back whole
+    (stored,) = engine.client.collection("Cache").objects.values()
+    assert stored is entry
+    assert entry["properties"]["hits"] == 7
+
+
+def test_non_retryable_generation_error_keeps_the_retrieved_chunks():
+    engine = fake_engine()
+
+    def reject(prompt, model, timeout):
+        raise ValueError("This model's maximum context length is 4097 tokens")
+        yield
+
+    engine.generator._stream = reject
+    system, results = engine.query("How to use hybrid search?")
+    engine.close()
+
+    assert system.startswith("Generation failed: ValueError")
+    assert len(results) == 8
+
+
+def test_concurrent_queries_for_different_models_do_not_share_a_generation():
+    engine = fake_engine()
+    both_started = threading.Barrier(2, timeout=2)
+
+    def stream(prompt, model, timeout):
+        # Only returns once both requests generate at the same time
+        both_started.wait()
+        yield f"Answer of {model}"
+
+    engine.generator._stream = stream
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fast = pool.submit(engine.query, "How to use hybrid search?", None, "gpt-4o-mini")
+        strong = pool.submit(engine.query, "How to use hybrid search?", None, "gpt-4o")
+        answers = {fast.result()[0], strong.result()[0]}
+    engine.close()
+
+    assert answers == {"Answer of gpt-4o-mini", "Answer of gpt-4o"}
+
+
+def test_ingestion_fingerprint_follows_the_run_stored_in_weaviate():
+    engine = fake_engine()
+    before = engine.ingestion_fingerprint()
+    # Another host re-imported edited documents, the document count is unchanged
+    save_manifest(
+        engine.client, {"run_id": "run-2", "finished_at": 0.0, "documents": {}, "changed": []}
+    )
+    after = engine.ingestion_fingerprint()
+    engine.close()
+
+    assert before[0] is None
+    assert after == ("run-2", before[1])
+
+
+def test_reworded_suggestions_rebuild_the_suggestion_index():
+    engine = fake_engine()
+    engine.suggestion_poller.poll()
+    (entry, *_) = engine.client.store["Suggestion"].values()
+    # Re-imported with another wording, the number of suggestions stays the same
+    entry["properties"]["suggestion"] = "How to tune the HNSW ef parameter?"
+    changed = engine.suggestion_poller.poll()
+    engine.close()
+
+    assert changed
+    assert "How to tune the HNSW ef parameter?" in engine.suggestion_index.suggestions()
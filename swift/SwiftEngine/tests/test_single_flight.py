@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from SwiftEngine.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_the_leaders_result():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return "answer"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "q", work)
+        started.wait(timeout=5)
+        followers = [pool.submit(flight.do, "q", work) for _ in range(3)]
+        while flight.followers < 3:
+            pass
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert results == ["answer"] * 4
+    assert calls == [1]
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "followers": 3}
+
+
+def test_near_duplicate_vectors_join_and_errors_propagate():
+    flight = SingleFlight(distance_threshold=0.14)
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(timeout=5)
+        raise ValueError("generation failed")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "what is weaviate", fail, [1.0, 0.0])
+        started.wait(timeout=5)
+        follower = pool.submit(flight.do, "what's weaviate", fail, [0.99, 0.05])
+        while flight.followers < 1:
+            pass
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_async_single_flight():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*[flight.do("q", work) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["answer"] * 5
+    assert calls == [1]
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,46 @@
+from SwiftEngine.suggestion_index import SuggestionIndex, within_distance
+
+SUGGESTIONS = [
+    "What is a vector database?",
+    "What is Weaviate?",
+    "What is Hybrid Search?",
+    "How to use nearText in Python?",
+    "How to use nearVector in Python?",
+    "How to deploy Weaviate?",
+]
+
+
+def test_within_distance():
+    assert within_distance("weaviate", "weaviate", 1)
+    assert within_distance("weavate", "weaviate", 1)
+    assert not within_distance("wevate", "weaviate", 1)
+
+
+def test_prefix_matches_rank_first():
+    index = SuggestionIndex()
+    index.build(SUGGESTIONS)
+
+    assert index.search("What is W")[0] == "What is Weaviate?"
+    assert index.search("how to use near")[:2] == [
+        "How to use nearText in Python?",
+        "How to use nearVector in Python?",
+    ]
+    assert index.search("") == []
+
+
+def test_token_and_typo_matches():
+    index = SuggestionIndex()
+    index.build(SUGGESTIONS)
+
+    assert "How to deploy Weaviate?" in index.search("deploy weaviate")
+    assert index.search("hybrd search")[0] == "What is Hybrid Search?"
+
+
+def test_popularity_breaks_ties():
+    index = SuggestionIndex()
+    index.build(SUGGESTIONS)
+    for _ in range(3):
+        index.record("how to use nearvector in python")
+    index.record("an unknown query")
+
+    assert index.search("How to use near", limit=1) == ["How to use nearVector in Python?"]
@@ -0,0 +1,24 @@
+from SwiftEngine.top_k import TopKPolicy
+
+
+def results(*scores):
+    return [{"text": str(i), "_additional": {"score": score}} for i, score in enumerate(scores)]
+
+
+def test_fixed_mode_keeps_k():
+    policy = TopKPolicy("fixed", k=3)
+    assert policy.limit == 3
+    assert len(policy.cut(results(1.0, 0.9, 0.8, 0.7))) == 3
+
+
+def test_adaptive_mode_cuts_at_the_elbow():
+    policy = TopKPolicy("adaptive", min_k=2, max_k=8, gap=0.25, relative=0.5)
+    assert policy.limit == 8
+    # Near-exact match: the gap after the second hit ends the list
+    assert policy.depth([1.0, 0.95, 0.4, 0.38, 0.35]) == 2
+    # Scores fall below half of the top score
+    assert policy.depth([1.0, 0.9, 0.8, 0.7, 0.6, 0.45, 0.4]) == 5
+    # Flat scores widen to the maximum
+    assert policy.depth([0.5] * 10) == 8
+    # The minimum holds even after a large first gap
+    assert policy.depth([1.0, 0.1, 0.05]) == 2
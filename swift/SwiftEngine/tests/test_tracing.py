@@ -0,0 +1,49 @@
+import asyncio
+import os
+
+from SwiftEngine.AsyncSwiftEngine import AsyncSwiftQueryEngine
+from SwiftEngine.tracing import annotate, finish_trace, stage, start_trace
+
+
+class TracedEngine:
+    def query(self, query_string):
+        with stage("retrieval"):
+            annotate(retrieved=2)
+        return ("answer", [])
+
+    def close(self):
+        pass
+
+
+def test_worker_threads_record_into_the_request_trace():
+    swift_engine = AsyncSwiftQueryEngine(TracedEngine(), generation_workers=1, lookup_workers=1)
+
+    async def run():
+        trace = start_trace("query")
+        await swift_engine.query("What is Weaviate?")
+        return trace
+
+    trace = asyncio.run(run())
+    swift_engine.close()
+
+    assert [name for name, _ in trace.spans] == ["retrieval"]
+    assert trace.attributes == {"retrieved": 2}
+    header = trace.server_timing()
+    assert header.startswith("retrieval;dur=")
+    assert ", total;dur=" in header
+
+
+def test_profiled_request_writes_a_profile(tmp_path, monkeypatch):
+    monkeypatch.setenv("SWIFT_PROFILE_DIR", str(tmp_path))
+    swift_engine = AsyncSwiftQueryEngine(TracedEngine(), generation_workers=1, lookup_workers=1)
+
+    async def run():
+        trace = start_trace("query", profile=True)
+        await swift_engine.query("What is Weaviate?")
+        return finish_trace(trace)
+
+    path = asyncio.run(run())
+    swift_engine.close()
+
+    assert path and os.path.dirname(path) == str(tmp_path)
+    assert os.path.getsize(path) > 0
@@ -0,0 +1,79 @@
+import os
+
+from SwiftEngine.metrics import CACHE_LOOKUPS
+from SwiftEngine.query_log import QueryLog
+from SwiftEngine.warmer import CacheWarmer
+
+from benchmarks.fake_backend import DEFAULT_PROFILE, LatencyModel, build_fake_engine
+
+
+def test_query_log_returns_the_most_frequent_queries(tmp_path):
+    log = QueryLog(str(tmp_path / "queries.jsonl"))
+    for query in ["Backups", "What is a vector?", "backups", "Backups?", "What is a vector?"]:
+        log.record(query)
+    log.close()
+    with open(tmp_path / "queries.jsonl", "a") as f:
+        f.write('{"query": "cut off')
+
+    assert log.top(1) == ["Backups"]
+    assert log.top(5) == ["Backups", "What is a vector?"]
+
+
+def test_query_log_rotates_and_reads_only_the_last_lines(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path, max_lines=4, max_bytes=200)
+    for i in range(10):
+        log.record(f"query {i}")
+    log.close()
+
+    assert log.rotations >= 1
+    assert os.path.getsize(path + ".1") < 300
+    assert sorted(log.top(10)) == ["query 6", "query 7", "query 8", "query 9"]
+
+
+def test_warmer_generates_misses_once_and_reports_coverage(tmp_path):
+    latency = {name: LatencyModel(0, 0) for name in DEFAULT_PROFILE}
+    engine = build_fake_engine(documents=20, latency=latency)
+    engine.query_log = QueryLog(str(tmp_path / "queries.jsonl"))
+    engine.query("Backups")
+    engine.query("How to run Weaviate in Docker?")
+    engine.query("How to run Weaviate in Docker?")
+    engine.local_cache.clear()
+
+    warmer = CacheWarmer(engine, rate=1000, top_n=10)
+    first = warmer.run()
+    second = warmer.run()
+    engine.close()
+
+    suggestions = len(engine.suggestion_index)
+    assert first["suggestions"]["queries"] == suggestions
+    assert first["history"]["queries"] == 2
+    assert first["history"]["coverage"] == 1.0
+    assert first["suggestions"]["warmed"] + first["suggestions"]["cached"] == suggestions
+    assert second["suggestions"] == {
+        "queries": suggestions,
+        "cached": suggestions,
+        "warmed": 0,
+        "failed": 0,
+        "coverage": 1.0,
+    }
+
+
+def test_warmer_probes_are_left_out_of_the_cache_stats():
+    latency = {name: LatencyModel(0, 0) for name in DEFAULT_PROFILE}
+    engine = build_fake_engine(documents=20, latency=latency)
+    warmer = CacheWarmer(engine, rate=1000, top_n=0)
+    warmer.run()
+    engine.cache_writer.flush()
+    # Half of the answers are only in Weaviate, the other half also in the local cache
+    engine.local_cache.clear()
+    warmer.warm(engine.suggestion_index.suggestions()[::2])
+    lookups = dict(CACHE_LOOKUPS._values)
+    local = {key: engine.local_cache.stats()[key] for key in ("exact_hits", "semantic_hits", "misses")}
+
+    report = warmer.run()
+    engine.close()
+
+    assert report["suggestions"]["coverage"] == 1.0 and report["suggestions"]["warmed"] == 0
+    assert dict(CACHE_LOOKUPS._values) == lookups
+    assert {key: engine.local_cache.stats()[key] for key in local} == local
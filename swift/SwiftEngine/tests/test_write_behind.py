@@ -0,0 +1,104 @@
+import threading
+
+from SwiftEngine.metrics import (
+    REGISTRY,
+    WRITE_BEHIND_DEPTH,
+    WRITE_BEHIND_FLUSH_SECONDS,
+    WRITE_BEHIND_ITEMS,
+)
+from SwiftEngine.write_behind import WriteBehindQueue
+
+
+def test_flushes_on_batch_size_and_deduplicates():
+    batches = []
+    flushed = threading.Event()
+
+    def flush(batch):
+        batches.append(batch)
+        flushed.set()
+
+    writer = WriteBehindQueue(flush, batch_size=3, flush_interval=60)
+    writer.put("a", 1)
+    writer.put("a", 2)
+    writer.put("b", 3)
+    assert writer.depth == 2
+    writer.put("c", 4)
+
+    assert flushed.wait(timeout=2)
+    writer.close()
+    assert batches == [[2, 3, 4]]
+    assert writer.stats()["deduplicated"] == 1
+
+
+def test_flushes_on_interval():
+    flushed = threading.Event()
+    writer = WriteBehindQueue(lambda batch: flushed.set(), batch_size=100, flush_interval=0.05)
+    writer.put("a", 1)
+
+    assert flushed.wait(timeout=2)
+    writer.close()
+    assert writer.stats()["flushed"] == 1
+
+
+def test_close_flushes_pending_items():
+    batches = []
+    writer = WriteBehindQueue(batches.append, batch_size=100, flush_interval=60)
+    writer.put("a", 1)
+    writer.put("b", 2)
+    writer.close()
+
+    assert batches == [[1, 2]]
+    assert not writer.put("c", 3)
+
+
+def test_failed_flush_keeps_the_writer_running():
+    batches = []
+    failed = threading.Event()
+    flushed = threading.Event()
+
+    def flush(batch):
+        if not failed.is_set():
+            failed.set()
+            raise ConnectionError("Weaviate unavailable")
+        batches.append(batch)
+        flushed.set()
+
+    writer = WriteBehindQueue(flush, batch_size=1, flush_interval=60, name="test-writer")
+    writer.put("a", 1)
+    assert failed.wait(timeout=2)
+    writer.put("b", 2)
+
+    assert flushed.wait(timeout=2)
+    assert writer._thread.is_alive()
+    writer.close()
+    assert batches == [[2]]
+    assert writer.stats()["errors"] == 1
+
+
+def test_merge_combines_items_of_a_pending_key():
+    batches = []
+    writer = WriteBehindQueue(
+        batches.append, batch_size=100, flush_interval=60, merge=lambda a, b: a + b
+    )
+    writer.put("a", 1)
+    writer.put("a", 2)
+    writer.put("b", 5)
+    writer.close()
+
+    assert batches == [[3, 5]]
+
+
+def test_queue_depth_items_and_flush_latency_are_exported():
+    writer = WriteBehindQueue(lambda batch: None, batch_size=100, flush_interval=60, name="test-export")
+    writer.put("a", 1)
+    writer.put("a", 2)
+    writer.put("b", 3)
+    depth = WRITE_BEHIND_DEPTH.value("test-export")
+    writer.close()
+
+    assert depth == 2
+    assert WRITE_BEHIND_DEPTH.value("test-export") == 0
+    assert WRITE_BEHIND_ITEMS.value("test-export", "deduplicated") == 1
+    assert WRITE_BEHIND_ITEMS.value("test-export", "flushed") == 2
+    assert WRITE_BEHIND_FLUSH_SECONDS.count("test-export") == 1
+    assert 'swift_write_behind_depth{queue="test-export"} 0' in REGISTRY.render().splitlines()
@@ -0,0 +1,76 @@
+import os
+
+
+def _score(result: dict) -> float:
+    try:
+        return float(result["_additional"].get("score") or 0.0)
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+class TopKPolicy:
+    """
+    Decides how many retrieved chunks reach the prompt. The fixed mode keeps the
+    first `k`, the adaptive mode retrieves up to `max_k` candidates and cuts the list
+    at the first large score gap or where scores drop below a share of the top score.
+    """
+
+    def __init__(
+        self,
+        mode: str = None,
+        k: int = None,
+        min_k: int = None,
+        max_k: int = None,
+        gap: float = None,
+        relative: float = None,
+    ):
+        self.mode = mode or os.environ.get("SWIFT_TOP_K_MODE", "fixed")
+        if self.mode not in ("fixed", "adaptive"):
+            raise ValueError(f"Unknown top-k mode {self.mode}, use fixed or adaptive")
+        self.k = k or int(os.environ.get("SWIFT_TOP_K", 8))
+        self.min_k = min_k or int(os.environ.get("SWIFT_TOP_K_MIN", 2))
+        self.max_k = max_k or int(os.environ.get("SWIFT_TOP_K_MAX", 12))
+        # Gap between neighbouring scores and score floor, both relative to the top score
+        self.gap = gap if gap is not None else float(os.environ.get("SWIFT_TOP_K_GAP", 0.25))
+        self.relative = (
+            relative if relative is not None else float(os.environ.get("SWIFT_TOP_K_RELATIVE", 0.5))
+        )
+
+    @property
+    def limit(self) -> int:
+        """Number of candidates to retrieve"""
+        return self.max_k if self.mode == "adaptive" else self.k
+
+    def cut(self, results: list[dict]) -> list[dict]:
+        """Cut the retrieved chunks to the depth of this policy
+        @parameter results : list[dict] - Retrieved chunks, best first
+        @returns list[dict] - Chunks passed on to generation
+        """
+        if self.mode == "fixed":
+            return results[: self.k]
+        return results[: self.depth([_score(r) for r in results])]
+
+    def depth(self, scores: list[float]) -> int:
+        """Return the adaptive depth for scores sorted best first
+        @parameter scores : list[float] - Hybrid scores
+        @returns int - Number of chunks to keep, between min_k and max_k
+        """
+        scores = scores[: self.max_k]
+        top = scores[0] if scores else 0.0
+        if top <= 0:
+            # Nothing stands out, keep the widest context
+            return len(scores)
+        for i in range(max(self.min_k, 1), len(scores)):
+            if scores[i] < self.relative * top or scores[i - 1] - scores[i] >= self.gap * top:
+                return i
+        return len(scores)
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "k": self.k,
+            "min_k": self.min_k,
+            "max_k": self.max_k,
+            "gap": self.gap,
+            "relative": self.relative,
+        }
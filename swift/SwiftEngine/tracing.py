@@ -0,0 +1,192 @@
+import contextvars
+import cProfile
+import os
+import pstats
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from wasabi import msg
+
+from SwiftEngine.metrics import STAGE_SECONDS, Histogram
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("swift_trace", default=None)
+
+
+class Trace:
+    """
+    Stage durations and attributes of a single request.
+
+    The trace lives in a context variable, so engine code records into it without
+    passing it around. Work offloaded to worker threads must run in a copy of the
+    request context (see `AsyncSwiftQueryEngine`).
+    """
+
+    def __init__(self, name: str, profile: bool = False, debug: bool = False):
+        self.name = name
+        self.debug = debug
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.spans: list[tuple[str, float]] = []
+        self.attributes: dict = {}
+        self.profile = profile
+        self.profiles: list[cProfile.Profile] = []
+
+    def add_span(self, name: str, seconds: float) -> None:
+        self.spans.append((name, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Render the spans as a Server-Timing header value, repeated stages are summed
+        @returns str - Header value
+        """
+        durations = {}
+        for name, seconds in self.spans:
+            durations[name] = durations.get(name, 0.0) + seconds
+        durations["total"] = self.elapsed()
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in durations.items())
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "total_ms": round(self.elapsed() * 1000, 3),
+            "spans": [
+                {"stage": name, "ms": round(seconds * 1000, 3)} for name, seconds in self.spans
+            ],
+            **self.attributes,
+        }
+
+
+def start_trace(name: str, profile: bool = False, debug: bool = False) -> Trace:
+    """Start a trace for the current request context
+    @parameter name : str - Request name, e.g. the endpoint
+    @parameter profile : bool - Capture a cProfile of the work run through `call`
+    @parameter debug : bool - Collect attributes that are too costly for every request
+    @returns Trace - The new trace
+    """
+    trace = Trace(name, profile, debug)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def debugging() -> bool:
+    """Whether the current request asked for a debug trace"""
+    trace = _current_trace.get()
+    return trace is not None and trace.debug
+
+
+def annotate(**attributes) -> None:
+    """Attach attributes to the current trace, does nothing outside a traced request"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def record_span(name: str, seconds: float) -> None:
+    """Add a span to the current trace, does nothing outside a traced request
+    @parameter name : str - Span name
+    @parameter seconds : float - Duration
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, seconds)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Record a query stage in the stage histogram and the current trace
+    @parameter name : str - Stage name
+    @parameter seconds : float - Duration
+    """
+    STAGE_SECONDS.observe(seconds, name)
+    record_span(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block as a query stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+@contextmanager
+def span(name: str, histogram: Histogram = None, labels: tuple = ()) -> Iterator[None]:
+    """Time the block into the current trace and, if given, a histogram
+    @parameter name : str - Span name
+    @parameter histogram : Histogram - Histogram observing the duration
+    @parameter labels : tuple - Histogram labels
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(seconds, *labels)
+        record_span(name, seconds)
+
+
+def call(fn: Callable, *args) -> Any:
+    """Call fn, under cProfile if the current trace asked for a profile. Used as the worker
+    thread entry point, a profiler only sees the thread it was enabled in
+    @parameter fn : Callable - Function to call
+    @returns Any - Return value of fn
+    """
+    trace = _current_trace.get()
+    if trace is None or not trace.profile:
+        return fn(*args)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another thread is being profiled, Python 3.12+ allows one profiler at a time
+        return fn(*args)
+    trace.profiles.append(profiler)
+    try:
+        return fn(*args)
+    finally:
+        profiler.disable()
+
+
+def should_profile(requested: bool = False) -> bool:
+    """Decide whether a request is profiled, debug requests always are when SWIFT_PROFILE_DIR is set
+    @parameter requested : bool - The request asked for a profile
+    @returns bool - Whether to profile
+    """
+    if not os.environ.get("SWIFT_PROFILE_DIR"):
+        return False
+    sample_rate = float(os.environ.get("SWIFT_PROFILE_SAMPLE_RATE", 0))
+    return requested or random.random() < sample_rate
+
+
+def finish_trace(trace: Trace) -> Optional[str]:
+    """Write the collected profiles of a trace to SWIFT_PROFILE_DIR
+    @parameter trace : Trace - Finished trace
+    @returns Optional[str] - Path of the written .prof file
+    """
+    directory = os.environ.get("SWIFT_PROFILE_DIR")
+    if not trace.profiles or not directory:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{int(time.time())}-{trace.name}-{trace.id}.prof")
+        stats = pstats.Stats(trace.profiles[0])
+        for profiler in trace.profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+        trace.attributes["profile"] = path
+        return path
+    except Exception as e:
+        msg.warn(f"Writing profile of {trace.name} failed: {str(e)}")
+        return None
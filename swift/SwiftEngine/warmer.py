@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from functools import partial
+
+from wasabi import msg
+
+from SwiftEngine.admission import TokenBucket
+from SwiftEngine.metrics import CACHE_WARMS, ERRORS
+from SwiftEngine.semantic_cache import normalize_query
+from WeaviateIngestion.suggestions import suggestion_list
+
+SOURCES = ("suggestions", "history")
+
+
+class CacheWarmer:
+    """
+    Fills the semantic cache with the answers users ask for first: the suggestions
+    and the most frequent queries of the query log. Queries with a fresh cache entry
+    are skipped, the others are generated at no more than `rate` per second so
+    warming never competes with live traffic. In the background it warms once at
+    startup and again after every ingestion run.
+    """
+
+    def __init__(self, engine, rate: float = None, top_n: int = None, batch_size: int = None):
+        self.engine = engine
+        self.rate = rate or float(os.environ.get("SWIFT_WARM_RATE", 1.0))
+        self.top_n = top_n if top_n is not None else int(os.environ.get("SWIFT_WARM_TOP_N", 100))
+        self.batch_size = batch_size or engine.batch_pack_size
+        self.runs = 0
+        self.report = {}
+        self._bucket = TokenBucket(self.rate, 1)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sources(self) -> dict:
+        """Return the queries to warm by source
+        @returns dict - Queries by source, a query listed by both only counts as a suggestion
+        """
+        # The built-in suggestions until the Suggestion collection is loaded
+        suggestions = self.engine.suggestion_index.suggestions() or list(suggestion_list)
+        history = self.engine.query_log.top(self.top_n) if self.engine.query_log else []
+        seen = set()
+        queries = {}
+        for source, texts in zip(SOURCES, (suggestions, history)):
+            queries[source] = []
+            for text in texts:
+                key = normalize_query(text)
+                if key and key not in seen:
+                    seen.add(key)
+                    queries[source].append(text)
+        return queries
+
+    def run(self) -> dict:
+        """Warm all queries once
+        @returns dict - Coverage report, per source the cached, warmed and failed queries
+        """
+        start = time.perf_counter()
+        report = {}
+        for source, queries in self.sources().items():
+            counts = {"queries": len(queries), "cached": 0, "warmed": 0, "failed": 0}
+            for i in range(0, len(queries), self.batch_size):
+                if self._stop.is_set():
+                    break
+                for result in self.warm(queries[i : i + self.batch_size]):
+                    counts[result] += 1
+                    CACHE_WARMS.inc(source, result)
+            counts["coverage"] = round(
+                (counts["cached"] + counts["warmed"]) / counts["queries"] if queries else 1.0, 4
+            )
+            report[source] = counts
+        report["seconds"] = round(time.perf_counter() - start, 2)
+
+        self.runs += 1
+        self.report = report
+        msg.good(
+            "Cache warmed: "
+            + ", ".join(
+                f"{source} {report[source]['coverage']:.0%} covered "
+                f"({report[source]['warmed']} generated, {report[source]['failed']} failed)"
+                for source in SOURCES
+            )
+        )
+        return report
+
+    def warm(self, queries: list[str]) -> list[str]:
+        """Look a batch of queries up like query_many and generate the misses at the warming rate.
+        The lookups are probes, they are left out of the cache stats and hit counts
+        @parameter queries : list[str] - Queries with distinct normalized text
+        @returns list[str] - cached, warmed or failed per query
+        """
+        engine = self.engine
+        results = {}
+        pending = {}
+        for query in queries:
+            key = normalize_query(query)
+            if engine.local_cache.get_exact(query, record=False):
+                results[key] = "cached"
+            else:
+                pending[key] = query
+
+        if pending:
+            vectors = dict(zip(pending, engine.embedder.embed_many(list(pending.values()))))
+            hits = engine.retrieve_semantic_cache_many(
+                {key: (pending[key], vectors[key]) for key in pending}, record=False
+            )
+            misses = {key: pending[key] for key in pending if key not in hits}
+            retrieved = engine.retrieve_chunks_many(
+                {key: (misses[key], vectors[key]) for key in misses}
+            )
+            results.update({key: "cached" for key in hits})
+            for key, query in misses.items():
+                if not self._throttle():
+                    results[key] = "failed"
+                    continue
+                try:
+                    engine.in_flight.do(
+                        (key, None),
+                        partial(engine.generate, query, vectors[key], retrieved[key]),
+                        vectors[key],
+                    )
+                except Exception as e:
+                    msg.warn(f"Warming query {query} failed: {str(e)}")
+                # Failed generations are not cached
+                results[key] = (
+                    "warmed" if engine.local_cache.get_exact(query, record=False) else "failed"
+                )
+
+        return [results[normalize_query(query)] for query in queries]
+
+    def start(self, initial: bool = True) -> "CacheWarmer":
+        """Warm in a daemon thread on every trigger
+        @parameter initial : bool - Whether to warm right away
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="swift-warmer", daemon=True)
+            self._thread.start()
+            if initial:
+                self._wake.set()
+        return self
+
+    def trigger(self) -> None:
+        """Warm again in the background, e.g. after an ingestion run. Does nothing unless started"""
+        if self._thread is not None:
+            self._wake.set()
+
+    def stats(self) -> dict:
+        return {"running": self._thread is not None, "runs": self.runs, "last": self.report}
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _throttle(self) -> bool:
+        """Wait for the next generation token
+        @returns bool - False if the warmer was closed while waiting
+        """
+        wait = self._bucket.take()
+        while wait:
+            if self._stop.wait(wait):
+                return False
+            wait = self._bucket.take()
+        return not self._stop.is_set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            if self._stop.is_set():
+                return
+            self._wake.clear()
+            try:
+                self.run()
+            except Exception as e:
+                ERRORS.inc("cache_warm")
+                msg.warn(f"Cache warming failed: {str(e)}")
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from wasabi import msg
+
+from SwiftEngine.metrics import (
+    ERRORS,
+    WRITE_BEHIND_DEPTH,
+    WRITE_BEHIND_FLUSH_SECONDS,
+    WRITE_BEHIND_ITEMS,
+)
+
+
+class WriteBehindQueue:
+    """
+    Buffers writes and flushes them from a background thread in batches.
+
+    A flush is triggered once `batch_size` items are pending or `flush_interval`
+    seconds after the oldest pending item arrived. Items enqueued under a key that
+    is already pending replace the pending item, so identical writes arriving in the
+    same window are flushed once. With `merge` they are combined with it instead.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[list], None],
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        name: str = "swift-write-behind",
+        merge: Optional[Callable[[Any, Any], Any]] = None,
+    ):
+        self.flush_fn = flush_fn
+        self.name = name
+        self.merge = merge
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self.enqueued = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+        self._pending: OrderedDict = OrderedDict()
+        self._oldest = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, key: Hashable, item: Any) -> bool:
+        """Queue an item for the next flush
+        @parameter key : Hashable - Deduplication key
+        @parameter item : Any - Item passed to flush_fn
+        @returns bool - False if the item was dropped because the queue is full or closed
+        """
+        with self._condition:
+            if self._closed:
+                self.dropped += 1
+                WRITE_BEHIND_ITEMS.inc(self.name, "dropped")
+                return False
+            if key in self._pending:
+                self.deduplicated += 1
+                WRITE_BEHIND_ITEMS.inc(self.name, "deduplicated")
+                if self.merge is not None:
+                    item = self.merge(self._pending[key], item)
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                WRITE_BEHIND_ITEMS.inc(self.name, "dropped")
+                return False
+            first = not self._pending
+            if first:
+                self._oldest = time.monotonic()
+            self._pending[key] = item
+            self.enqueued += 1
+            WRITE_BEHIND_ITEMS.inc(self.name, "enqueued")
+            WRITE_BEHIND_DEPTH.set(len(self._pending), self.name)
+            # Wake the writer to arm the interval timer or flush a full batch
+            if first or len(self._pending) >= self.batch_size:
+                self._condition.notify()
+            return True
+
+    def flush(self) -> None:
+        """Flush everything that is pending from the calling thread"""
+        with self._condition:
+            batch = self._take()
+        self._flush(batch)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the background thread after flushing all pending items
+        @parameter timeout : float - Seconds to wait for the final flush
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "enqueued": self.enqueued,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "last_flush_seconds": self.last_flush_seconds,
+            "total_flush_seconds": self.total_flush_seconds,
+        }
+
+    def _take(self) -> list:
+        batch = list(self._pending.values())
+        self._pending.clear()
+        self._oldest = None
+        WRITE_BEHIND_DEPTH.set(0, self.name)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and (
+                    not self._pending
+                    or (
+                        len(self._pending) < self.batch_size
+                        and time.monotonic() - self._oldest < self.flush_interval
+                    )
+                ):
+                    timeout = (
+                        self.flush_interval - (time.monotonic() - self._oldest)
+                        if self._pending
+                        else None
+                    )
+                    self._condition.wait(timeout)
+                closed = self._closed
+                batch = self._take()
+            self._flush(batch)
+            if closed:
+                return
+
+    def _flush(self, batch: list) -> None:
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            self.flush_fn(batch)
+            self.flushed += len(batch)
+            WRITE_BEHIND_ITEMS.inc(self.name, "flushed", amount=len(batch))
+        except Exception as e:
+            self.errors += 1
+            ERRORS.inc(self.name)
+            WRITE_BEHIND_ITEMS.inc(self.name, "failed", amount=len(batch))
+            msg.fail(f"Write-behind flush of {len(batch)} items failed: {str(e)}")
+        finally:
+            self.last_flush_seconds = time.perf_counter() - start
+            WRITE_BEHIND_FLUSH_SECONDS.observe(self.last_flush_seconds, self.name)
+            self.total_flush_seconds += self.last_flush_seconds
+            self.flushes += 1
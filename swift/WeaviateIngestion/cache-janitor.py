@@ -0,0 +1,42 @@
+import os
+
+import typer
+from wasabi import msg  # type: ignore[import]
+
+from util import setup_client
+from cache_maintenance import expire_cache, invalidate_cache
+from manifest import load_manifest
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main(
+    ttl_hours: float = float(os.environ.get("SWIFT_CACHE_TTL_HOURS", 168)),
+    max_entries: int = int(os.environ.get("SWIFT_CACHE_MAX_ENTRIES", 50000)),
+    invalidate: bool = True,
+) -> None:
+    msg.divider("Starting cache janitor")
+
+    client = setup_client(
+        openai_key=os.environ.get("OPENAI_API_KEY", ""),
+        weaviate_url=os.environ.get("WCD_URL", ""),
+        weaviate_key=os.environ.get("WCD_API_KEY", ""),
+    )
+
+    if not client:
+        return
+
+    # Drop answers built from documents that changed in the last import run
+    if invalidate:
+        changed = load_manifest(client).get("changed", [])
+        if changed:
+            invalidate_cache(client, changed)
+
+    expire_cache(client, ttl_hours * 3600, max_entries)
+    client.close()
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,110 @@
+import time
+import uuid
+
+from haystack import Document
+from wasabi import msg  # type: ignore[import]
+from weaviate import WeaviateClient
+from weaviate.classes.query import Filter
+
+from util import hash_string
+from manifest import MANIFEST_PATH, load_manifest, save_manifest
+
+# Weaviate limits the number of values in a single filter
+DELETE_BATCH_SIZE = 100
+
+
+def write_manifest(
+    client: WeaviateClient, documents: list[Document], path: str = MANIFEST_PATH
+) -> dict:
+    """Record the content hash of every imported document and which documents changed since the last run.
+    The manifest is stored in Weaviate, so every API host sees the same run
+    @parameter client : WeaviateClient - Weaviate Client
+    @parameter documents : list[Document] - Imported documents
+    @parameter path : str - Local manifest of earlier versions, compared against if Weaviate has none
+    @returns dict - The new manifest
+    """
+    previous = load_manifest(client, path).get("documents", {})
+    current = {
+        str(d.meta["doc_hash"]): hash_string(str(d.content)) for d in documents
+    }
+
+    # Documents with new content or that were removed, new documents cannot be cited by cached answers yet
+    changed = sorted(
+        doc_hash
+        for doc_hash, content_hash in previous.items()
+        if current.get(doc_hash) != content_hash
+    )
+
+    manifest = {
+        "run_id": str(uuid.uuid4()),
+        "finished_at": time.time(),
+        "documents": current,
+        "changed": changed,
+    }
+    save_manifest(client, manifest)
+
+    msg.info(f"Ingestion manifest written, {len(changed)} changed documents")
+    return manifest
+
+
+def invalidate_cache(client: WeaviateClient, doc_hashes: list[str]) -> int:
+    """Delete the cache entries whose answer was generated from one of the given documents
+    @parameter client : WeaviateClient - Weaviate Client
+    @parameter doc_hashes : list[str] - doc_hash of changed documents
+    @returns int - Number of deleted entries
+    """
+    cache = client.collections.use("Cache")
+    deleted = 0
+    for i in range(0, len(doc_hashes), DELETE_BATCH_SIZE):
+        result = cache.data.delete_many(
+            where=Filter.by_property("doc_hashes").contains_any(
+                doc_hashes[i : i + DELETE_BATCH_SIZE]
+            )
+        )
+        deleted += result.successful
+    msg.good(f"Invalidated {deleted} cache entries of {len(doc_hashes)} changed documents")
+    return deleted
+
+
+def expire_cache(
+    client: WeaviateClient, ttl_seconds: float, max_entries: int
+) -> tuple[int, int]:
+    """Delete cache entries older than the TTL, then the least frequently used ones above max_entries
+    @parameter client : WeaviateClient - Weaviate Client
+    @parameter ttl_seconds : float - Maximum entry age
+    @parameter max_entries : int - Maximum number of entries kept
+    @returns tuple[int, int] - (expired, evicted) entry counts
+    """
+    cache = client.collections.use("Cache")
+    now = time.time()
+    cutoff = now - ttl_seconds
+
+    expired = []
+    alive = []
+    backfilled = 0
+    for obj in cache.iterator(return_properties=["created_at", "hits"]):
+        created_at = obj.properties.get("created_at")
+        if not created_at:
+            # Entries written before created_at existed, their TTL starts with this run
+            cache.data.update(uuid=obj.uuid, properties={"created_at": now})
+            created_at = now
+            backfilled += 1
+        if created_at < cutoff:
+            expired.append(obj.uuid)
+        else:
+            alive.append((obj.properties.get("hits") or 0, created_at, obj.uuid))
+    if backfilled:
+        msg.info(f"Set the creation time of {backfilled} cache entries without one")
+
+    # LFU: fewest hits first, oldest first among equal hit counts
+    alive.sort()
+    evicted = [entry[2] for entry in alive[: max(0, len(alive) - max_entries)]]
+
+    to_delete = expired + evicted
+    for i in range(0, len(to_delete), DELETE_BATCH_SIZE):
+        cache.data.delete_many(
+            where=Filter.by_id().contains_any(to_delete[i : i + DELETE_BATCH_SIZE])
+        )
+
+    msg.good(f"Expired {len(expired)} and evicted {len(evicted)} cache entries")
+    return len(expired), len(evicted)
@@ -1,8 +1,8 @@
 import os
 from wasabi import msg  # type: ignore[import]
-from weaviate.classes.config import Configure, Property, DataType
+from weaviate.classes.config import Configure
 
-from util import setup_client
+from util import cache_properties, setup_client
 
 from dotenv import load_dotenv
 
@@ -26,12 +26,8 @@ if client.collections.exists("Cache"):
         client.collections.create(
             "Cache",
             description="Cache of Documentations and their queries",
-            vectorizer_config=Configure.Vectorizer.text2vec_openai(),
-            properties=[
-                Property(name="query", data_type=DataType.TEXT, description="Query"),
-                Property(name="system", data_type=DataType.TEXT, description="System message", skip_vectorization=True, vectorize_property_name=False),
-                Property(name="results", data_type=DataType.TEXT, description="List of results", skip_vectorization=True, vectorize_property_name=False),
-            ],
+            vectorizer_config=Configure.Vectorizer.text2vec_openai(model=os.environ.get("SWIFT_EMBEDDING_MODEL", "text-embedding-3-small")),
+            properties=cache_properties(),
         )
         msg.good("'Cache' collection created")
     else:
@@ -40,12 +36,8 @@ else:
     client.collections.create(
         "Cache",
         description="Cache of Documentations and their queries",
-        vectorizer_config=Configure.Vectorizer.text2vec_openai(),
-        properties=[
-            Property(name="query", data_type=DataType.TEXT, description="Query"),
-            Property(name="system", data_type=DataType.TEXT, description="System message", skip_vectorization=True, vectorize_property_name=False),
-            Property(name="results", data_type=DataType.TEXT, description="List of results", skip_vectorization=True, vectorize_property_name=False),
-        ],
+        vectorizer_config=Configure.Vectorizer.text2vec_openai(model=os.environ.get("SWIFT_EMBEDDING_MODEL", "text-embedding-3-small")),
+        properties=cache_properties(),
     )
     msg.good("'Cache' collections created")
 
@@ -33,12 +33,13 @@ if client.collections.exists("Document"):
                 Property(name="doc_name", data_type=DataType.TEXT, description="Document name"),
                 Property(name="doc_type", data_type=DataType.TEXT, description="Document type"),
                 Property(name="doc_link", data_type=DataType.TEXT, description="Link to document"),
+                Property(name="doc_hash", data_type=DataType.TEXT, description="Hash of the document path", skip_vectorization=True, vectorize_property_name=False),
             ],
         )
         client.collections.create(
             "Chunk",
             description="Chunks of Documentations",
-            vectorizer_config=Configure.Vectorizer.text2vec_openai(),
+            vectorizer_config=Configure.Vectorizer.text2vec_openai(model=os.environ.get("SWIFT_EMBEDDING_MODEL", "text-embedding-3-small")),
             generative_config=Configure.Generative.openai(
                 model="gpt-3.5-turbo",
             ),
@@ -47,6 +48,7 @@ if client.collections.exists("Document"):
                 Property(name="doc_name", data_type=DataType.TEXT, description="Document name"),
                 Property(name="doc_uuid", data_type=DataType.TEXT, description="Document UUID", skip_vectorization=True, vectorize_property_name=True),
                 Property(name="chunk_id", data_type=DataType.NUMBER, description="Document chunk from the whole document", skip_vectorization=True, vectorize_property_name=True),
+                Property(name="doc_hash", data_type=DataType.TEXT, description="Hash of the document path", skip_vectorization=True, vectorize_property_name=False),
             ],
         )
         msg.good("'Document' and 'Chunk' schemas created")
@@ -61,12 +63,13 @@ else:
         Property(name="doc_name", data_type=DataType.TEXT, description="Document name"),
         Property(name="doc_type", data_type=DataType.TEXT, description="Document type"),
         Property(name="doc_link", data_type=DataType.TEXT, description="Link to document"),
+        Property(name="doc_hash", data_type=DataType.TEXT, description="Hash of the document path", skip_vectorization=True, vectorize_property_name=False),
     ],
     )
     client.collections.create(
         "Chunk",
         description="Chunks of Documentations",
-        vectorizer_config=Configure.Vectorizer.text2vec_openai(),
+        vectorizer_config=Configure.Vectorizer.text2vec_openai(model=os.environ.get("SWIFT_EMBEDDING_MODEL", "text-embedding-3-small")),
         generative_config=Configure.Generative.openai(
             model="gpt-3.5-turbo",
         ),
@@ -76,6 +79,7 @@ else:
             Property(name="doc_type", data_type=DataType.TEXT, description="Document type"),
             Property(name="doc_uuid", data_type=DataType.TEXT, description="Document UUID", skip_vectorization=True, vectorize_property_name=True),
             Property(name="chunk_id", data_type=DataType.NUMBER, description="Document chunk from the whole document", skip_vectorization=True, vectorize_property_name=True),
+            Property(name="doc_hash", data_type=DataType.TEXT, description="Hash of the document path", skip_vectorization=True, vectorize_property_name=False),
         ],
     )
     msg.good("'Document' and 'Chunk' schemas created")
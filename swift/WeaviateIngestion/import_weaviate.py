@@ -5,9 +5,10 @@ from wasabi import msg  # type: ignore[import]
 
 from haystack import Document
 from haystack.components.preprocessors import DocumentCleaner, DocumentSplitter
-from weaviate import Client
+from weaviate import WeaviateClient
 
 from util import download_nltk, setup_client
+from cache_maintenance import invalidate_cache, write_manifest
 from preprocess_weaviate import retrieve_documentation, retrieve_blogs
 
 from dotenv import load_dotenv
@@ -15,16 +16,15 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-def import_documents(client: Client, documents: list[Document]) -> dict:
+def import_documents(client: WeaviateClient, documents: list[Document]) -> dict:
     """Imports a list of document to the Weaviate Client and returns a list of UUID for the chunks to match
-    @parameter client : Client - Weaviate Client
+    @parameter client : WeaviateClient - Weaviate Client
     @parameter documents : list[Document] - List of whole documents
     @returns dict - The UUID list
     """
     doc_uuid_map = {}
 
-    with client.batch as batch:
-        batch.batch_size = 100
+    with client.collections.use("Document").batch.fixed_size(batch_size=100) as batch:
         for i, d in enumerate(documents):
             msg.info(
                 f"({i+1}/{len(documents)}) Importing document {d.meta['doc_name']}"
@@ -35,25 +35,25 @@ def import_documents(client: Client, documents: list[Document]) -> dict:
                 "doc_name": str(d.meta["doc_name"]),
                 "doc_type": str(d.meta["doc_type"]),
                 "doc_link": str(d.meta["doc_link"]),
+                "doc_hash": str(d.meta["doc_hash"]),
             }
 
-            uuid = client.batch.add_data_object(properties, "Document")
+            uuid = batch.add_object(properties=properties)
             uuid_key = str(d.meta["doc_hash"]).strip().lower()
-            doc_uuid_map[uuid_key] = uuid
+            doc_uuid_map[uuid_key] = str(uuid)
 
     msg.good("Imported all docs")
     return doc_uuid_map
 
 
-def import_chunks(client: Client, chunks: list[Document], doc_uuid_map: dict) -> None:
+def import_chunks(client: WeaviateClient, chunks: list[Document], doc_uuid_map: dict) -> None:
     """Imports a list of chunks to the Weaviate Client and uses a list of UUID for the chunks to match
-    @parameter client : Client - Weaviate Client
+    @parameter client : WeaviateClient - Weaviate Client
     @parameter chunks : list[Document] - List of chunks of documents
     @parameter doc_uuid_map : dict  UUID list of documents the chunks belong to
     @returns None
     """
-    with client.batch as batch:
-        batch.batch_size = 100
+    with client.collections.use("Chunk").batch.fixed_size(batch_size=100) as batch:
         for i, d in enumerate(chunks):
             msg.info(
                 f"({i+1}/{len(chunks)}) Importing chunk of {d.meta['doc_name']} ({d.meta['_split_id']})"
@@ -68,9 +68,10 @@ def import_chunks(client: Client, chunks: list[Document], doc_uuid_map: dict) ->
                 "doc_uuid": uuid,
                 "doc_type": str(d.meta["doc_type"]),
                 "chunk_id": int(d.meta["_split_id"]),
+                "doc_hash": str(d.meta["doc_hash"]),
             }
 
-            client.batch.add_data_object(properties, "Chunk")
+            batch.add_object(properties=properties)
 
     msg.good("Imported all chunks")
 
@@ -102,6 +103,13 @@ def main() -> None:
     doc_uuid_map = import_documents(client, weaviate_data)
     import_chunks(client, chunked_weaviate_data, doc_uuid_map)
 
+    # Drop cached answers generated from documents that changed since the last run
+    manifest = write_manifest(client, weaviate_data)
+    if manifest["changed"]:
+        invalidate_cache(client, manifest["changed"])
+
+    client.close()
+
 
 if __name__ == "__main__":
     typer.run(main)
\ No newline at end of file
@@ -0,0 +1,88 @@
+import json
+import os
+import uuid
+from typing import Optional
+
+from weaviate import WeaviateClient
+from weaviate.classes.config import Configure, DataType, Property
+
+# Written by import_weaviate.py after every run, read by the cache janitor and every API host
+MANIFEST_COLLECTION = "Ingestion"
+# The collection holds one object, the manifest of the last import run
+MANIFEST_ID = str(uuid.uuid5(uuid.NAMESPACE_URL, "swift/ingestion-manifest"))
+
+# Local manifest of earlier versions, only read until the first run stored one in Weaviate
+MANIFEST_PATH = os.environ.get(
+    "SWIFT_INGESTION_MANIFEST",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ingestion_manifest.json"),
+)
+
+
+def manifest_properties() -> list[Property]:
+    """Properties of the Ingestion collection
+    @returns list[Property] - Ingestion properties
+    """
+    return [
+        Property(name="run_id", data_type=DataType.TEXT, description="ID of the import run"),
+        Property(name="finished_at", data_type=DataType.NUMBER, description="End of the import run (unix seconds)"),
+        Property(name="documents", data_type=DataType.TEXT, description="JSON of the content hash by doc_hash"),
+        Property(name="changed", data_type=DataType.TEXT_ARRAY, description="doc_hash of documents changed or removed by the run"),
+    ]
+
+
+def load_manifest(client: WeaviateClient, path: str = MANIFEST_PATH) -> dict:
+    """Load the manifest written by the last import run
+    @parameter client : WeaviateClient - Weaviate Client
+    @parameter path : str - Local manifest of earlier versions, read if Weaviate has none
+    @returns dict - Manifest, empty if no import ran yet
+    """
+    obj = _fetch(client)
+    if obj is not None:
+        properties = obj.properties
+        return {
+            "run_id": properties.get("run_id"),
+            "finished_at": properties.get("finished_at"),
+            "documents": json.loads(properties.get("documents") or "{}"),
+            "changed": list(properties.get("changed") or []),
+        }
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_run_id(client: WeaviateClient) -> Optional[str]:
+    """Return the ID of the last import run without its document hashes
+    @parameter client : WeaviateClient - Weaviate Client
+    @returns Optional[str] - Run ID, None if no run stored its manifest yet
+    """
+    obj = _fetch(client, ["run_id"])
+    return obj.properties.get("run_id") if obj is not None else None
+
+
+def save_manifest(client: WeaviateClient, manifest: dict) -> None:
+    """Store the manifest of an import run, replacing the previous one
+    @parameter client : WeaviateClient - Weaviate Client
+    @parameter manifest : dict - run_id, finished_at, documents and changed
+    """
+    if not client.collections.exists(MANIFEST_COLLECTION):
+        client.collections.create(
+            MANIFEST_COLLECTION,
+            description="Manifest of the last import run",
+            vectorizer_config=Configure.Vectorizer.none(),
+            properties=manifest_properties(),
+        )
+    collection = client.collections.use(MANIFEST_COLLECTION)
+    properties = {**manifest, "documents": json.dumps(manifest["documents"])}
+    if collection.data.exists(MANIFEST_ID):
+        collection.data.replace(uuid=MANIFEST_ID, properties=properties)
+    else:
+        collection.data.insert(properties=properties, uuid=MANIFEST_ID)
+
+
+def _fetch(client: WeaviateClient, return_properties: list[str] = None):
+    if not client.collections.exists(MANIFEST_COLLECTION):
+        return None
+    return client.collections.use(MANIFEST_COLLECTION).query.fetch_object_by_id(
+        MANIFEST_ID, return_properties=return_properties
+    )
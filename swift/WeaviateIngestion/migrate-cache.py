@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+
+import typer
+from wasabi import msg  # type: ignore[import]
+from weaviate.classes.query import Filter
+
+from util import cache_properties, setup_client
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from SwiftEngine.cache_format import encode_entry  # noqa: E402
+
+load_dotenv()
+
+
+def resolve_chunk_id(chunks, result: dict) -> str:
+    """Find the UUID of a chunk stored in a legacy cache entry
+    @parameter chunks : Collection - Chunk collection
+    @parameter result : dict - Legacy result dict
+    @returns str - Chunk UUID or None if the chunk no longer exists
+    """
+    if result.get("_additional", {}).get("id"):
+        return str(result["_additional"]["id"])
+
+    response = chunks.query.fetch_objects(
+        filters=Filter.by_property("doc_uuid").equal(str(result["doc_uuid"]))
+        & Filter.by_property("chunk_id").equal(float(result["chunk_id"])),
+        limit=1,
+    )
+    if not response.objects:
+        return None
+    return str(response.objects[0].uuid)
+
+
+def main(dry_run: bool = False, delete_unresolved: bool = False) -> None:
+    msg.divider("Starting cache migration")
+
+    client = setup_client(
+        openai_key=os.environ.get("OPENAI_API_KEY", ""),
+        weaviate_url=os.environ.get("WCD_URL", ""),
+        weaviate_key=os.environ.get("WCD_API_KEY", ""),
+    )
+
+    if not client:
+        return
+
+    cache = client.collections.use("Cache")
+    chunks = client.collections.use("Chunk")
+
+    # Add the properties of the compact format to existing collections
+    existing = {p.name for p in cache.config.get().properties}
+    for prop in cache_properties():
+        if prop.name not in existing and not dry_run:
+            cache.config.add_property(prop)
+            msg.info(f"Added property {prop.name}")
+
+    migrated, skipped, unresolved = 0, 0, 0
+    for obj in cache.iterator():
+        properties = obj.properties
+        if properties.get("format") or not properties.get("results"):
+            skipped += 1
+            continue
+
+        results = json.loads(properties["results"])
+        for result in results:
+            chunk_id = resolve_chunk_id(chunks, result)
+            if chunk_id is None:
+                break
+            result.setdefault("_additional", {})["id"] = chunk_id
+        else:
+            if not dry_run:
+                cache.data.update(
+                    uuid=obj.uuid,
+                    properties={
+                        **encode_entry(properties["query"], results, properties["system"]),
+                        "system": "",
+                        "results": "",
+                    },
+                )
+            migrated += 1
+            continue
+
+        unresolved += 1
+        msg.warn(f"Chunks of cached query '{properties['query']}' no longer exist")
+        if delete_unresolved and not dry_run:
+            cache.data.delete_by_id(obj.uuid)
+
+    msg.good(
+        f"Migrated {migrated} entries, {skipped} already compact, {unresolved} unresolved"
+        + (" (dry run)" if dry_run else "")
+    )
+    client.close()
+
+
+if __name__ == "__main__":
+    typer.run(main)
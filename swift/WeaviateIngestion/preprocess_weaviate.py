@@ -129,10 +129,9 @@ def chunking_data(
     )
     chunked_docs = splitter.run(documents=cleaned_docs)["documents"]
 
-    # Add split_id to each chunk
+    # Number the chunks of each document by position (1-based), the engine merges neighbouring chunks by this id
     for doc in chunked_docs:
-        for i, chunk in enumerate(doc.content.split('. ')):
-            doc.meta['_split_id'] = i + 1
+        doc.meta['_split_id'] = doc.meta.get('split_id', 0) + 1
 
     msg.good(f"Successful splitting (total {len(chunked_docs)})")
     return chunked_docs
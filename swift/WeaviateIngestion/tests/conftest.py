@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The ingestion scripts import their helpers as top-level modules (they run from WeaviateIngestion/)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
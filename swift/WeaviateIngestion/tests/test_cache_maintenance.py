@@ -0,0 +1,162 @@
+import json
+import os
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from haystack import Document
+from wasabi import msg
+
+from cache_maintenance import expire_cache, invalidate_cache, write_manifest
+from manifest import load_manifest, load_run_id
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    for level in ("info", "good"):
+        monkeypatch.setattr(msg, level, lambda *args, **kwargs: None)
+
+
+class StubCache:
+    """Cache collection holding properties by UUID, filters are matched by target and value"""
+
+    def __init__(self, objects: dict):
+        self.objects = objects
+        self.data = SimpleNamespace(update=self.update, delete_many=self.delete_many)
+
+    def iterator(self, return_properties=None):
+        for oid, properties in list(self.objects.items()):
+            yield SimpleNamespace(uuid=oid, properties=dict(properties))
+
+    def update(self, uuid, properties):
+        self.objects[uuid].update(properties)
+
+    def delete_many(self, where):
+        wanted = {str(value) for value in where.value}
+        if where.target == "_id":
+            deleted = [oid for oid in self.objects if str(oid) in wanted]
+        else:
+            deleted = [
+                oid
+                for oid, properties in self.objects.items()
+                if wanted & set(properties.get(where.target, []))
+            ]
+        for oid in deleted:
+            del self.objects[oid]
+        return SimpleNamespace(successful=len(deleted))
+
+
+def stub_client(objects: dict) -> SimpleNamespace:
+    cache = StubCache(objects)
+    return SimpleNamespace(collections=SimpleNamespace(use=lambda name: cache))
+
+
+class StubManifestClient:
+    """Client whose collections hold properties by UUID, created on first use"""
+
+    def __init__(self):
+        self.store = {}
+        self.collections = SimpleNamespace(
+            exists=lambda name: name in self.store,
+            create=lambda name, **kwargs: self.store.setdefault(name, {}),
+            use=self.collection,
+        )
+
+    def collection(self, name: str) -> SimpleNamespace:
+        objects = self.store[name]
+
+        def fetch_object_by_id(uuid, return_properties=None):
+            properties = objects.get(str(uuid))
+            if properties is None:
+                return None
+            if return_properties is not None:
+                properties = {key: properties[key] for key in return_properties}
+            return SimpleNamespace(uuid=uuid, properties=dict(properties))
+
+        def insert(properties, uuid):
+            objects[str(uuid)] = dict(properties)
+
+        return SimpleNamespace(
+            query=SimpleNamespace(fetch_object_by_id=fetch_object_by_id),
+            data=SimpleNamespace(
+                exists=lambda uuid: str(uuid) in objects,
+                insert=insert,
+                replace=lambda uuid, properties: insert(properties, uuid),
+            ),
+        )
+
+
+def test_expire_cache_drops_old_entries_then_the_least_used():
+    now = time.time()
+    old, rare, frequent, newer_rare = (uuid.uuid4() for _ in range(4))
+    objects = {
+        old: {"created_at": now - 7200, "hits": 50},
+        rare: {"created_at": now - 600, "hits": 1},
+        frequent: {"created_at": now - 600, "hits": 9},
+        newer_rare: {"created_at": now - 60, "hits": 1},
+    }
+
+    assert expire_cache(stub_client(objects), ttl_seconds=3600, max_entries=2) == (1, 1)
+    # Equal hit counts evict the older entry first
+    assert set(objects) == {frequent, newer_rare}
+
+
+def test_expire_cache_keeps_entries_without_creation_time():
+    legacy = uuid.uuid4()
+    objects = {legacy: {"created_at": None, "hits": None}}
+
+    assert expire_cache(stub_client(objects), ttl_seconds=3600, max_entries=10) == (0, 0)
+    assert objects[legacy]["created_at"] == pytest.approx(time.time(), abs=5)
+
+
+def test_invalidate_cache_deletes_answers_of_changed_documents():
+    kept, stale = uuid.uuid4(), uuid.uuid4()
+    objects = {kept: {"doc_hashes": ["a", "b"]}, stale: {"doc_hashes": ["b", "c"]}}
+
+    assert invalidate_cache(stub_client(objects), ["c", "d"]) == 1
+    assert set(objects) == {kept}
+
+
+def test_write_manifest_lists_changed_and_removed_documents(tmp_path):
+    client = StubManifestClient()
+    path = str(tmp_path / "missing.json")
+    first = write_manifest(
+        client,
+        [
+            Document(content="one", meta={"doc_hash": "a"}),
+            Document(content="two", meta={"doc_hash": "b"}),
+            Document(content="three", meta={"doc_hash": "c"}),
+        ],
+        path,
+    )
+    second = write_manifest(
+        client,
+        [
+            Document(content="one", meta={"doc_hash": "a"}),
+            Document(content="two, edited", meta={"doc_hash": "b"}),
+            Document(content="four", meta={"doc_hash": "d"}),
+        ],
+        path,
+    )
+
+    assert first["changed"] == []
+    assert second["changed"] == ["b", "c"]
+    assert second["run_id"] != first["run_id"]
+    # Stored in Weaviate, not on the local disk
+    assert not os.path.exists(path)
+    assert load_manifest(client, path) == second
+    assert load_run_id(client) == second["run_id"]
+
+
+def test_write_manifest_compares_against_a_legacy_local_manifest(tmp_path):
+    client = StubManifestClient()
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"run_id": "legacy", "documents": {"a": "old hash"}, "changed": []}))
+
+    assert load_run_id(client) is None
+    assert load_manifest(client, str(path))["run_id"] == "legacy"
+    manifest = write_manifest(client, [Document(content="one", meta={"doc_hash": "a"})], str(path))
+
+    assert manifest["changed"] == ["a"]
+    assert load_run_id(client) == manifest["run_id"]
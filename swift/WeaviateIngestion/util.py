@@ -1,23 +1,29 @@
 import hashlib
+import os
 import ssl
+import sys
 
 import nltk
 import openai
-import weaviate  # type: ignore[import]
-from weaviate import Client
+from weaviate import WeaviateClient
+from weaviate.classes.config import DataType, Property
 from typing import Optional
 
 from wasabi import msg  # type: ignore[import]
 
+# Ingestion scripts connect with the same pool and timeout settings as the API
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from SwiftEngine.client import connect  # noqa: E402
+
 
 def setup_client(
     openai_key: str, weaviate_url: str, weaviate_key: str
-) -> Optional[Client]:
+) -> Optional[WeaviateClient]:
     """Hash a string
     @parameter openai_key : str - OpenAI API Key
     @parameter weaviate_url : str - Weaviate URL to cluster
     @parameter weaviate_key : str - Weaviate API Key
-    @returns Optional[Client] - The Weaviate Client
+    @returns Optional[WeaviateClient] - The Weaviate Client
     """
 
     if not openai_key:
@@ -33,20 +39,32 @@ def setup_client(
         return None
 
     openai.api_key = openai_key
-    url = weaviate_url
-    auth_config = weaviate.auth.AuthApiKey(api_key=weaviate_key)
-
-    client = weaviate.connect_to_wcs(
-        cluster_url=url,
-        headers={"X-OpenAI-Api-Key": openai.api_key},
-        auth_credentials=auth_config,
-    )
+    client = connect(weaviate_url, weaviate_key, openai_key)
 
     msg.good("Client connected to Weaviate Instance")
 
     return client
 
 
+def cache_properties() -> list[Property]:
+    """Properties of the Cache collection. Entries reference their chunks by UUID and store the answer compressed,
+    `system` and `results` are only filled by legacy entries
+    @returns list[Property] - Cache properties
+    """
+    return [
+        Property(name="query", data_type=DataType.TEXT, description="Query"),
+        Property(name="system", data_type=DataType.TEXT, description="System message", skip_vectorization=True, vectorize_property_name=False),
+        Property(name="results", data_type=DataType.TEXT, description="List of results", skip_vectorization=True, vectorize_property_name=False),
+        Property(name="answer", data_type=DataType.TEXT, description="Compressed system message", skip_vectorization=True, vectorize_property_name=False),
+        Property(name="chunk_ids", data_type=DataType.TEXT_ARRAY, description="UUIDs of the retrieved chunks", skip_vectorization=True, vectorize_property_name=False),
+        Property(name="scores", data_type=DataType.NUMBER_ARRAY, description="Scores of the retrieved chunks", skip_vectorization=True, vectorize_property_name=False),
+        Property(name="format", data_type=DataType.INT, description="Cache entry format version", skip_vectorization=True, vectorize_property_name=False),
+        Property(name="created_at", data_type=DataType.NUMBER, description="Creation time (unix seconds)", skip_vectorization=True, vectorize_property_name=False),
+        Property(name="hits", data_type=DataType.INT, description="Number of cache hits", skip_vectorization=True, vectorize_property_name=False),
+        Property(name="doc_hashes", data_type=DataType.TEXT_ARRAY, description="doc_hash of the documents the answer was generated from", skip_vectorization=True, vectorize_property_name=False),
+    ]
+
+
 def hash_string(text: str) -> str:
     """Hash a string
     @parameter text : str - The string to hash
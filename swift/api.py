@@ -1,30 +1,78 @@
 import os
-import weaviate 
+import hmac
+import json
+import time
+from contextlib import asynccontextmanager
 
 from wasabi import msg 
 
-from fastapi import FastAPI, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Optional
 
 from dotenv import load_dotenv
 
 from SwiftEngine.SimpleSwiftEngine import SimpleSwiftQueryEngine
+from SwiftEngine.admission import GENERATION, LOOKUP, RateLimiter, Rejected
+from SwiftEngine.AsyncSwiftEngine import AsyncSwiftQueryEngine
+from SwiftEngine.client import WeaviateClientManager
+from SwiftEngine.deadline import DeadlineExceeded, deadline_scope
+from SwiftEngine.embedding import EmbeddingModelMismatch
+from SwiftEngine.metrics import ERRORS, IN_FLIGHT, REGISTRY
+from SwiftEngine.tracing import Trace, finish_trace, should_profile, start_trace
 
 load_dotenv()
 
-# Initialize the SimpleSwiftQueryEngine with API keys and Weaviate URL from environment variables
-swift_engine = SimpleSwiftQueryEngine(
-    os.environ.get("WCD_URL", ""),
-    os.environ.get("WCD_API_KEY", ""),
-    os.environ.get("OPENAI_API_KEY", ""),
-)
+swift_engine: AsyncSwiftQueryEngine = None
+# Per-client token buckets, disabled unless SWIFT_RATE_LIMIT is set
+rate_limiter = RateLimiter()
+
+
+def create_swift_engine() -> AsyncSwiftQueryEngine:
+    """Create the engine of this worker process, replaced by the benchmark server to use a fake backend
+    @returns AsyncSwiftQueryEngine - Engine owning its Weaviate client manager
+    """
+    # Each worker process owns one client manager, it connects on first use and
+    # keeps the cluster readiness up to date in the background
+    client_manager = WeaviateClientManager(
+        os.environ.get("WCD_URL", ""),
+        os.environ.get("WCD_API_KEY", ""),
+        os.environ.get("OPENAI_API_KEY", ""),
+    ).start()
+
+    # Initialize the SimpleSwiftQueryEngine and wrap it so blocking Weaviate calls run off the event loop
+    return AsyncSwiftQueryEngine(
+        SimpleSwiftQueryEngine(
+            os.environ.get("WCD_URL", ""),
+            os.environ.get("WCD_API_KEY", ""),
+            os.environ.get("OPENAI_API_KEY", ""),
+            client_manager=client_manager,
+        )
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global swift_engine
+    swift_engine = create_swift_engine()
+    # Queries embedded with another model than the collections were vectorized with match the wrong chunks
+    try:
+        swift_engine.engine.check_embedding_model()
+    except EmbeddingModelMismatch:
+        swift_engine.close()
+        swift_engine.engine.client_manager.close()
+        raise
+    except Exception as e:
+        msg.warn(f"Could not check the embedding model of the collections: {str(e)}")
+    yield
+    swift_engine.close()
+    swift_engine.engine.client_manager.close()
 
-msg.good("Connected to Weaviate Client")
 
 # FastAPI App
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = ["http://localhost:3000"]
 
@@ -40,17 +88,28 @@ app.add_middleware(
 # Define a Pydantic model for query payload
 class QueryPayload(BaseModel):
     query: str
+    # Generative model of this request, picked by the model router if not given
+    model: Optional[str] = None
+
+# Define a Pydantic model for the batch query payload
+class QueryBatchPayload(BaseModel):
+    queries: list[str]
+    model: Optional[str] = None
 
 # Define a Pydantic model for get document payload
 class GetDocumentPayload(BaseModel):
     document_id: str
 
+# Define a Pydantic model for the batched get documents payload
+class GetDocumentsPayload(BaseModel):
+    document_ids: list[str]
+
 # Define health check endpoint
 @app.get("/health")
 async def root():
     try:
         # Check if the Weaviate client is ready
-        if swift_engine.get_client().is_ready():
+        if await swift_engine.is_ready():
             return JSONResponse(
                 content={
                     "message": "Alive!",
@@ -72,12 +131,100 @@ async def root():
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
         )
 
+# Cache and background writer counters
+@app.get("/stats")
+async def stats():
+    return JSONResponse(content=swift_engine.stats())
+
+
+def traced_response(
+    content: dict, trace: Trace, debug: bool, status_code: int = status.HTTP_200_OK
+) -> JSONResponse:
+    """Return a JSON response with a Server-Timing header, debug requests also get the full trace"""
+    finish_trace(trace)
+    if debug:
+        content["trace"] = trace.to_dict()
+    return JSONResponse(
+        content=content,
+        status_code=status_code,
+        headers={"Server-Timing": trace.server_timing()},
+    )
+
+
+def profile_request(request: Request, debug: bool) -> bool:
+    """Decide whether to profile a request. Profiles cost CPU and disk, so ?debug=true only asks
+    for one with the SWIFT_DEBUG_TOKEN in the X-Debug-Token header, sampled requests are unaffected"""
+    token = os.environ.get("SWIFT_DEBUG_TOKEN", "")
+    authorized = bool(token) and hmac.compare_digest(
+        request.headers.get("x-debug-token", "").encode(), token.encode()
+    )
+    return should_profile(debug and authorized)
+
+
+def client_id(request: Request) -> str:
+    """Identify the client for rate limiting by its remote address. The X-Client-Id header is
+    set by the caller, so it is only trusted from the proxies listed in SWIFT_TRUSTED_PROXIES"""
+    host = request.client.host if request.client else "unknown"
+    trusted = {p.strip() for p in os.environ.get("SWIFT_TRUSTED_PROXIES", "").split(",") if p.strip()}
+    if host in trusted and request.headers.get("x-client-id"):
+        return request.headers["x-client-id"]
+    return host
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compare an If-None-Match header with an ETag (RFC 9110 weak comparison): a list of
+    tags separated by commas, each possibly weak (W/"..."), or * for any
+    @parameter if_none_match : Optional[str] - Header value
+    @parameter etag : str - Current ETag
+    @returns bool - Whether the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+
+
+def rejected_response(e: Rejected, content: dict) -> JSONResponse:
+    """Return a shed request's 429/503 with a Retry-After header"""
+    msg.warn(f"Request rejected ({e.status_code}): {str(e)}")
+    return JSONResponse(
+        content=content,
+        status_code=e.status_code,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def unknown_model_response(model: Optional[str]) -> Optional[JSONResponse]:
+    """Return a 400 if the request asks for a model that is not offered, None otherwise"""
+    if model is None or model in swift_engine.models():
+        return None
+    return JSONResponse(
+        content={
+            "system": f"Unknown model {model}, use one of {sorted(swift_engine.models())}",
+            "documents": [],
+        },
+        status_code=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+# Prometheus metrics
+@app.get("/metrics")
+async def metrics():
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 # Query endpoint
 @app.post("/query")
-async def query(payload: QueryPayload):
+async def query(payload: QueryPayload, request: Request, debug: bool = False):
+    trace = start_trace("query", profile=profile_request(request, debug), debug=debug)
+    unknown_model = unknown_model_response(payload.model)
+    if unknown_model:
+        return unknown_model
     try:
-        # Use the query engine to process the query
-        system_msg,results = swift_engine.query(payload.query)
+        rate_limiter.check(client_id(request), GENERATION)
+        # Use the query engine to process the query, every stage runs within its share of the deadline
+        with IN_FLIGHT.track("query"), deadline_scope():
+            system_msg,results = await swift_engine.query(payload.query, payload.model)
         msg.good(f"Succesfully processed query: {payload.query}")
 
         # if results[0]["_additional"]["generate"]["error"]:
@@ -88,78 +235,300 @@ async def query(payload: QueryPayload):
         # if system_msg == None:
         #     msg.warn(results[0])
 
-        return JSONResponse(
-            content={
+        return traced_response(
+            {
                 "system": system_msg,
                 "documents": results,
-            }
+            },
+            trace,
+            debug,
+        )
+    except Rejected as e:
+        return rejected_response(e, {"system": str(e), "documents": []})
+    except DeadlineExceeded as e:
+        msg.warn(f"Query {payload.query} ran out of time: {str(e)}")
+        return traced_response(
+            {"system": str(e), "documents": []},
+            trace,
+            debug,
+            status.HTTP_504_GATEWAY_TIMEOUT,
         )
     except Exception as e:
+        ERRORS.inc("query")
         msg.fail(f"Query failed: {str(e)}")
-        return JSONResponse(
-            content={
+        return traced_response(
+            {
                 "system": f"Something went wrong! {str(e)}",
                 "documents": [],
-            }
+            },
+            trace,
+            debug,
         )
-    
-    
-@app.post("/suggestions")
-async def suggestions(payload: QueryPayload):
+
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """
+    Streaming response holding generation slots taken before it was returned, none
+    for a cache hit. The slots are freed once the response is sent or failed, also
+    when the client went away before the body was iterated and the generator never ran.
+    """
+
+    def __init__(self, content, slots: int = 1, **kwargs):
+        super().__init__(content, **kwargs)
+        self.slots = slots
+        self.start = time.perf_counter()
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.slots:
+                swift_engine.admission.release(
+                    GENERATION, time.perf_counter() - self.start, slots=self.slots
+                )
+
+
+# Streaming query endpoint (Server-Sent Events)
+@app.post("/query/stream")
+async def query_stream(payload: QueryPayload, request: Request, debug: bool = False):
+    unknown_model = unknown_model_response(payload.model)
+    if unknown_model:
+        return unknown_model
+    # Headers are sent before the answer, debug requests get the trace as a last event instead
+    trace = start_trace("query_stream", profile=profile_request(request, debug), debug=debug)
+    # Cache hits are answered from the lookup lane, only a miss takes a generation slot. The
+    # slot is taken before the response starts, rejections still get their status code
     try:
-        suggestions = swift_engine.get_suggestions(payload.query)
+        rate_limiter.check(client_id(request), GENERATION)
+        try:
+            lookup = await swift_engine.lookup_cache(payload.query)
+        except Rejected:
+            raise
+        except Exception as e:
+            # The stream looks the cache up again and reports the error as an event
+            msg.warn(f"Cache lookup failed for streamed query {payload.query}: {str(e)}")
+            lookup = None
+        slots = 0 if lookup and lookup[0] else 1
+        if slots:
+            await swift_engine.admission.acquire(GENERATION)
+    except Rejected as e:
+        return rejected_response(e, {"system": str(e)})
+
+    async def events():
+        try:
+            with IN_FLIGHT.track("query_stream"):
+                async for event, data in swift_engine.stream_query(
+                    payload.query, payload.model, lookup
+                ):
+                    yield sse_event(event, data)
+            msg.good(f"Succesfully streamed query: {payload.query}")
+        except Exception as e:
+            ERRORS.inc("query_stream")
+            msg.fail(f"Streaming query failed: {str(e)}")
+            yield sse_event("error", {"system": f"Something went wrong! {str(e)}"})
+        finish_trace(trace)
+        if debug:
+            yield sse_event("trace", trace.to_dict())
+
+    return SlotStreamingResponse(
+        events(),
+        slots=slots,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
+
+# Batch query endpoint (newline-delimited JSON, one line per query in input order)
+@app.post("/query_batch")
+async def query_batch(payload: QueryBatchPayload, request: Request, debug: bool = False):
+    max_batch_size = int(os.environ.get("SWIFT_MAX_BATCH_SIZE", 100))
+    if len(payload.queries) > max_batch_size:
         return JSONResponse(
-            content={
+            content={"system": f"Batches are limited to {max_batch_size} queries"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    unknown_model = unknown_model_response(payload.model)
+    if unknown_model:
+        return unknown_model
+    # The batch holds one generation slot per concurrent generation, so batches count against SWIFT_MAX_GENERATIONS
+    parallelism = min(int(os.environ.get("SWIFT_BATCH_PARALLELISM", 8)), max(1, len(payload.queries)))
+    try:
+        rate_limiter.check(client_id(request), GENERATION, cost=len(payload.queries))
+        slots = await swift_engine.admission.acquire(GENERATION, parallelism)
+    except Rejected as e:
+        return rejected_response(e, {"system": str(e)})
+
+    async def lines():
+        trace = start_trace("query_batch", profile=profile_request(request, debug), debug=debug)
+        index = 0
+        try:
+            # One deadline for the whole batch, its generations get whatever is left of it
+            with IN_FLIGHT.track("query_batch"), deadline_scope(
+                float(os.environ.get("SWIFT_BATCH_DEADLINE", 120))
+            ):
+                async for system_msg, results in swift_engine.query_many(
+                    payload.queries, payload.model, parallelism=slots
+                ):
+                    line = {
+                        "index": index,
+                        "query": payload.queries[index],
+                        "system": system_msg,
+                        "documents": results,
+                    }
+                    yield json.dumps(line) + "\n"
+                    index += 1
+            msg.good(f"Succesfully processed batch of {len(payload.queries)} queries")
+        except Exception as e:
+            ERRORS.inc("query_batch")
+            msg.fail(f"Batch query failed: {str(e)}")
+            yield json.dumps({"index": index, "system": f"Something went wrong! {str(e)}"}) + "\n"
+        finish_trace(trace)
+        if debug:
+            yield json.dumps({"trace": trace.to_dict()}) + "\n"
+
+    return SlotStreamingResponse(
+        lines(),
+        slots=slots,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.post("/suggestions")
+async def suggestions(payload: QueryPayload, request: Request, debug: bool = False):
+    trace = start_trace("suggestions", profile=profile_request(request, debug), debug=debug)
+    try:
+        rate_limiter.check(client_id(request), LOOKUP)
+        with IN_FLIGHT.track("suggestions"):
+            suggestions = await swift_engine.get_suggestions(payload.query)
+
+        return traced_response(
+            {
                 "suggestions": suggestions,
-            }
+            },
+            trace,
+            debug,
         )
+    except Rejected as e:
+        return rejected_response(e, {"suggestions": []})
     except Exception as e:
-        return JSONResponse(
-            content={
+        ERRORS.inc("suggestions")
+        return traced_response(
+            {
                 "suggestions": [],
-            }
+            },
+            trace,
+            debug,
         )
 
 
 # Get document by ID endpoint    
 @app.post("/get_document")
-async def get_document(payload: GetDocumentPayload):
+async def get_document(payload: GetDocumentPayload, request: Request, debug: bool = False):
     msg.info(f"Document ID received: {payload.document_id}")
+    trace = start_trace("get_document", profile=profile_request(request, debug), debug=debug)
 
     try:
+        rate_limiter.check(client_id(request), LOOKUP)
         # Use the query engine to retrieve the document by ID
-        document = swift_engine.retrieve_document(payload.document_id)
+        with IN_FLIGHT.track("get_document"):
+            document = await swift_engine.retrieve_document(payload.document_id)
         msg.good(f"Succesfully retrieved document: {payload.document_id}")
+        return traced_response(
+            {
+                "document": document,
+            },
+            trace,
+            debug,
+        )
+    except Rejected as e:
+        return rejected_response(e, {"document": {}})
+    except Exception as e:
+        ERRORS.inc("get_document")
+        msg.fail(f"All Document retrieval failed: {str(e)}")
+        return traced_response(
+            {
+                "document": {},
+            },
+            trace,
+            debug,
+        )
+
+# Get multiple documents by ID endpoint
+@app.post("/get_documents")
+async def get_documents(payload: GetDocumentsPayload, request: Request):
+    msg.info(f"Document IDs received: {len(payload.document_ids)}")
+    max_document_ids = int(os.environ.get("SWIFT_MAX_DOCUMENT_IDS", 100))
+    if len(payload.document_ids) > max_document_ids:
+        return JSONResponse(
+            content={"documents": {}, "system": f"Requests are limited to {max_document_ids} document IDs"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        rate_limiter.check(client_id(request), LOOKUP)
+        with IN_FLIGHT.track("get_documents"):
+            documents = await swift_engine.retrieve_documents(payload.document_ids)
+        msg.good(f"Succesfully retrieved documents: {len(documents)}")
         return JSONResponse(
             content={
-                "document": document,
+                "documents": documents,
             }
         )
+    except Rejected as e:
+        return rejected_response(e, {"documents": {}})
     except Exception as e:
-        msg.fail(f"All Document retrieval failed: {str(e)}")
+        ERRORS.inc("get_documents")
+        msg.fail(f"Document retrieval failed: {str(e)}")
         return JSONResponse(
             content={
-                "document": {},
+                "documents": {},
             }
         )
 
 @app.get("/get_all_documents")
-async def get_all_documents():
+async def get_all_documents(
+    request: Request, cursor: Optional[str] = None, limit: Optional[int] = None
+):
     msg.info(f"Get all documents request received")
 
     try:
-        documents = swift_engine.retrieve_all_documents()
-        msg.good(f"Succesfully retrieved document: {len(documents)} documents")
+        rate_limiter.check(client_id(request), LOOKUP)
+        catalog = await swift_engine.get_document_catalog()
+        headers = {"ETag": catalog.etag, "Cache-Control": "no-cache"}
+
+        # Unchanged catalogs cost a 304
+        if etag_matches(request.headers.get("if-none-match"), catalog.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if limit is None:
+            msg.good(f"Succesfully retrieved document: {len(catalog)} documents")
+            return StreamingResponse(
+                catalog.iter_json(), media_type="application/json", headers=headers
+            )
+
+        documents, next_cursor = catalog.page(cursor, max(1, min(limit, 1000)))
+        msg.good(f"Succesfully retrieved document page: {len(documents)} documents")
         return JSONResponse(
             content={
                 "documents": documents,
-            }
+                "next_cursor": next_cursor,
+                "version": catalog.version,
+            },
+            headers=headers,
         )
+    except Rejected as e:
+        return rejected_response(e, {"documents": []})
     except Exception as e:
+        ERRORS.inc("get_all_documents")
         msg.fail(f"Document retrieval failed: {str(e)}")
         return JSONResponse(
             content={
                 "documents": [],
             }
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,441 @@
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Iterator, Optional
+from uuid import UUID, uuid4
+
+import numpy as np
+
+from SwiftEngine.client import WeaviateClientManager
+from SwiftEngine.embedding import Embedder
+from SwiftEngine.generation import Generator
+
+# Median and p99 latency in milliseconds and error rate of every fake operation
+DEFAULT_PROFILE = {
+    "hybrid": {"median_ms": 40, "p99_ms": 150, "error_rate": 0.0},
+    "first_token": {"median_ms": 400, "p99_ms": 1500, "error_rate": 0.0},
+    "near_vector": {"median_ms": 25, "p99_ms": 100, "error_rate": 0.0},
+    "fetch": {"median_ms": 15, "p99_ms": 60, "error_rate": 0.0},
+    "bm25": {"median_ms": 15, "p99_ms": 60, "error_rate": 0.0},
+    "aggregate": {"median_ms": 10, "p99_ms": 40, "error_rate": 0.0},
+    "batch": {"median_ms": 50, "p99_ms": 200, "error_rate": 0.0},
+    "update": {"median_ms": 10, "p99_ms": 40, "error_rate": 0.0},
+    "embed": {"median_ms": 80, "p99_ms": 300, "error_rate": 0.0},
+    "token": {"median_ms": 15, "p99_ms": 60, "error_rate": 0.0},
+}
+
+VOCABULARY = (
+    "weaviate vector database hybrid search semantic cache module schema class property "
+    "object batch import query graphql python typescript client embedding model openai "
+    "generative feedback loop tenant multi replication backup index hnsw pq compression "
+    "filter where bm25 keyword near text vector distance cosine cluster node shard"
+).split()
+
+
+# Searches of the multi-search requests built by SwiftEngine.graphql
+GQL_SEARCH = re.compile(
+    r'(\w+): (\w+)\((hybrid|nearVector): \{(?:query: ("(?:[^"\\]|\\.)*"), )?vector: \[([^\]]*)\]\}, limit: (\d+)\)'
+)
+
+
+class FakeBackendError(Exception):
+    pass
+
+
+class LatencyModel:
+    """
+    Log-normal latency with a given median and p99 plus a random error rate.
+    """
+
+    def __init__(self, median_ms: float, p99_ms: float, error_rate: float = 0.0):
+        self.median = median_ms / 1000
+        # 2.326 is the z-score of the 99th percentile
+        self.sigma = math.log(max(p99_ms, median_ms) / median_ms) / 2.326 if median_ms > 0 else 0.0
+        self.error_rate = error_rate
+
+    def sample(self) -> float:
+        return self.median * math.exp(self.sigma * random.gauss(0, 1))
+
+    def wait(self, operation: str, timeout: float = None) -> None:
+        """Sleep for one sampled latency, then fail with the configured probability.
+        A latency above the timeout sleeps for the timeout and raises TimeoutError like a client would
+        """
+        latency = self.sample()
+        if timeout is not None and latency > timeout:
+            time.sleep(max(timeout, 0.0))
+            raise TimeoutError(f"{operation} timed out after {timeout:.3f}s")
+        time.sleep(latency)
+        if random.random() < self.error_rate:
+            raise FakeBackendError(f"Injected {operation} error")
+
+
+def load_profile(path: Optional[str] = None) -> dict:
+    """Return the latency models, a JSON file overrides single operations of the default profile
+    @parameter path : Optional[str] - JSON file with {operation: {median_ms, p99_ms, error_rate}}
+    @returns dict - LatencyModel by operation
+    """
+    profile = {name: dict(values) for name, values in DEFAULT_PROFILE.items()}
+    if path:
+        with open(path) as f:
+            for name, values in json.load(f).items():
+                profile.setdefault(name, {}).update(values)
+    return {name: LatencyModel(**values) for name, values in profile.items()}
+
+
+def hash_vector(text: str, dimensions: int = 64) -> np.ndarray:
+    """Deterministic bag-of-words vector, texts sharing words end up close to each other"""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for token in re.findall(r"[a-z0-9]+", text.casefold()):
+        digest = hashlib.md5(token.encode()).digest()
+        vector[digest[0] % dimensions] += 1.0 if digest[1] % 2 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _object(properties: dict, object_id, vector=None, **metadata) -> SimpleNamespace:
+    return SimpleNamespace(
+        uuid=UUID(str(object_id)),
+        properties=dict(properties),
+        metadata=SimpleNamespace(**{"score": None, "distance": None, **metadata}),
+        vector={"default": list(vector)} if vector is not None else {},
+    )
+
+
+class _FakeCollection:
+    def __init__(self, backend: "FakeWeaviateClient", name: str):
+        self.backend = backend
+        self.name = name
+        self.query = _FakeQuery(self)
+        self.aggregate = _FakeAggregate(self)
+        self.batch = _FakeBatch(self)
+        self.data = _FakeData(self)
+        self.config = SimpleNamespace(update=lambda **kwargs: None)
+
+    @property
+    def objects(self) -> dict:
+        return self.backend.store.setdefault(self.name, {})
+
+    def wait(self, operation: str) -> None:
+        self.backend.latency[operation].wait(operation)
+
+    def nearest(self, vector, limit: int) -> list[tuple[float, str]]:
+        """Return (cosine distance, id) of the closest objects"""
+        query = np.asarray(vector, dtype=np.float32)
+        with self.backend.lock:
+            items = [(oid, obj) for oid, obj in self.objects.items() if obj["vector"] is not None]
+        ranked = [(1.0 - float(np.dot(query, obj["vector"])), oid) for oid, obj in items]
+        ranked.sort()
+        return ranked[:limit]
+
+
+class _FakeQuery:
+    def __init__(self, collection: _FakeCollection):
+        self.collection = collection
+
+    def _hybrid(self, vector, limit):
+        results = []
+        for distance, oid in self.collection.nearest(vector, limit):
+            obj = self.collection.objects[oid]
+            results.append(_object(obj["properties"], oid, score=1.0 - distance))
+        return results
+
+    def hybrid(self, query, vector=None, limit=10, **kwargs):
+        self.collection.wait("hybrid")
+        if vector is None:
+            vector = hash_vector(query)
+        return SimpleNamespace(objects=self._hybrid(vector, limit))
+
+    def near_vector(self, near_vector, limit=10, include_vector=False, **kwargs):
+        self.collection.wait("near_vector")
+        objects = []
+        for distance, oid in self.collection.nearest(near_vector, limit):
+            obj = self.collection.objects[oid]
+            vector = obj["vector"] if include_vector else None
+            objects.append(_object(obj["properties"], oid, vector, distance=distance))
+        return SimpleNamespace(objects=objects)
+
+    def fetch_objects(self, limit=None, after=None, filters=None, include_vector=False, **kwargs):
+        self.collection.wait("fetch")
+        with self.collection.backend.lock:
+            ids = sorted(self.collection.objects)
+        if filters is not None:
+            wanted = {str(value) for value in filters.value}
+            ids = [oid for oid in ids if oid in wanted]
+        if after is not None:
+            ids = [oid for oid in ids if oid > str(after)]
+        ids = ids[:limit] if limit else ids
+        objects = []
+        for oid in ids:
+            obj = self.collection.objects[oid]
+            vector = obj["vector"] if include_vector else None
+            objects.append(_object(obj["properties"], oid, vector))
+        return SimpleNamespace(objects=objects)
+
+    def fetch_object_by_id(self, uuid, **kwargs):
+        self.collection.wait("fetch")
+        with self.collection.backend.lock:
+            obj = self.collection.objects.get(str(uuid))
+        return _object(obj["properties"], uuid, obj["vector"]) if obj is not None else None
+
+    def bm25(self, query, limit=10, **kwargs):
+        self.collection.wait("bm25")
+        tokens = set(re.findall(r"[a-z0-9]+", query.casefold()))
+        scored = []
+        for oid, obj in list(self.collection.objects.items()):
+            text = " ".join(str(v) for v in obj["properties"].values()).casefold()
+            score = sum(1 for token in tokens if token in text)
+            if score:
+                scored.append((-score, oid))
+        scored.sort()
+        return SimpleNamespace(
+            objects=[
+                _object(self.collection.objects[oid]["properties"], oid, score=-score)
+                for score, oid in scored[:limit]
+            ]
+        )
+
+
+class _FakeAggregate:
+    def __init__(self, collection: _FakeCollection):
+        self.collection = collection
+
+    def over_all(self, total_count=True, **kwargs):
+        self.collection.wait("aggregate")
+        return SimpleNamespace(total_count=len(self.collection.objects))
+
+
+class _FakeBatchContext:
+    def __init__(self, collection: _FakeCollection):
+        self.collection = collection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.collection.wait("batch")
+        return False
+
+    def add_object(self, properties=None, uuid=None, vector=None, **kwargs):
+        object_id = str(uuid or uuid4())
+        with self.collection.backend.lock:
+            self.collection.objects[object_id] = {
+                "properties": dict(properties or {}),
+                "vector": np.asarray(vector, dtype=np.float32) if vector is not None else None,
+            }
+        return object_id
+
+
+class _FakeBatch:
+    def __init__(self, collection: _FakeCollection):
+        self.collection = collection
+        self.failed_objects = []
+
+    def fixed_size(self, batch_size=100, **kwargs):
+        return _FakeBatchContext(self.collection)
+
+
+class _FakeData:
+    def __init__(self, collection: _FakeCollection):
+        self.collection = collection
+
+    def update(self, uuid, properties=None, **kwargs):
+        self.collection.wait("update")
+        with self.collection.backend.lock:
+            obj = self.collection.objects.get(str(uuid))
+            if obj is not None:
+                obj["properties"].update(properties or {})
+
+    def exists(self, uuid) -> bool:
+        with self.collection.backend.lock:
+            return str(uuid) in self.collection.objects
+
+    def insert(self, properties, uuid=None, vector=None, **kwargs):
+        self.collection.wait("update")
+        object_id = str(uuid or uuid4())
+        with self.collection.backend.lock:
+            self.collection.objects[object_id] = {
+                "properties": dict(properties),
+                "vector": np.asarray(vector, dtype=np.float32) if vector is not None else None,
+            }
+        return UUID(object_id)
+
+    def replace(self, uuid, properties, vector=None, **kwargs):
+        self.insert(properties, uuid=uuid, vector=vector)
+
+
+class FakeWeaviateClient:
+    """
+    In-memory stand-in for the parts of the Weaviate v4 client the engine uses.
+
+    Search is a brute force cosine ranking over hash vectors, every operation sleeps
+    for a latency sampled from its `LatencyModel` and fails at its error rate.
+    """
+
+    def __init__(self, latency: dict, documents: int = 200, chunks_per_document: int = 5, seed: int = 0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.store = {}
+        self._collections = {}
+        self.collections = SimpleNamespace(
+            use=self.collection,
+            get=self.collection,
+            exists=lambda name: name in self.store,
+            create=lambda name, **kwargs: self.collection(name).objects,
+        )
+        self.seed_corpus(documents, chunks_per_document, seed)
+
+    def collection(self, name: str) -> _FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = _FakeCollection(self, name)
+        return self._collections[name]
+
+    def graphql_raw_query(self, gql_query: str) -> SimpleNamespace:
+        """Answer the aliased multi-search Get requests of query_many with one latency for the request"""
+        get = {}
+        searches = GQL_SEARCH.findall(gql_query)
+        if searches:
+            self.latency["hybrid" if searches[0][2] == "hybrid" else "near_vector"].wait("graphql")
+        for alias, name, operator, query, vector, limit in searches:
+            collection = self.collection(name)
+            vector = np.array([float(v) for v in vector.split(",")], dtype=np.float32)
+            objects = []
+            for distance, oid in collection.nearest(vector, int(limit)):
+                obj = collection.objects[oid]
+                additional = {"id": oid}
+                if operator == "hybrid":
+                    additional["score"] = str(1.0 - distance)
+                else:
+                    additional["distance"] = distance
+                    additional["vector"] = [float(v) for v in obj["vector"]]
+                objects.append({**obj["properties"], "_additional": additional})
+            get[alias] = objects
+        return SimpleNamespace(get=get, errors=None, aggregate={}, explore={})
+
+    def seed_corpus(self, documents: int, chunks_per_document: int, seed: int) -> None:
+        """Fill the Document, Chunk and Suggestion collections with synthetic data"""
+        from WeaviateIngestion.suggestions import suggestion_list
+
+        rng = random.Random(seed)
+        document_store = self.store.setdefault("Document", {})
+        chunk_store = self.store.setdefault("Chunk", {})
+        for i in range(documents):
+            doc_id = str(UUID(int=rng.getrandbits(128)))
+            doc_hash = hashlib.sha256(doc_id.encode()).hexdigest()
+            # 60 word chunks overlapping by 30 words, like the 200/100 split of the ingestion
+            words = rng.choices(VOCABULARY, k=30 * chunks_per_document + 30)
+            chunks = [" ".join(words[i * 30 : i * 30 + 60]) for i in range(chunks_per_document)]
+            document_store[doc_id] = {
+                "properties": {
+                    "text": " ".join(words),
+                    "doc_name": f"Document {i}",
+                    "doc_type": rng.choice(["Documentation", "Blog"]),
+                    "doc_link": f"https://example.com/docs/{i}",
+                    "doc_hash": doc_hash,
+                },
+                "vector": None,
+            }
+            for chunk_id, text in enumerate(chunks):
+                chunk_store[str(UUID(int=rng.getrandbits(128)))] = {
+                    "properties": {
+                        "text": text,
+                        "doc_name": f"Document {i}",
+                        "chunk_id": chunk_id,
+                        "doc_uuid": doc_id,
+                        "doc_type": document_store[doc_id]["properties"]["doc_type"],
+                        "doc_hash": doc_hash,
+                    },
+                    "vector": hash_vector(text),
+                }
+        self.store["Suggestion"] = {
+            str(UUID(int=rng.getrandbits(128))): {
+                "properties": {"suggestion": suggestion},
+                "vector": None,
+            }
+            for suggestion in suggestion_list
+        }
+
+    def is_ready(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+class FakeClientManager(WeaviateClientManager):
+    """
+    Client manager handing out a FakeWeaviateClient instead of connecting.
+    """
+
+    def __init__(self, client: FakeWeaviateClient):
+        super().__init__("", "", "", readiness_interval=5)
+        self._client = client
+
+    def get(self) -> FakeWeaviateClient:
+        return self._client
+
+    def reconnect(self) -> None:
+        pass
+
+
+class FakeEmbedder(Embedder):
+    """
+    Hash vector embedder with the latency of the `embed` operation.
+    """
+
+    def __init__(self, latency: LatencyModel, memo_size: int = 4096):
+        super().__init__(memo_size)
+        self.latency = latency
+
+    def _embed(self, texts: list[str]) -> list[list[float]]:
+        self.latency.wait("embed")
+        return [hash_vector(text).tolist() for text in texts]
+
+
+class FakeGenerator(Generator):
+    """
+    Streams an answer citing the query after the `first_token` latency, then one word
+    per `token` latency. Injected errors of the first token are retried like API errors.
+    """
+
+    retryable = (FakeBackendError, TimeoutError)
+
+    def __init__(self, latency: dict, tokens: int = 40, model: str = "gpt-3.5-turbo"):
+        super().__init__(model, backoff=0.01)
+        self.latency = latency
+        self.tokens = tokens
+
+    def _stream(self, prompt: str, model: str, timeout: float) -> Iterator[str]:
+        self.latency["first_token"].wait("first_token", timeout)
+        query = re.search(r"answer the query (.*?) with the given snippets", prompt)
+        yield f"Answer to '{query.group(1) if query else prompt[:40]}'. "
+        for word in random.choices(VOCABULARY, k=self.tokens):
+            self.latency["token"].wait("token", timeout)
+            yield word + " "
+
+
+def build_fake_engine(
+    profile_path: Optional[str] = None, documents: int = 200, latency: dict = None
+):
+    """Build a SimpleSwiftQueryEngine on top of the fake backend
+    @parameter profile_path : Optional[str] - Latency profile JSON, see DEFAULT_PROFILE
+    @parameter documents : int - Number of synthetic documents
+    @parameter latency : dict - LatencyModel by operation, overrides the profile
+    @returns SimpleSwiftQueryEngine - Engine using the fake client, embedder and generator
+    """
+    from SwiftEngine.SimpleSwiftEngine import SimpleSwiftQueryEngine
+
+    latency = latency or load_profile(profile_path)
+    client_manager = FakeClientManager(FakeWeaviateClient(latency, documents=documents)).start()
+    return SimpleSwiftQueryEngine(
+        "",
+        "",
+        "",
+        embedder=FakeEmbedder(latency["embed"]),
+        client_manager=client_manager,
+        generator=FakeGenerator(latency),
+    )
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import typer
+import uvicorn
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from SwiftEngine.AsyncSwiftEngine import AsyncSwiftQueryEngine  # noqa: E402
+
+from fake_backend import build_fake_engine  # noqa: E402
+
+
+def create_fake_app(profile: str = None, documents: int = 200):
+    """Return the FastAPI app with its engine replaced by one on the fake backend
+    @parameter profile : str - Latency profile JSON
+    @parameter documents : int - Number of synthetic documents
+    @returns FastAPI - The app of api.py
+    """
+    import api
+
+    api.create_swift_engine = lambda: AsyncSwiftQueryEngine(
+        build_fake_engine(profile, documents)
+    )
+    return api.app
+
+
+def main(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    profile: str = typer.Option(None, help="Latency profile JSON overriding fake_backend.DEFAULT_PROFILE"),
+    documents: int = 200,
+) -> None:
+    uvicorn.run(create_fake_app(profile, documents), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Optional
+
+import httpx
+import typer
+from wasabi import msg  # type: ignore[import]
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from WeaviateIngestion.suggestions import suggestion_list  # noqa: E402
+
+TOPICS = [
+    "hybrid search", "multi tenancy", "nearText", "nearVector", "batch imports", "backups",
+    "replication", "product quantization", "the HNSW index", "generative search", "BM25",
+    "filters", "cross references", "the Python client", "the Typescript client", "modules",
+]
+TEMPLATES = [
+    "How to use {topic}?",
+    "What is {topic} in Weaviate?",
+    "How do I configure {topic}?",
+    "Why is {topic} slow?",
+    "Explain {topic} with an example",
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of unsorted values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def summarize(samples: list[tuple], duration: float) -> dict:
+    """Summarize (latency, ok) samples
+    @parameter samples : list[tuple] - (latency seconds, ok) pairs
+    @parameter duration : float - Wall clock seconds the samples were taken in
+    @returns dict - Counts, throughput and latency percentiles in ms
+    """
+    latencies = [latency for latency, _ in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "throughput": round(len(samples) / duration, 2) if duration else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+class QueryMix:
+    """
+    Draws requests like real traffic: a share of queries repeats earlier ones (popular
+    questions), suggestions are typed prefixes and documents are opened from the catalog.
+    """
+
+    def __init__(self, weights: dict, repeat_rate: float, document_ids: list[str], seed: int = 0):
+        self.weights = weights
+        self.repeat_rate = repeat_rate
+        self.document_ids = document_ids
+        self.random = random.Random(seed)
+        self.asked = []
+        self.fresh = list(suggestion_list) + [
+            template.format(topic=topic) for template in TEMPLATES for topic in TOPICS
+        ]
+        self.random.shuffle(self.fresh)
+
+    def query(self) -> str:
+        if self.asked and self.random.random() < self.repeat_rate:
+            # Sampling from the history favours queries that were repeated before
+            return self.random.choice(self.asked)
+        query = self.fresh.pop() if self.fresh else f"Question {self.random.random()}"
+        self.asked.append(query)
+        return query
+
+    def next(self) -> tuple[str, str, dict]:
+        """Return the next request as (endpoint name, path, JSON payload)"""
+        endpoint = self.random.choices(list(self.weights), list(self.weights.values()))[0]
+        if endpoint == "get_document" and self.document_ids:
+            return endpoint, "/get_document", {"document_id": self.random.choice(self.document_ids)}
+        if endpoint == "suggestions":
+            query = self.query()
+            return endpoint, "/suggestions", {"query": query[: self.random.randint(3, len(query))]}
+        return "query", "/query", {"query": self.query()}
+
+
+def parse_pairs(value: str, cast=float) -> list[tuple[str, float]]:
+    return [(k.strip(), cast(v)) for k, v in (pair.split(":") for pair in value.split(","))]
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    stages: list[tuple[int, float]],
+    mix: QueryMix,
+) -> dict:
+    """Drive the API through the concurrency stages
+    @parameter client : httpx.AsyncClient - Client pointing at the API
+    @parameter stages : list[tuple[int, float]] - (concurrent users, seconds) per stage
+    @parameter mix : QueryMix - Request generator
+    @returns dict - Report with the summary per stage, per endpoint and overall
+    """
+    samples = {}
+    report = {"stages": []}
+    started = time.perf_counter()
+
+    async def user(deadline: float, stage_samples: list) -> None:
+        while time.perf_counter() < deadline:
+            endpoint, path, payload = mix.next()
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                body = response.json()
+                # The API reports failures with a 200 and an error message
+                ok = response.status_code == 200 and not str(body.get("system", "")).startswith(
+                    "Something went wrong"
+                )
+            except Exception:
+                ok = False
+            sample = (time.perf_counter() - start, ok)
+            samples.setdefault(endpoint, []).append(sample)
+            stage_samples.append(sample)
+
+    for concurrency, seconds in stages:
+        msg.info(f"Stage: {concurrency} concurrent users for {seconds}s")
+        stage_samples = []
+        stage_start = time.perf_counter()
+        deadline = stage_start + seconds
+        await asyncio.gather(*(user(deadline, stage_samples) for _ in range(concurrency)))
+        report["stages"].append(
+            {
+                "concurrency": concurrency,
+                "seconds": seconds,
+                **summarize(stage_samples, time.perf_counter() - stage_start),
+            }
+        )
+
+    duration = time.perf_counter() - started
+    report["endpoints"] = {name: summarize(s, duration) for name, s in samples.items()}
+    report["total"] = summarize([s for values in samples.values() for s in values], duration)
+    return report
+
+
+async def load_document_ids(client: httpx.AsyncClient) -> list[str]:
+    response = await client.get("/get_all_documents", params={"limit": 1000})
+    return [d["_additional"]["id"] for d in response.json().get("documents", [])]
+
+
+async def run(
+    url: Optional[str],
+    stages: list[tuple[int, float]],
+    weights: dict,
+    repeat_rate: float,
+    seed: int,
+    profile: Optional[str],
+) -> dict:
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+            mix = QueryMix(weights, repeat_rate, await load_document_ids(client), seed)
+            return await run_load(client, stages, mix)
+
+    # In-process: the app and the fake backend run in this process, no server needed
+    from fake_server import create_fake_app
+
+    app = create_fake_app(profile)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://swift", timeout=60) as client:
+            mix = QueryMix(weights, repeat_rate, await load_document_ids(client), seed)
+            return await run_load(client, stages, mix)
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Return the endpoints whose p95 regressed by more than max_regression against the baseline"""
+    regressions = []
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous and previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+    return regressions
+
+
+def main(
+    url: str = typer.Option(None, help="API base URL, runs the app in-process on the fake backend if not set"),
+    stages: str = typer.Option("5:10,20:10,50:10", help="Concurrency ramp as users:seconds,..."),
+    mix: str = typer.Option("query:0.3,suggestions:0.6,get_document:0.1", help="Endpoint weights"),
+    repeat_rate: float = typer.Option(0.5, help="Share of queries repeating an earlier query"),
+    seed: int = 0,
+    profile: str = typer.Option(None, help="Latency profile JSON of the in-process fake backend"),
+    output: str = typer.Option(None, help="Write the JSON report to this file"),
+    baseline: str = typer.Option(None, help="Fail if p95 regressed against this report"),
+    max_regression: float = 0.2,
+) -> None:
+    report = asyncio.run(
+        run(
+            url,
+            [(int(c), s) for c, s in parse_pairs(stages)],
+            dict(parse_pairs(mix)),
+            repeat_rate,
+            seed,
+            profile,
+        )
+    )
+    report["config"] = {"url": url, "stages": stages, "mix": mix, "repeat_rate": repeat_rate, "seed": seed}
+
+    print(json.dumps(report, indent=2))
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(report, json.load(f), max_regression)
+        for regression in regressions:
+            msg.fail(regression)
+        if regressions:
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,214 @@
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import typer
+from haystack import Document
+from wasabi import msg  # type: ignore[import]
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.append(ROOT)
+from swift.WeaviateIngestion import preprocess_weaviate  # noqa: E402
+
+FIXTURE_DIR = os.path.join(ROOT, "swift", "data", "test")
+WORDS = (
+    "weaviate vector database search semantic hybrid schema module object class import "
+    "query client python typescript embedding index cluster node batch filter distance"
+).split()
+
+
+def synthetic_mdx(rng: random.Random, target_bytes: int) -> str:
+    """Generate an MDX document with the markup document_cleaning removes"""
+    parts = [
+        "---\ntitle: Synthetic page\nslug: synthetic-page\ntags: ['concepts']\n---\n",
+        "![Hero](./img/hero.png)\n\n<!-- truncate -->\n",
+        "import Tabs from '@theme/Tabs';\nimport TabItem from '@theme/TabItem';\n\n",
+    ]
+    size = sum(len(p) for p in parts)
+    while size < target_bytes:
+        kind = rng.random()
+        if kind < 0.6:
+            part = " ".join(rng.choices(WORDS, k=60)) + ". See [the docs](/developers/weaviate) for more.\n\n"
+        elif kind < 0.75:
+            part = ":::tip Good to know\n" + " ".join(rng.choices(WORDS, k=20)) + "\n:::\n\n"
+        elif kind < 0.9:
+            part = "<Tabs groupId=\"languages\">\n<TabItem value=\"py\" label=\"Python\">\n\n```python\nclient.query.get()\n```\n\n</TabItem>\n</Tabs>\n\n"
+        else:
+            part = "## " + " ".join(rng.choices(WORDS, k=4)).title() + "\n\n"
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def synthetic_path(rng: random.Random, i: int) -> str:
+    depth = rng.randint(1, 4)
+    folders = [f"{rng.randint(0, 20)}_{rng.choice(WORDS)}" for _ in range(depth)]
+    name = "index" if rng.random() < 0.2 else f"{rng.randint(0, 9)}_{rng.choice(WORDS)}-{i}"
+    return os.path.join("developers", *folders, f"{name}.mdx")
+
+
+def build_corpus(kind: str, files: int, doc_kb: float, seed: int) -> list[tuple[str, str]]:
+    """Return (path, text) pairs of a synthetic or fixture based corpus
+    @parameter kind : str - "synthetic" or "fixture" (the MDX files of data/test, repeated)
+    @parameter files : int - Number of files
+    @parameter doc_kb : float - Average synthetic document size in KB
+    @parameter seed : int - Random seed
+    @returns list[tuple[str, str]] - Corpus
+    """
+    rng = random.Random(seed)
+    if kind == "fixture":
+        fixtures = []
+        for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.mdx"))):
+            with open(path) as f:
+                fixtures.append(f.read())
+        return [(synthetic_path(rng, i), fixtures[i % len(fixtures)]) for i in range(files)]
+    return [
+        (synthetic_path(rng, i), synthetic_mdx(rng, int(rng.uniform(0.5, 1.5) * doc_kb * 1024)))
+        for i in range(files)
+    ]
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict:
+    """Time fn (median of repeat runs), then run it once more under tracemalloc
+    @parameter fn : Callable - Benchmark body
+    @parameter repeat : int - Timed runs
+    @returns dict - Median seconds, peak traced bytes and the blocks the run's result still holds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = fn()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # The net change while the result is alive: blocks retained by the run, not every allocation made
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return {"seconds": statistics.median(timings), "peak_bytes": peak, "retained_blocks": blocks}
+
+
+def run_benchmarks(corpus: list[tuple[str, str]], functions: list[str], repeat: int) -> dict:
+    """Benchmark the preprocessing functions over a corpus
+    @parameter corpus : list[tuple[str, str]] - (path, text) pairs
+    @parameter functions : list[str] - Functions to benchmark
+    @parameter repeat : int - Timed runs per function
+    @returns dict - Results by function
+    """
+    texts = [text for _, text in corpus]
+    paths = [path for path, _ in corpus]
+    text_bytes = sum(len(t.encode()) for t in texts)
+    path_bytes = sum(len(p.encode()) for p in paths)
+    cleaned = [preprocess_weaviate.document_cleaning(t) for t in texts]
+
+    benchmarks = {
+        "document_cleaning": (
+            lambda: [preprocess_weaviate.document_cleaning(t) for t in texts],
+            text_bytes,
+        ),
+        "chunking_data": (
+            lambda: preprocess_weaviate.chunking_data(
+                [Document(content=t, meta={"doc_name": p}) for p, t in zip(paths, cleaned)]
+            ),
+            sum(len(t.encode()) for t in cleaned),
+        ),
+        "process_filename": (
+            lambda: [preprocess_weaviate.process_filename(p, "Documentation") for p in paths],
+            path_bytes,
+        ),
+        "document_process_url": (
+            lambda: [preprocess_weaviate.document_process_url(p) for p in paths],
+            path_bytes,
+        ),
+    }
+
+    results = {}
+    for name in functions:
+        fn, input_bytes = benchmarks[name]
+        msg.info(f"Benchmarking {name} over {len(corpus)} files")
+        stats = measure(fn, repeat)
+        results[name] = {
+            **stats,
+            "docs_per_s": round(len(corpus) / stats["seconds"], 1),
+            "mb_per_s": round(input_bytes / 1e6 / stats["seconds"], 3),
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Return the functions that got slower or use more memory than the baseline allows"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["docs_per_s"] < previous["docs_per_s"] * (1 - max_regression):
+            regressions.append(
+                f"{name}: {previous['docs_per_s']} -> {current['docs_per_s']} docs/s"
+            )
+        if current["peak_bytes"] > previous["peak_bytes"] * (1 + max_regression):
+            regressions.append(
+                f"{name}: peak {previous['peak_bytes']} -> {current['peak_bytes']} bytes"
+            )
+    return regressions
+
+
+def main(
+    corpus: str = typer.Option("synthetic", help="synthetic or fixture"),
+    files: int = typer.Option(1000, help="Number of files (1k to 100k)"),
+    doc_kb: float = typer.Option(8, help="Average size of synthetic documents in KB"),
+    functions: str = "document_cleaning,chunking_data,process_filename,document_process_url",
+    repeat: int = 3,
+    seed: int = 0,
+    output: str = typer.Option(None, help="Write the results to this file"),
+    save_baseline: str = typer.Option(None, help="Store the results as a baseline under this path"),
+    baseline: str = typer.Option(None, help="Fail on a regression against this baseline"),
+    max_regression: float = 0.2,
+) -> None:
+    msg.divider(f"Preprocessing benchmark: {files} {corpus} files")
+    documents = build_corpus(corpus, files, doc_kb, seed)
+
+    # chunking_data logs every run, keep the output readable
+    preprocess_weaviate.msg.no_print = True
+    try:
+        results = run_benchmarks(documents, functions.split(","), repeat)
+    finally:
+        preprocess_weaviate.msg.no_print = False
+
+    report = {
+        "config": {"corpus": corpus, "files": files, "doc_kb": doc_kb, "seed": seed},
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    for path in filter(None, [output, save_baseline]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            previous = json.load(f)
+        if previous["config"] != report["config"]:
+            msg.warn(f"Baseline was taken with a different corpus: {previous['config']}")
+        regressions = compare(results, previous["results"], max_regression)
+        for regression in regressions:
+            msg.fail(regression)
+        if regressions:
+            raise typer.Exit(code=1)
+        msg.good("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,142 @@
+import json
+import os
+import re
+import statistics
+import sys
+
+import typer
+from wasabi import msg  # type: ignore[import]
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from SwiftEngine.top_k import TopKPolicy  # noqa: E402
+from WeaviateIngestion.suggestions import suggestion_list  # noqa: E402
+
+
+def content_words(text: str) -> set:
+    return set(re.findall(r"[a-z0-9_]{4,}", text.casefold()))
+
+
+def load_queries(path: str = None) -> list[dict]:
+    """Load the query set, one JSON object per line with a query and optionally the reference answer or relevant documents
+    @parameter path : str - JSONL file with {"query", "answer"?, "relevant"?}, the suggestions if not given
+    @returns list[dict] - Queries
+    """
+    if not path:
+        return [{"query": suggestion} for suggestion in suggestion_list]
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def recall(item: dict, context: str, doc_names: set, baseline_context: str) -> float:
+    """Answer-context recall: the share of the reference answer's content words found in the context.
+    Without an answer the share of relevant documents is used, without either the share of the
+    fixed top-k context that is kept
+    @returns float - Recall between 0 and 1
+    """
+    if item.get("relevant"):
+        relevant = set(item["relevant"])
+        return len(relevant & doc_names) / len(relevant)
+    reference = content_words(item["answer"] if item.get("answer") else baseline_context)
+    if not reference:
+        return 1.0
+    return len(reference & content_words(context)) / len(reference)
+
+
+def build_engine(fake: bool, documents: int):
+    if fake:
+        from fake_backend import DEFAULT_PROFILE, LatencyModel, build_fake_engine
+
+        latency = {name: LatencyModel(0, 0) for name in DEFAULT_PROFILE}
+        return build_fake_engine(documents=documents, latency=latency)
+
+    from SwiftEngine.SimpleSwiftEngine import SimpleSwiftQueryEngine
+
+    return SimpleSwiftQueryEngine(
+        os.environ.get("WCD_URL", ""),
+        os.environ.get("WCD_API_KEY", ""),
+        os.environ.get("OPENAI_API_KEY", ""),
+    )
+
+
+def evaluate(engine, queries: list[dict], policies: dict, baseline: str) -> dict:
+    """Run every query once and compare the contexts the policies keep
+    @parameter engine : SimpleSwiftQueryEngine - Engine used for retrieval and context assembly
+    @parameter queries : list[dict] - Query set
+    @parameter policies : dict - TopKPolicy by name
+    @parameter baseline : str - Name of the reference policy
+    @returns dict - Mean depth, recall and prompt tokens per policy
+    """
+    limit = max(policy.limit for policy in policies.values())
+    model = engine.generator.model
+    samples = {name: [] for name in policies}
+
+    for item in queries:
+        candidates = engine.retrieve_candidates(item["query"], limit=limit)
+        contexts = {}
+        for name, policy in policies.items():
+            results = policy.cut(candidates)
+            passages, report = engine.context_assembler.assemble(results, model)
+            contexts[name] = (results, "\n\n".join(p["text"] for p in passages), report)
+
+        baseline_context = contexts[baseline][1]
+        for name, (results, context, report) in contexts.items():
+            doc_names = {r.get("doc_name") for r in results}
+            samples[name].append(
+                (len(results), recall(item, context, doc_names, baseline_context), report["tokens_after"])
+            )
+
+    baseline_tokens = statistics.mean(tokens for _, _, tokens in samples[baseline]) or 1
+    summary = {}
+    for name, values in samples.items():
+        tokens = statistics.mean(t for _, _, t in values)
+        summary[name] = {
+            **policies[name].to_dict(),
+            "mean_k": round(statistics.mean(k for k, _, _ in values), 2),
+            "recall": round(statistics.mean(r for _, r, _ in values), 4),
+            "tokens": round(tokens, 1),
+            "token_savings": round(1 - tokens / baseline_tokens, 4),
+        }
+    return summary
+
+
+def main(
+    queries: str = typer.Option(None, help="JSONL query set, the suggestions if not set"),
+    fake: bool = typer.Option(True, help="Evaluate on the fake backend instead of WCD_URL"),
+    documents: int = 200,
+    k: int = typer.Option(8, help="Depth of the fixed baseline"),
+    min_k: int = 2,
+    max_k: int = 12,
+    gaps: str = typer.Option("0.15,0.25,0.35", help="Score gaps to try"),
+    relatives: str = typer.Option("0.4,0.5,0.6", help="Relative score floors to try"),
+    output: str = typer.Option(None, help="Write the JSON report to this file"),
+) -> None:
+    items = load_queries(queries)
+    policies = {f"fixed-{k}": TopKPolicy("fixed", k=k)}
+    for gap in map(float, gaps.split(",")):
+        for relative in map(float, relatives.split(",")):
+            policies[f"adaptive-g{gap}-r{relative}"] = TopKPolicy(
+                "adaptive", min_k=min_k, max_k=max_k, gap=gap, relative=relative
+            )
+
+    msg.divider(f"Top-k evaluation: {len(items)} queries, {len(policies)} policies")
+    engine = build_engine(fake, documents)
+    try:
+        summary = evaluate(engine, items, policies, f"fixed-{k}")
+    finally:
+        engine.close()
+
+    msg.table(
+        [
+            (name, s["mean_k"], s["recall"], s["tokens"], f"{s['token_savings']:.1%}")
+            for name, s in summary.items()
+        ],
+        header=("policy", "mean k", "recall", "tokens", "savings"),
+        divider=True,
+    )
+    if output:
+        with open(output, "w") as f:
+            json.dump({"queries": len(items), "policies": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    typer.run(main)
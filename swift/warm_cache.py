@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+import typer
+from wasabi import msg  # type: ignore[import]
+
+from dotenv import load_dotenv
+
+from SwiftEngine.query_log import QueryLog
+from SwiftEngine.warmer import SOURCES, CacheWarmer
+
+load_dotenv()
+
+
+def build_engine(fake: bool):
+    if fake:
+        from benchmarks.fake_backend import DEFAULT_PROFILE, LatencyModel, build_fake_engine
+
+        latency = {name: LatencyModel(0, 0) for name in DEFAULT_PROFILE}
+        return build_fake_engine(latency=latency)
+
+    from SwiftEngine.SimpleSwiftEngine import SimpleSwiftQueryEngine
+
+    return SimpleSwiftQueryEngine(
+        os.environ.get("WCD_URL", ""),
+        os.environ.get("WCD_API_KEY", ""),
+        os.environ.get("OPENAI_API_KEY", ""),
+    )
+
+
+def main(
+    rate: float = typer.Option(
+        float(os.environ.get("SWIFT_WARM_RATE", 1.0)), help="Generations per second"
+    ),
+    top_n: int = typer.Option(
+        int(os.environ.get("SWIFT_WARM_TOP_N", 100)), help="Most frequent logged queries to warm"
+    ),
+    query_log: str = typer.Option(
+        os.environ.get("SWIFT_QUERY_LOG_PATH"), help="Query log written by the API"
+    ),
+    watch: bool = typer.Option(False, help="Keep running and warm again after every ingestion run"),
+    fake: bool = typer.Option(False, help="Warm the fake backend, to try the warmer locally"),
+    output: str = typer.Option(None, help="Write the JSON coverage report to this file"),
+) -> None:
+    msg.divider("Starting cache warmer")
+    engine = build_engine(fake)
+    # Replace the engine's own warmer and query log, closing them first frees their thread and file
+    engine.warmer.close()
+    engine.warmer = CacheWarmer(engine, rate=rate, top_n=top_n)
+    if query_log:
+        if engine.query_log:
+            engine.query_log.close()
+        engine.query_log = QueryLog(query_log)
+    try:
+        report = engine.warmer.run()
+        msg.table(
+            [
+                (
+                    source,
+                    report[source]["queries"],
+                    report[source]["cached"],
+                    report[source]["warmed"],
+                    report[source]["failed"],
+                    f"{report[source]['coverage']:.1%}",
+                )
+                for source in SOURCES
+            ],
+            header=("source", "queries", "already cached", "generated", "failed", "coverage"),
+            divider=True,
+        )
+        if output:
+            with open(output, "w") as f:
+                json.dump(report, f, indent=2)
+
+        if watch:
+            # The ingestion poller triggers the warmer after every import run
+            msg.info("Watching for ingestion runs, stop with Ctrl+C")
+            engine.warmer.start(initial=False)
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    typer.run(main)